@@ -0,0 +1,125 @@
+"""Benchmark parquet encoding options on representative dataframes.
+
+Reports encoded size, write time and read time for each codec (and level)
+so storage cost can be weighed against read latency when choosing the
+``[parquet]`` defaults of a catalog or dataset stage.
+
+Usage:
+    python benchmarks/bench_parquet_encoding.py --rows 1000000 --repeat 3
+"""
+
+import argparse
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import polars as pl
+from rich.console import Console
+from rich.table import Table
+
+from cfa.dataops.parquet import dataframe_to_parquet_bytes, resolve_parquet_options
+
+CODECS = [
+    {"compression": "uncompressed"},
+    {"compression": "snappy"},
+    {"compression": "lz4"},
+    {"compression": "gzip"},
+    {"compression": "zstd", "compression_level": 1},
+    {"compression": "zstd", "compression_level": 3},
+    {"compression": "zstd", "compression_level": 9},
+    {"compression": "zstd", "compression_level": 3, "use_dictionary": False},
+]
+
+
+def surveillance_frame(n_rows: int, seed: int = 0) -> pl.DataFrame:
+    """A long, narrow frame resembling weekly surveillance counts: low
+    cardinality keys, dates and small integer/float measures."""
+    rng = np.random.default_rng(seed)
+    states = np.array([f"S{i:02d}" for i in range(56)])
+    return pl.DataFrame(
+        {
+            "jurisdiction": states[rng.integers(0, len(states), n_rows)],
+            "week_end": pl.date_range(
+                pl.date(2020, 1, 4), pl.date(2030, 1, 4), "1w", eager=True
+            ).sample(n_rows, with_replacement=True, seed=seed),
+            "age_group": rng.choice(["0-4", "5-17", "18-49", "50-64", "65+"], n_rows),
+            "count": rng.poisson(40, n_rows),
+            "rate": rng.gamma(2.0, 5.0, n_rows),
+        }
+    )
+
+
+def wide_frame(n_rows: int, n_cols: int = 40, seed: int = 1) -> pl.DataFrame:
+    """A wide frame of mostly floats with a high cardinality string id."""
+    rng = np.random.default_rng(seed)
+    data = {f"x{i:02d}": rng.normal(size=n_rows) for i in range(n_cols)}
+    data["id"] = [f"rec-{i:012d}" for i in rng.permutation(n_rows)]
+    return pl.DataFrame(data)
+
+
+def _time(func, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = func()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def run(rows: int, repeat: int, library: str) -> Table:
+    frames = {
+        "surveillance": surveillance_frame(rows),
+        "wide": wide_frame(rows),
+    }
+    table = Table(title=f"parquet encoding ({rows:,} rows, best of {repeat})")
+    for col in [
+        "frame",
+        "library",
+        "options",
+        "size (MB)",
+        "write (s)",
+        "read (s)",
+    ]:
+        table.add_column(col)
+    for name, pl_df in frames.items():
+        dfs = {"polars": pl_df, "pandas": pl_df.to_pandas()}
+        for lib, df in dfs.items():
+            if library != "all" and lib != library:
+                continue
+            for codec in CODECS:
+                options = resolve_parquet_options(codec)
+                write_s, pq_bytes = _time(
+                    lambda: dataframe_to_parquet_bytes(df, options), repeat
+                )
+                if lib == "polars":
+                    read_s, _ = _time(
+                        lambda: pl.read_parquet(BytesIO(pq_bytes)), repeat
+                    )
+                else:
+                    read_s, _ = _time(
+                        lambda: pd.read_parquet(BytesIO(pq_bytes)), repeat
+                    )
+                table.add_row(
+                    name,
+                    lib,
+                    ", ".join(f"{k}={v}" for k, v in codec.items()),
+                    f"{len(pq_bytes) / 1e6:.2f}",
+                    f"{write_s:.3f}",
+                    f"{read_s:.3f}",
+                )
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--library", choices=["all", "polars", "pandas"], default="all")
+    args = parser.parse_args()
+    Console().print(run(args.rows, args.repeat, args.library))
+
+
+if __name__ == "__main__":
+    main()
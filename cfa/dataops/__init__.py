@@ -5,19 +5,19 @@ format. Use the existing configuration files as a starting point. Validations
 will run on all configurations.
 """
 
-try:
-    from importlib.metadata import version
-
-    __version__ = version(__name__)
-except ImportError:
-    __version__ = "unknown"
-
-from .catalog import datacat, reportcat
-
 __all__ = ["__version__", "datacat", "reportcat"]
 
 
 def __getattr__(name: str):
+    # the version and catalogs are resolved on first access, so that light
+    # modules (e.g., cfa.dataops.utils or the CLI index) import without them
+    if name == "__version__":
+        try:
+            from importlib.metadata import version
+
+            return version(__name__)
+        except ImportError:
+            return "unknown"
     if name in {"datacat", "reportcat"}:
         from .catalog import datacat, reportcat
 
@@ -0,0 +1,725 @@
+"""Storage backends for blob endpoints.
+
+A backend is selected per catalog by the ``backend`` key of the ``[storage]``
+table in ``catalog_defaults.toml`` (``"azure"``, ``"local:/path"`` or
+``"memory"``), and can be overridden for every catalog with the
+``DATAOPS_BACKEND`` environment variable. Backends registered with
+``register_backend`` (e.g., caching or instrumentation layers wrapping
+another backend) can be selected the same way.
+"""
+
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any, Protocol, runtime_checkable
+
+import polars as pl
+from azure.identity import ManagedIdentityCredential
+from cfa.cloudops.util import check_ext_env
+
+BACKEND_ENV_VAR = "DATAOPS_BACKEND"
+
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    """The storage operations blob endpoints need. Blob names are paths
+    within a container, e.g. ``{prefix}/{version}/{file}``."""
+
+    def check_access(self) -> bool:
+        """Whether the backend can be used from this environment."""
+        ...
+
+    def list(self, account: str, container: str, name_starts_with: str) -> list:
+        """List blobs and virtual directories (names ending in '/') one level
+        below a path. Blobs are mappings with at least 'name', 'size',
+        'creation_time' and 'etag'."""
+        ...
+
+    def stat(self, account: str, container: str, name: str) -> dict | None:
+        """The properties of a blob, or None if it does not exist."""
+        ...
+
+    def get(
+        self,
+        account: str,
+        container: str,
+        name: str,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> bytes:
+        """Read a blob, or a byte range of it."""
+        ...
+
+    def iter_chunks(
+        self, account: str, container: str, name: str, offset: int = 0
+    ) -> Iterator[bytes]:
+        """Stream a blob from a byte offset in chunks."""
+        ...
+
+    def put(
+        self,
+        account: str,
+        container: str,
+        name: str,
+        data: bytes | Iterable[bytes],
+        append: bool = False,
+        overwrite: bool = True,
+    ) -> None:
+        """Write a blob from bytes or an iterable of byte chunks."""
+        ...
+
+    def delete(self, account: str, container: str, name: str) -> None:
+        """Delete a blob."""
+        ...
+
+    def url(self, account: str, container: str, path: str) -> str:
+        """The URL (or glob) of a path for readers such as polars."""
+        ...
+
+    def scan_options(self, account: str, container: str) -> dict | None:
+        """Keyword arguments for polars scans of ``url``, or None if the
+        backend cannot be scanned by URL."""
+        ...
+
+
+def _as_bytes(data: bytes | Iterable[bytes]) -> bytes:
+    return data if isinstance(data, (bytes, bytearray)) else b"".join(data)
+
+
+def _hierarchical(names: Iterable[str], name_starts_with: str) -> dict[str, bool]:
+    """Map the children one level below a path to whether they are blobs."""
+    children = {}
+    for name in names:
+        if name.startswith(name_starts_with):
+            head, sep, _ = name.removeprefix(name_starts_with).partition("/")
+            children[f"{name_starts_with}{head}{sep}"] = not sep
+    return children
+
+
+class ClientPool:
+    """Process-wide, thread-safe cache of the managed identity credential, the
+    polars credential provider built on it and blob container clients keyed by
+    account and container. Pooled clients keep their credential token and
+    HTTP connections between calls, so small reads do not pay for token
+    acquisition or TCP/TLS setup."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._credential = None
+        self._credential_provider = None
+        self._containers: dict[tuple[str, str], Any] = {}
+
+    def credential(self) -> ManagedIdentityCredential:
+        """The shared managed identity credential."""
+        with self._lock:
+            if self._credential is None:
+                self._credential = ManagedIdentityCredential()
+            return self._credential
+
+    def credential_provider(self) -> pl.CredentialProviderAzure:
+        """The shared credential provider for polars scans of blob storage."""
+        with self._lock:
+            if self._credential_provider is None:
+                self._credential_provider = pl.CredentialProviderAzure(
+                    credential=self.credential()
+                )
+            return self._credential_provider
+
+    def container_client(self, account: str, container: str) -> Any:
+        """The shared client of a blob container.
+
+        Args:
+            account (str): the storage account name
+            container (str): the container name
+
+        Returns:
+            ContainerClient: the container client
+        """
+        from azure.storage.blob import ContainerClient
+
+        with self._lock:
+            key = (account, container)
+            if key not in self._containers:
+                self._containers[key] = ContainerClient(
+                    account_url=f"https://{account}.blob.core.windows.net",
+                    container_name=container,
+                    credential=self.credential(),
+                )
+            return self._containers[key]
+
+    def blob_client(self, account: str, container: str, name: str) -> Any:
+        """A client of one blob sharing its container client's connections."""
+        return self.container_client(account, container).get_blob_client(name)
+
+    def clear(self) -> None:
+        """Drop the pooled credential and clients, e.g. after the managed
+        identity changed. New ones are created on next use."""
+        with self._lock:
+            self._credential = None
+            self._credential_provider = None
+            self._containers.clear()
+
+
+_client_pool = ClientPool()
+
+
+def get_client_pool() -> ClientPool:
+    """The client pool shared by every Azure backend in the process."""
+    return _client_pool
+
+
+def _blob_client(account: str, container: str, name: str) -> Any:
+    return _client_pool.blob_client(account, container, name)
+
+
+# The helpers below take the arguments of their cfa.cloudops.blob_helpers
+# counterparts, but use the pooled clients instead of building a credential
+# and client per call.
+
+
+def _walk_blobs(name_starts_with: str, account_name: str, container_name: str) -> list:
+    """Blobs and virtual directories one level below a path."""
+    container = _client_pool.container_client(account_name, container_name)
+    return list(container.walk_blobs(name_starts_with=name_starts_with, delimiter="/"))
+
+
+def _read_blob(blob_url: str, account_name: str, container_name: str) -> Any:
+    """A downloader of a whole blob."""
+    container = _client_pool.container_client(account_name, container_name)
+    return container.download_blob(blob_url)
+
+
+def _write_blob(
+    data: bytes,
+    blob_url: str,
+    account_name: str,
+    container_name: str,
+    append_blob: bool = False,
+    overwrite: bool = True,
+) -> None:
+    """Upload a block blob, or append a block to an append blob, creating it
+    on first write."""
+    container = _client_pool.container_client(account_name, container_name)
+    if not append_blob:
+        container.upload_blob(blob_url, data, overwrite=overwrite)
+        return
+    from azure.core import MatchConditions
+    from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+
+    blob = container.get_blob_client(blob_url)
+    try:
+        blob.append_block(data)
+    except ResourceNotFoundError:
+        try:
+            blob.create_append_blob(match_condition=MatchConditions.IfMissing)
+        except ResourceExistsError:
+            pass  # created by another writer in the meantime
+        blob.append_block(data)
+
+
+class AccessError(RuntimeError):
+    """Raised when a storage backend cannot be used from this environment."""
+
+
+class Environment:
+    """The EXT environment and credential capability of the process.
+
+    The check (``cfa.cloudops.util.check_ext_env``) runs once and is then
+    memoized. A successful check is kept until ``refresh()``; a failed check is
+    re-run after ``recheck_after`` seconds, so a long-running service that gains
+    credentials later recovers without a restart. Available as
+    ``datacat.__environment__``.
+    """
+
+    def __init__(self, recheck_after: float = 60.0):
+        """
+        Args:
+            recheck_after (float, optional): seconds after which a failed check
+                is re-run on next use. Defaults to 60.0.
+        """
+        self.recheck_after = recheck_after
+        self._lock = threading.Lock()
+        self._ext_access: bool | None = None
+        self._error: str | None = None
+        self._checked_at: float | None = None
+
+    def _evaluate(self) -> None:
+        try:
+            ext_access, error = bool(check_ext_env()), None
+        except Exception as e:
+            ext_access, error = False, f"{type(e).__name__}: {e}"
+        if ext_access and self._ext_access is False:
+            # credentials that failed to resolve may have been cached
+            get_client_pool().clear()
+        self._ext_access, self._error = ext_access, error
+        self._checked_at = time.monotonic()
+
+    @property
+    def ext_access(self) -> bool:
+        """Whether EXT access (blob storage credentials) is configured."""
+        with self._lock:
+            if self._ext_access is None or (
+                not self._ext_access
+                and time.monotonic() - self._checked_at >= self.recheck_after
+            ):
+                self._evaluate()
+            return self._ext_access
+
+    @property
+    def error(self) -> str | None:
+        """The exception raised by the last check, if any."""
+        return self._error
+
+    @property
+    def checked_at(self) -> float | None:
+        """The ``time.monotonic()`` of the last check, or None before the first."""
+        return self._checked_at
+
+    def refresh(self) -> "Environment":
+        """Re-run the check now and drop pooled credentials and clients.
+
+        Returns:
+            Environment: this environment, for chaining (e.g.,
+                ``datacat.__environment__.refresh().ext_access``)
+        """
+        with self._lock:
+            get_client_pool().clear()
+            self._evaluate()
+        return self
+
+    def require(self) -> None:
+        """Raise if EXT access is not configured.
+
+        Raises:
+            AccessError: with the reason of the failed check and how to recover
+        """
+        if self.ext_access:
+            return
+        reason = self._error or "check_ext_env() returned False"
+        raise AccessError(
+            f"No EXT access configured ({reason}). Configure the EXT "
+            "environment or credentials, then call "
+            "datacat.__environment__.refresh() (failed checks are also "
+            f"retried after {self.recheck_after:g}s), or select a local "
+            f"backend with {BACKEND_ENV_VAR}=local:/path."
+        )
+
+    def __bool__(self) -> bool:
+        return self.ext_access
+
+    def __repr__(self) -> str:
+        if self._checked_at is None:
+            return "Environment(not checked)"
+        age = time.monotonic() - self._checked_at
+        error = f", error={self._error!r}" if self._error else ""
+        return (
+            f"Environment(ext_access={self._ext_access}{error}, checked {age:.0f}s ago)"
+        )
+
+
+_environment = Environment()
+
+
+def get_environment() -> Environment:
+    """The memoized environment check shared by the process."""
+    return _environment
+
+
+class AzureBackend:
+    """Azure blob storage with managed identity credentials. Every operation,
+    and polars scans, use the clients and credential of the process-wide
+    ``ClientPool``."""
+
+    def __repr__(self) -> str:
+        return "AzureBackend()"
+
+    def check_access(self) -> bool:
+        return _environment.ext_access
+
+    def list(self, account: str, container: str, name_starts_with: str) -> list:
+        return _walk_blobs(
+            name_starts_with=name_starts_with,
+            account_name=account,
+            container_name=container,
+        )
+
+    def stat(self, account: str, container: str, name: str) -> dict | None:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            props = _blob_client(account, container, name).get_blob_properties()
+        except ResourceNotFoundError:
+            return None
+        return {
+            "name": name,
+            "size": props.size,
+            "etag": props.etag,
+            "creation_time": props.creation_time,
+            "last_modified": props.last_modified,
+        }
+
+    def get(
+        self,
+        account: str,
+        container: str,
+        name: str,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> bytes:
+        if offset or length is not None:
+            return (
+                _blob_client(account, container, name)
+                .download_blob(offset=offset, length=length)
+                .readall()
+            )
+        blob = _read_blob(blob_url=name, account_name=account, container_name=container)
+        return blob if isinstance(blob, bytes) else blob.readall()
+
+    def iter_chunks(
+        self, account: str, container: str, name: str, offset: int = 0
+    ) -> Iterator[bytes]:
+        if offset:
+            downloader = _blob_client(account, container, name).download_blob(
+                offset=offset
+            )
+        else:
+            downloader = _read_blob(
+                blob_url=name, account_name=account, container_name=container
+            )
+        if isinstance(downloader, (bytes, bytearray)):
+            yield downloader
+        else:
+            yield from downloader.chunks()
+
+    def put(
+        self,
+        account: str,
+        container: str,
+        name: str,
+        data: bytes | Iterable[bytes],
+        append: bool = False,
+        overwrite: bool = True,
+    ) -> None:
+        if not isinstance(data, (bytes, bytearray)) and not append:
+            # stream the chunks as a block blob upload
+            _blob_client(account, container, name).upload_blob(
+                data, overwrite=overwrite
+            )
+            return
+        _write_blob(
+            data=_as_bytes(data),
+            blob_url=name,
+            account_name=account,
+            container_name=container,
+            append_blob=append,
+            overwrite=overwrite,
+        )
+
+    def delete(self, account: str, container: str, name: str) -> None:
+        _blob_client(account, container, name).delete_blob()
+
+    def url(self, account: str, container: str, path: str) -> str:
+        return f"az://{container}/{path}"
+
+    def scan_options(self, account: str, container: str) -> dict | None:
+        return {
+            "storage_options": {"account_name": account},
+            "credential_provider": _client_pool.credential_provider(),
+        }
+
+
+class LocalBackend:
+    """Blob storage emulated on a local directory tree. A blob named
+    ``{prefix}/{version}/{file}`` is stored at ``{root}/{prefix}/{version}/{file}``
+    regardless of its account and container, which is the layout written by
+    ``DatasetEndpoint.sync_to_local``.
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root (str): the root directory of the local blob tree
+        """
+        self.root = os.path.abspath(os.path.expanduser(root))
+
+    def __repr__(self) -> str:
+        return f"LocalBackend({self.root!r})"
+
+    def path(self, name: str) -> str:
+        """The local file path of a blob.
+
+        Args:
+            name (str): the blob name
+
+        Returns:
+            str: the file path under the root directory
+        """
+        return os.path.join(self.root, *name.strip("/").split("/"))
+
+    def _props(self, name: str, stat: os.stat_result) -> dict:
+        modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        return {
+            "name": name,
+            "size": stat.st_size,
+            "creation_time": modified,
+            "last_modified": modified,
+            "etag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        }
+
+    def check_access(self) -> bool:
+        return True
+
+    def list(self, account: str, container: str, name_starts_with: str) -> list:
+        """Hidden files and in-progress downloads are not listed."""
+        directory = self.path(name_starts_with)
+        if not os.path.isdir(directory):
+            return []
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.startswith(".") or entry.name.endswith(
+                    (".part", ".part.json")
+                ):
+                    continue
+                name = f"{name_starts_with}{entry.name}"
+                if entry.is_dir():
+                    entries.append({"name": f"{name}/"})
+                else:
+                    entries.append(self._props(name, entry.stat()))
+        return sorted(entries, key=lambda x: x["name"])
+
+    def stat(self, account: str, container: str, name: str) -> dict | None:
+        path = self.path(name)
+        if not os.path.isfile(path):
+            return None
+        return self._props(name, os.stat(path))
+
+    def get(
+        self,
+        account: str,
+        container: str,
+        name: str,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> bytes:
+        with open(self.path(name), "rb") as f:
+            f.seek(offset)
+            return f.read() if length is None else f.read(length)
+
+    def iter_chunks(
+        self,
+        account: str,
+        container: str,
+        name: str,
+        offset: int = 0,
+        chunk_size: int = 4 * 1024 * 1024,
+    ) -> Iterator[bytes]:
+        with open(self.path(name), "rb") as f:
+            f.seek(offset)
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def put(
+        self,
+        account: str,
+        container: str,
+        name: str,
+        data: bytes | Iterable[bytes],
+        append: bool = False,
+        overwrite: bool = True,
+    ) -> None:
+        """New and overwritten blobs are written to a temporary file and
+        renamed into place."""
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        chunks = [data] if isinstance(data, (bytes, bytearray)) else data
+        if append:
+            with open(path, "ab") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            return
+        if os.path.exists(path) and not overwrite:
+            raise FileExistsError(f"Blob {name} already exists in {self.root}.")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+
+    def delete(self, account: str, container: str, name: str) -> None:
+        os.remove(self.path(name))
+
+    def url(self, account: str, container: str, path: str) -> str:
+        return self.path(path)
+
+    def scan_options(self, account: str, container: str) -> dict | None:
+        return {}
+
+
+class InMemoryBackend:
+    """Blob storage held in a dictionary, keyed by account, container and
+    blob name. Useful for tests and for exercising a catalog without storage."""
+
+    def __init__(self):
+        self.blobs: dict[tuple[str, str, str], dict] = {}
+        self._lock = threading.Lock()
+        self._etags = count(1)
+
+    def __repr__(self) -> str:
+        return f"InMemoryBackend({len(self.blobs)} blobs)"
+
+    def check_access(self) -> bool:
+        return True
+
+    def list(self, account: str, container: str, name_starts_with: str) -> list:
+        with self._lock:
+            names = [n for a, c, n in self.blobs if (a, c) == (account, container)]
+            children = _hierarchical(names, name_starts_with)
+            return [
+                self._props(account, container, name) if is_blob else {"name": name}
+                for name, is_blob in sorted(children.items())
+            ]
+
+    def _props(self, account: str, container: str, name: str) -> dict:
+        blob = self.blobs[(account, container, name)]
+        return {
+            "name": name,
+            "size": len(blob["data"]),
+            "creation_time": blob["creation_time"],
+            "last_modified": blob["last_modified"],
+            "etag": blob["etag"],
+        }
+
+    def stat(self, account: str, container: str, name: str) -> dict | None:
+        with self._lock:
+            if (account, container, name) not in self.blobs:
+                return None
+            return self._props(account, container, name)
+
+    def get(
+        self,
+        account: str,
+        container: str,
+        name: str,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> bytes:
+        try:
+            data = self.blobs[(account, container, name)]["data"]
+        except KeyError:
+            raise FileNotFoundError(f"Blob {name} not found in {container}.")
+        return data[offset:] if length is None else data[offset : offset + length]
+
+    def iter_chunks(
+        self, account: str, container: str, name: str, offset: int = 0
+    ) -> Iterator[bytes]:
+        yield self.get(account, container, name, offset=offset)
+
+    def put(
+        self,
+        account: str,
+        container: str,
+        name: str,
+        data: bytes | Iterable[bytes],
+        append: bool = False,
+        overwrite: bool = True,
+    ) -> None:
+        data = bytes(_as_bytes(data))
+        now = datetime.now(timezone.utc)
+        key = (account, container, name)
+        with self._lock:
+            existing = self.blobs.get(key)
+            if existing is not None and not append and not overwrite:
+                raise FileExistsError(f"Blob {name} already exists in {container}.")
+            if existing is not None and append:
+                data = existing["data"] + data
+            self.blobs[key] = {
+                "data": data,
+                "creation_time": existing["creation_time"] if existing else now,
+                "last_modified": now,
+                "etag": f'"0x{next(self._etags):x}"',
+            }
+
+    def delete(self, account: str, container: str, name: str) -> None:
+        with self._lock:
+            if self.blobs.pop((account, container, name), None) is None:
+                raise FileNotFoundError(f"Blob {name} not found in {container}.")
+
+    def url(self, account: str, container: str, path: str) -> str:
+        return f"memory://{account}/{container}/{path}"
+
+    def scan_options(self, account: str, container: str) -> dict | None:
+        return None
+
+
+_factories: dict[str, Callable[[str], StorageBackend]] = {
+    "azure": lambda arg: AzureBackend(),
+    "local": lambda arg: LocalBackend(arg),
+    "memory": lambda arg: InMemoryBackend(),
+}
+_backends: dict[str, StorageBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def register_backend(scheme: str, factory: Callable[[str], StorageBackend]) -> None:
+    """Register a backend factory so it can be selected as ``scheme`` or
+    ``scheme:argument`` in catalog defaults or DATAOPS_BACKEND.
+
+    Args:
+        scheme (str): the backend name
+        factory (Callable[[str], StorageBackend]): builds the backend from the
+            text after the colon (an empty string if there is none)
+    """
+    with _backends_lock:
+        _factories[scheme] = factory
+        for spec in [s for s in _backends if s.partition(":")[0] == scheme]:
+            del _backends[spec]
+
+
+def get_backend(spec: str = "azure") -> StorageBackend:
+    """Get the shared backend for a specification such as 'azure',
+    'local:/path' or 'memory'. The same specification always returns the same
+    backend instance, so all endpoints of a catalog share one store.
+
+    Args:
+        spec (str, optional): the backend specification. Defaults to "azure".
+
+    Raises:
+        ValueError: if the backend is unknown or missing its argument
+
+    Returns:
+        StorageBackend: the backend
+    """
+    spec = spec.strip()
+    with _backends_lock:
+        if spec not in _backends:
+            scheme, _, arg = spec.partition(":")
+            if scheme not in _factories:
+                raise ValueError(
+                    f"Unknown storage backend '{spec}', expected one of "
+                    f"{sorted(_factories)} (e.g. 'azure' or 'local:/path')."
+                )
+            if scheme == "local" and not arg:
+                raise ValueError("The local backend needs a path, e.g. 'local:/path'.")
+            _backends[spec] = _factories[scheme](arg)
+        return _backends[spec]
+
+
+def resolve_backend(spec: "str | StorageBackend | None" = None) -> StorageBackend:
+    """Resolve the backend of a catalog or endpoint. The DATAOPS_BACKEND
+    environment variable takes precedence over the configured specification,
+    which defaults to Azure blob storage.
+
+    Args:
+        spec (str | StorageBackend | None, optional): a backend instance, or
+            the specification from the catalog defaults. Defaults to None.
+
+    Returns:
+        StorageBackend: the backend
+    """
+    if spec is not None and not isinstance(spec, str):
+        return spec
+    return get_backend(os.environ.get(BACKEND_ENV_VAR, "").strip() or spec or "azure")
@@ -3,33 +3,34 @@
 import json
 import logging
 import os
-import pkgutil
-from collections.abc import Sequence
-from configparser import ConfigParser
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from datetime import date, datetime, timezone
 from importlib import import_module
 from io import BytesIO
 from pathlib import PurePosixPath
 from types import SimpleNamespace
-from typing import Any, Literal, overload
+from typing import TYPE_CHECKING, Any, Literal, overload
 
 import pandas as pd
 import polars as pl
 import tomli
-from azure.identity import ManagedIdentityCredential
-from cfa.cloudops.blob_helpers import (
-    read_blob_stream,
-    walk_blobs_in_container,
-    write_blob_stream,
+
+from .backends import (
+    AccessError,
+    AzureBackend,
+    StorageBackend,
+    get_environment,
+    resolve_backend,
 )
-from cfa.cloudops.util import check_ext_env
-
-from .config_validator import (
-    ConfigValidator,
-    PropertiesValidation,
-    SourceValidation,
-    StorageEndpointValidation,
-    ValidationError,
+from .config_validator import validate_catalog
+from .index import get_all_catalogs
+from .ledger import get_ledger_writer
+from .parquet import (
+    dataframe_to_parquet_bytes,
+    record_batches_to_parquet_bytes,
+    resolve_parquet_options,
 )
 from .reporting.catalog import report_dict_to_sn
 from .utils import (
@@ -38,11 +39,14 @@ from .utils import (
     get_timestamp,
     get_user,
     version_matcher,
+    versions_matching,
 )
 
-_here = os.path.abspath(os.path.dirname(__file__))
-_config = ConfigParser()
-_config.read(os.path.join(_here, "config.ini"))
+if TYPE_CHECKING:
+    import duckdb
+    import pyarrow as pa
+
+    from .soda import ExtractSummary, Query
 
 logger = logging.getLogger(__name__)
 
@@ -57,30 +61,289 @@ class VersionMetadata:
     selection: Literal["newest", "oldest"]
 
 
+@dataclass(frozen=True)
+class DownloadSummary:
+    """Result of downloading a version of a dataset to a local path."""
+
+    version: str | None
+    files_transferred: int
+    files_skipped: int
+    bytes_transferred: int
+    bytes_skipped: int
+
+    @property
+    def written(self) -> bool:
+        return self.files_transferred > 0
+
+
+@dataclass(frozen=True)
+class SyncSummary:
+    """Result of mirroring stages and versions of a dataset to a local path."""
+
+    versions: dict[str, list[str]]
+    files_transferred: int
+    files_skipped: int
+    files_deleted: int
+    bytes_transferred: int
+    bytes_skipped: int
+
+
 if not logger.handlers:
     logger.addHandler(logging.NullHandler())
 
+# optional [access_ledger] settings passed through to the ledger writer
+_LEDGER_SETTINGS = ["enabled", "batch_size", "flush_interval", "max_queue", "on_full"]
+
+# rows per record batch pulled from streaming sources
+_STREAM_BATCH_ROWS = 65_536
+
+# the watermark of an incremental extract, stored in its version alongside
+# the data and skipped when reading the version
+WATERMARK_FILE = "_watermark.json"
+
+# suffixes of in-progress downloads and their resume metadata
+_PART_SUFFIX = ".part"
+_PART_META_SUFFIX = ".part.json"
 
-def get_all_catalogs() -> list:
-    """Get a list of all available dataops catalogs.
+# manifest of mirrored blobs written at the root of a local mirror
+_MANIFEST_NAME = ".dataops_manifest.json"
+
+# columns of CatalogNamespace.version_report()
+_VERSION_REPORT_SCHEMA = {
+    "dataset": pl.String,
+    "stage": pl.String,
+    "versions": pl.Int64,
+    "newest_version": pl.String,
+    "oldest_version": pl.String,
+    "total_bytes": pl.Int64,
+    "last_modified": pl.Datetime("us", "UTC"),
+    "error": pl.String,
+}
+
+
+def _stream_record_batches(
+    source: "pl.LazyFrame | pa.RecordBatchReader | duckdb.DuckDBPyRelation",
+    batch_size: int = _STREAM_BATCH_ROWS,
+) -> tuple["pa.Schema", Iterator["pa.RecordBatch"]]:
+    """Get the schema and a record batch iterator for a streaming source
+    without materializing it.
+
+    Args:
+        source: a polars LazyFrame (run with the streaming engine), a pyarrow
+            RecordBatchReader or a DuckDB relation
+        batch_size (int, optional): rows per batch for LazyFrames and DuckDB
+            relations
+
+    Raises:
+        TypeError: if the source is not a supported streaming type
 
     Returns:
-        list[tuple]: A list of catalog names and paths.
+        tuple[pa.Schema, Iterator[pa.RecordBatch]]: the schema and batches
+    """
+    if isinstance(source, pl.LazyFrame):
+        schema = source.head(0).collect().to_arrow().schema
+        if hasattr(source, "collect_batches"):
+            chunks = source.collect_batches(chunk_size=batch_size, engine="streaming")
+        else:
+            chunks = _collect_slices(source, batch_size)
+        return schema, (
+            batch for chunk in chunks for batch in chunk.to_arrow().to_batches()
+        )
+    if hasattr(source, "to_arrow_reader"):
+        # DuckDB relation (duckdb >= 1.4)
+        source = source.to_arrow_reader(batch_size)
+    elif hasattr(source, "fetch_record_batch"):
+        # DuckDB relation
+        source = source.fetch_record_batch(batch_size)
+    if hasattr(source, "read_next_batch"):
+        # pyarrow RecordBatchReader
+        return source.schema, iter(source)
+    raise TypeError(
+        f"Unsupported dataframe type {type(source).__name__}. Use a pandas or "
+        "polars DataFrame, polars LazyFrame, pyarrow RecordBatchReader or "
+        "DuckDB relation."
+    )
+
+
+def _collect_slices(source: pl.LazyFrame, batch_size: int) -> Iterator[pl.DataFrame]:
+    """Collect a LazyFrame slice by slice, for polars versions without
+    ``LazyFrame.collect_batches``. Each slice runs the query again, but only
+    ``batch_size`` rows are ever held in memory."""
+    offset = 0
+    while True:
+        chunk = source.slice(offset, batch_size).collect(engine="streaming")
+        if chunk.height == 0:
+            return
+        yield chunk
+        offset += chunk.height
+
+
+def _split_record_batches(
+    batches: Iterator["pa.RecordBatch"], rows_per_file: int
+) -> Iterator[Iterator["pa.RecordBatch"]]:
+    """Split a stream of record batches into consecutive parts of at most
+    ``rows_per_file`` rows. Each part must be consumed before the next.
+
+    Args:
+        batches (Iterator[pa.RecordBatch]): the record batches
+        rows_per_file (int): maximum rows per part
+
+    Yields:
+        Iterator[pa.RecordBatch]: the batches of each part
     """
+    pending = next(batches, None)
+    while pending is not None and pending.num_rows == 0:
+        pending = next(batches, None)
+
+    def part() -> Iterator["pa.RecordBatch"]:
+        nonlocal pending
+        rows = 0
+        while pending is not None and rows < rows_per_file:
+            take = pending.slice(0, rows_per_file - rows)
+            rows += take.num_rows
+            pending = (
+                pending.slice(take.num_rows)
+                if take.num_rows < pending.num_rows
+                else next(batches, None)
+            )
+            yield take
+
+    while pending is not None:
+        yield part()
+
 
-    catalogs = []
-    catalog_nspace = _config.get("DEFAULT", "catalog_namespaces")
-    try:
-        catalog_pkg = import_module(catalog_nspace)
-        for module_finder, modname, ispkg in pkgutil.iter_modules(catalog_pkg.__path__):
-            if ispkg:
-                catalogs.append((catalog_nspace, modname, module_finder.path))
-    except ModuleNotFoundError as e:
-        if e.name != catalog_nspace:
-            raise
-        logger.warning("No catalogs exist in namespace %s", catalog_nspace)
+def _encode_record_batches(
+    batches: Iterator["pa.RecordBatch"],
+    schema: "pa.Schema",
+    file_format: str,
+    parquet_options: Any = None,
+) -> bytes:
+    """Encode record batches into a single file of the given format.
 
-    return catalogs
+    Args:
+        batches (Iterator[pa.RecordBatch]): the record batches
+        schema (pa.Schema): the schema of the batches
+        file_format (str): one of 'parquet', 'csv', 'json' or 'jsonl'
+        parquet_options (ParquetOptionsValidation, optional): parquet options
+
+    Returns:
+        bytes: the encoded file
+    """
+    if file_format == "parquet":
+        return record_batches_to_parquet_bytes(batches, schema, parquet_options)
+    buffer = BytesIO()
+    if file_format == "csv":
+        import pyarrow.csv as pa_csv
+
+        with pa_csv.CSVWriter(buffer, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    else:
+        for batch in batches:
+            buffer.write(pl.from_arrow(batch).write_ndjson().encode("utf-8"))
+    return buffer.getvalue()
+
+
+def _blob_size(blob: Any) -> int | None:
+    """Size in bytes from blob properties, if the listing provides it."""
+    size = blob.get("size")
+    return int(size) if size is not None else None
+
+
+def _blob_fingerprint(blob: Any) -> str:
+    """Identify a blob's content from its listing, preferring the etag."""
+    etag = blob.get("etag")
+    if etag:
+        return str(etag)
+    modified = blob.get("last_modified") or blob.get("creation_time")
+    return f"{blob.get('size')}:{modified}"
+
+
+def _load_manifest(local_path: str) -> dict:
+    """Read the manifest of a local mirror, or start an empty one."""
+    manifest_path = os.path.join(local_path, _MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {"blobs": {}}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def _save_manifest(local_path: str, manifest: dict) -> None:
+    """Atomically write the manifest of a local mirror."""
+    os.makedirs(local_path, exist_ok=True)
+    manifest_path = os.path.join(local_path, _MANIFEST_NAME)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def _remove_empty_dirs(path: str, root: str) -> None:
+    """Remove empty directories from path upwards, stopping at root."""
+    root = os.path.abspath(root)
+    path = os.path.abspath(path)
+    while path.startswith(root + os.sep) and not os.listdir(path):
+        os.rmdir(path)
+        path = os.path.dirname(path)
+
+
+def _blob_modified(blob: Any) -> datetime | None:
+    """Last modified time from blob properties, as an aware UTC datetime."""
+    modified = blob.get("last_modified") or blob.get("creation_time")
+    if isinstance(modified, datetime) and modified.tzinfo is None:
+        return modified.replace(tzinfo=timezone.utc)
+    return modified
+
+
+def _version_entries(endpoint: "BlobEndpoint") -> list:
+    """The entries one level below the prefix of a stage: its versions."""
+    glob_path = f"{endpoint.prefix}/"
+    return [i for i in endpoint._list_blobs(glob_path) if i["name"] != glob_path]
+
+
+def _version_totals(endpoint: "BlobEndpoint", entry: Any) -> tuple[int, Any]:
+    """Total bytes and latest modification time of one version entry."""
+    blobs = (
+        endpoint._walk_blobs(entry["name"]) if entry["name"].endswith("/") else [entry]
+    )
+    total_bytes = 0
+    last_modified = None
+    for blob in blobs:
+        total_bytes += _blob_size(blob) or 0
+        modified = _blob_modified(blob)
+        if modified is not None and (last_modified is None or modified > last_modified):
+            last_modified = modified
+    return total_bytes, last_modified
+
+
+def _load_dataset_config(config_path: str, defaults: dict) -> dict:
+    """Read a dataset config, filling storage accounts and containers from
+    the catalog defaults."""
+    with open(config_path, "rb") as f:
+        config = tomli.load(f)
+    for k, v in config.items():
+        if k in ["load", "extract", "data"] or k.startswith("stage"):
+            if v.get("account", "") == "":
+                v["account"] = defaults["storage"]["account"]
+            if v.get("container", "") == "":
+                v["container"] = defaults["storage"]["container"]
+    return config
+
+
+def _config_paths(ns_map: Any) -> Iterator[str]:
+    """The dataset config paths of a nested namespace map."""
+    if isinstance(ns_map, str) and ns_map.endswith(".toml"):
+        yield ns_map
+    elif isinstance(ns_map, dict):
+        for v in ns_map.values():
+            yield from _config_paths(v)
+    elif isinstance(ns_map, list):
+        for v in ns_map:
+            yield from _config_paths(v)
+
+
+# configs read and validated in one pass when the catalogs are imported,
+# consumed by the DatasetEndpoints built from them
+_preloaded_configs: dict[str, dict] = {}
 
 
 # aggregating all datasets and reports into a single mapping for namespace
@@ -107,6 +370,112 @@ report_namespaces = get_dataset_dot_path(all_reports_ns_map)
 class CatalogNamespace(SimpleNamespace):
     """Runtime namespace wrapper for catalog access."""
 
+    def version_report(
+        self,
+        prefix: str | None = None,
+        include_sizes: bool = True,
+        max_workers: int = 32,
+        output: Literal["pandas", "pd", "polars", "pl"] = "pandas",
+    ) -> pd.DataFrame | pl.DataFrame:
+        """Report the versions of every stage of every dataset below this
+        namespace, listing all stages concurrently.
+
+        Each row is one stage of a dataset with its number of versions, the
+        newest and oldest version, and (with ``include_sizes``) the total bytes
+        and last modified time of its blobs. Stages that cannot be listed are
+        reported with the error instead of failing the report.
+
+        Args:
+            prefix (str | None, optional): only datasets whose namespace starts
+                with this prefix. Defaults to None (all datasets).
+            include_sizes (bool, optional): whether to walk every version for
+                its bytes and modification time, one listing per version.
+                Defaults to True.
+            max_workers (int, optional): number of concurrent listings. Defaults to 32.
+            output (Literal["pandas", "pd", "polars", "pl"], optional): the
+                DataFrame type to return. Defaults to "pandas".
+
+        Returns:
+            pd.DataFrame | pl.DataFrame: one row per dataset stage
+        """
+        stages = []
+        for dataset in _iter_dataset_endpoints(self):
+            if prefix is not None and not dataset.__ns_str__.startswith(prefix):
+                continue
+            for stage in dataset.stages:
+                endpoint = getattr(dataset, stage)
+                endpoint._check_access()
+                stages.append((dataset.__ns_str__, stage, endpoint))
+
+        rows = [
+            {"dataset": ns, "stage": stage, "versions": 0, "total_bytes": 0}
+            for ns, stage, _ in stages
+        ]
+        # the stage listings and version walks are submitted from this thread,
+        # so no worker waits on another
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            listings = {
+                executor.submit(_version_entries, endpoint): i
+                for i, (_, _, endpoint) in enumerate(stages)
+            }
+            walks = {}
+            for future in as_completed(listings):
+                i = listings[future]
+                glob_path = f"{stages[i][2].prefix}/"
+                try:
+                    entries = future.result()
+                    # ordered as version specs order them, oldest first
+                    versions = versions_matching(
+                        None,
+                        [
+                            entry["name"].removeprefix(glob_path).removesuffix("/")
+                            for entry in entries
+                        ],
+                    )
+                except Exception as e:
+                    rows[i].update(versions=None, total_bytes=None, error=str(e))
+                    continue
+                rows[i].update(
+                    versions=len(versions),
+                    newest_version=versions[-1] if versions else None,
+                    oldest_version=versions[0] if versions else None,
+                )
+                if include_sizes:
+                    for entry in entries:
+                        future = executor.submit(_version_totals, stages[i][2], entry)
+                        walks[future] = i
+                else:
+                    rows[i]["total_bytes"] = None
+            for future in as_completed(walks):
+                row = rows[walks[future]]
+                if row.get("error") is not None:
+                    continue
+                try:
+                    total_bytes, last_modified = future.result()
+                except Exception as e:
+                    row.update(total_bytes=None, last_modified=None, error=str(e))
+                    continue
+                row["total_bytes"] += total_bytes
+                if last_modified is not None and (
+                    row.get("last_modified") is None
+                    or last_modified > row["last_modified"]
+                ):
+                    row["last_modified"] = last_modified
+
+        report = pl.DataFrame(rows, schema=_VERSION_REPORT_SCHEMA)
+        if output in ["polars", "pl"]:
+            return report
+        return report.to_pandas()
+
+
+def _iter_dataset_endpoints(ns: SimpleNamespace) -> Iterator["DatasetEndpoint"]:
+    """Walk a catalog namespace for its dataset endpoints, in namespace order."""
+    for val in vars(ns).values():
+        if isinstance(val, DatasetEndpoint):
+            yield val
+        elif isinstance(val, SimpleNamespace):
+            yield from _iter_dataset_endpoints(val)
+
 
 class DatasetEndpoint:
     """The DatasetEndpoint class for including in the datacat namespace.
@@ -125,21 +494,22 @@ class DatasetEndpoint:
         self.config_path = config_path
         self.defaults = defaults
         self.__ns_str__ = ns
-        with open(config_path, "rb") as f:
-            self.config = tomli.load(f)
-        for k, v in self.config.items():
-            if k in ["load", "extract", "data"] or k.startswith("stage"):
-                account = v.get("account", "")
-                container = v.get("container", "")
-                if account == "":
-                    self.config[k]["account"] = self.defaults["storage"]["account"]
-                if container == "":
-                    self.config[k]["container"] = self.defaults["storage"]["container"]
-        self.validate_dataset_config(config_path)
+        config = _preloaded_configs.pop(config_path, None)
+        if config is not None:
+            # validated with the rest of its catalog on import
+            self.config = config
+        else:
+            self.config = _load_dataset_config(config_path, defaults)
+            self.validate_dataset_config(config_path)
         self._ledger_location = {
             "account": self.defaults["storage"]["account"],
             "container": self.defaults["storage"]["container"],
             "prefix": self.defaults["access_ledger"]["path"],
+            **{
+                k: v
+                for k, v in self.defaults["access_ledger"].items()
+                if k in _LEDGER_SETTINGS
+            },
         }
         for k, v in self.config.items():
             if k in ["load", "extract", "data"] or k.startswith("stage"):
@@ -151,28 +521,266 @@ class DatasetEndpoint:
                         prefix=v["prefix"],
                         ledger_location=self._ledger_location,
                         ns=f"{self.__ns_str__}.{k}",
+                        parquet_options={
+                            **self.defaults.get("parquet", {}),
+                            **v.get("parquet", {}),
+                        },
+                        backend=self.defaults["storage"].get("backend"),
                     ),
                 )
 
     def validate_dataset_config(self, config_path) -> None:
-        """Validate the dataset configuration using ConfigValidator.
-        and each of the pydantic models for each section."""
-        try:
-            config_models = {}
-            for c_key, c_value in self.config.items():
-                if (
-                    c_key.startswith("stage_") or c_key in ["load", "extract", "data"]
-                ) and c_value is not None:
-                    config_models[c_key] = StorageEndpointValidation(**c_value)
-                elif c_key == "properties":
-                    config_models[c_key] = PropertiesValidation(**c_value)
-                elif c_key == "source":
-                    config_models[c_key] = SourceValidation(**c_value)
-                else:
-                    config_models[c_key] = c_value
-            ConfigValidator(**config_models)
-        except ValidationError as e:
-            raise ValueError(f"Invalid dataset {config_path}: {e}") from e
+        """Validate the dataset configuration and each of its sections.
+        Configs that passed validation before are not re-validated.
+
+        Raises:
+            CatalogValidationError: a ValueError listing every error of the config
+        """
+        validate_catalog({config_path: self.config})
+
+    def run_extract(
+        self,
+        path_after_prefix: str = "data",
+        file_format: str = "parquet",
+        rows_per_file: int = 1_000_000,
+        verbose: bool = True,
+        **source,
+    ) -> "ExtractSummary":
+        """Extract the dataset from its ``[source]`` table into a new version
+        of the ``extract`` stage (the stage's endpoint is ``self.extract``).
+
+        The source is a Socrata dataset (a ``url`` such as
+        https://data.cdc.gov/resource/abcd-1234.csv, or a ``domain`` and
+        ``id``, with optional ``select``, ``where``, ``limit`` and
+        ``pagination = {limit = ...}`` page size), streamed page by page with
+        ``soda.Query.to_endpoint`` (or incrementally when it has a
+        ``watermark``), or a plain HTTP ``url`` or local ``path`` (or glob)
+        of CSV, JSON, NDJSON or parquet files, streamed into part files. Set
+        ``type`` ('socrata', 'http' or 'file') or ``format`` when they cannot
+        be told from the URL.
+
+        Args:
+            path_after_prefix (str, optional): name of the part files after
+                the version. Defaults to "data".
+            file_format (str, optional): 'parquet', 'csv', 'json' or 'jsonl'.
+                Defaults to "parquet".
+            rows_per_file (int, optional): maximum rows per part file.
+                Defaults to 1,000,000.
+            verbose (bool, optional): whether to print progress. Defaults to True.
+            **source: fields overriding those of the ``[source]`` table
+
+        Raises:
+            ValueError: if the dataset has no extract stage or source, or the
+                source type is not supported
+
+        Returns:
+            ExtractSummary: the version and files written
+        """
+        from .sources import extract_source
+
+        if "extract" not in self.stages:
+            raise ValueError(f"{self.__ns_str__} has no extract stage.")
+        source = {**self.config.get("source", {}), **source}
+        if not source:
+            raise ValueError(f"{self.__ns_str__} has no [source] table.")
+        summary = extract_source(
+            self,
+            source,
+            path_after_prefix=path_after_prefix,
+            file_format=file_format,
+            rows_per_file=rows_per_file,
+            verbose=verbose,
+        )
+        if summary.version is None:
+            logger.info(f"No new rows to extract for {self.__ns_str__}")
+        else:
+            logger.info(
+                f"Extracted {summary.rows} rows of {self.__ns_str__} to version "
+                f"{summary.version}"
+            )
+        return summary
+
+    def extract_incremental(self, query: "Query", **kwargs) -> "ExtractSummary":
+        """Incrementally extract a Socrata query to the extract stage, after
+        the ``watermark`` column of the ``[source]`` table, as delta or merged
+        full versions (``incremental``) keyed by ``key``. See
+        ``soda.Query.extract_incremental``.
+
+        Args:
+            query (Query): the query of the source
+            **kwargs: passed to ``Query.extract_incremental``, overriding the
+                ``[source]`` settings
+
+        Raises:
+            ValueError: if the dataset has no extract stage or watermark
+
+        Returns:
+            ExtractSummary: the version (None if there were no new rows) and
+                files written and the new watermark
+        """
+        source = self.config.get("source", {})
+        if "extract" not in self.stages:
+            raise ValueError(f"{self.__ns_str__} has no extract stage.")
+        options = {
+            k: source[k] for k in ["watermark", "key"] if source.get(k) is not None
+        }
+        if source.get("incremental") is not None:
+            options["mode"] = source["incremental"]
+        options.update(kwargs)
+        if "watermark" not in options:
+            raise ValueError(
+                f"{self.__ns_str__} has no watermark column in its [source] table."
+            )
+        return query.extract_incremental(self.extract, **options)
+
+    @property
+    def stages(self) -> list[str]:
+        """The names of the storage stages of the dataset (e.g., extract, load)."""
+        return [
+            k
+            for k in self.config.keys()
+            if k in ["load", "extract", "data"] or k.startswith("stage")
+        ]
+
+    def sync_to_local(
+        self,
+        local_path: str,
+        stages: Sequence[str] | None = None,
+        versions: str | None = None,
+        latest: int | None = None,
+        max_workers: int = 8,
+        prune: bool = False,
+    ) -> SyncSummary:
+        """Mirror versions of one or more stages into a local directory.
+
+        Blobs are written to ``{local_path}/{blob name}``, keeping the
+        ``{prefix}/{version}/`` layout of blob storage, and recorded in a
+        manifest at the root of ``local_path``. Later syncs only transfer
+        blobs that are new or changed since the manifest was written, so one
+        directory can mirror many datasets and be refreshed incrementally.
+
+        Args:
+            local_path (str): the root directory of the local mirror
+            stages (Sequence[str] | None, optional): the stages to mirror.
+                Defaults to None (all stages).
+            versions (str | None, optional): a version specifier selecting the
+                versions to mirror (e.g. ">=2025-01-01"). Defaults to None (all versions).
+            latest (int | None, optional): only mirror the newest n matching
+                versions of each stage. Defaults to None (no limit).
+            max_workers (int, optional): number of concurrent transfers. Defaults to 8.
+            prune (bool, optional): delete mirrored files of the synced stages
+                that are no longer part of the selection. Defaults to False.
+
+        Raises:
+            ValueError: if a stage is not defined for the dataset
+            RuntimeError: if any blob failed to transfer (after recording the
+                successful transfers in the manifest)
+
+        Returns:
+            SyncSummary: the versions synced per stage and the files and
+                bytes transferred, skipped and deleted
+        """
+        stages = self.stages if stages is None else list(stages)
+        unknown = [s for s in stages if s not in self.stages]
+        if unknown:
+            raise ValueError(
+                f"Unknown stages {unknown} for {self.__ns_str__}, available stages are {self.stages}."
+            )
+        manifest = _load_manifest(local_path)
+        entries = manifest["blobs"]
+        synced = {}
+        seen = set()
+        to_fetch = []
+        files_skipped = 0
+        bytes_skipped = 0
+        for stage in stages:
+            endpoint = getattr(self, stage)
+            selected = versions_matching(versions, endpoint.get_versions())
+            if latest is not None:
+                selected = selected[-latest:] if latest > 0 else []
+            synced[stage] = selected
+            for version in selected:
+                for blob in endpoint._list_version_blobs(version):
+                    name = blob["name"]
+                    seen.add(name)
+                    local_file = os.path.join(local_path, *name.split("/"))
+                    entry = {
+                        "account": endpoint.account,
+                        "container": endpoint.container,
+                        "fingerprint": _blob_fingerprint(blob),
+                    }
+                    previous = entries.get(name, {})
+                    if (
+                        all(previous.get(k) == v for k, v in entry.items())
+                        and os.path.exists(local_file)
+                        and os.path.getsize(local_file) == previous.get("size")
+                    ):
+                        files_skipped += 1
+                        bytes_skipped += previous["size"]
+                        continue
+                    to_fetch.append((endpoint, blob, local_file, entry))
+
+        bytes_transferred = 0
+        failures = []
+        read_stages = set()
+        if to_fetch:
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(max_workers, len(to_fetch)))
+            ) as executor:
+                futures = {
+                    executor.submit(endpoint._download_blob_to_file, blob, path): (
+                        endpoint,
+                        blob,
+                        path,
+                        entry,
+                    )
+                    for endpoint, blob, path, entry in to_fetch
+                }
+                for future in as_completed(futures):
+                    endpoint, blob, path, entry = futures[future]
+                    try:
+                        bytes_transferred += future.result()
+                    except Exception as e:
+                        logger.warning(f"Failed to sync {blob['name']}: {e}")
+                        failures.append(e)
+                        continue
+                    entries[blob["name"]] = {**entry, "size": os.path.getsize(path)}
+                    read_stages.add(endpoint)
+
+        files_deleted = 0
+        if prune:
+            prefixes = tuple(f"{getattr(self, stage).prefix}/" for stage in stages)
+            for name in [n for n in entries if n.startswith(prefixes)]:
+                if name in seen:
+                    continue
+                local_file = os.path.join(local_path, *name.split("/"))
+                if os.path.exists(local_file):
+                    os.remove(local_file)
+                    _remove_empty_dirs(os.path.dirname(local_file), local_path)
+                    files_deleted += 1
+                del entries[name]
+
+        _save_manifest(local_path, manifest)
+        for endpoint in read_stages:
+            endpoint.ledger_entry(action="read")
+        if failures:
+            raise RuntimeError(
+                f"{len(failures)} blobs failed to sync to {local_path}."
+            ) from failures[0]
+        summary = SyncSummary(
+            versions=synced,
+            files_transferred=len(to_fetch),
+            files_skipped=files_skipped,
+            files_deleted=files_deleted,
+            bytes_transferred=bytes_transferred,
+            bytes_skipped=bytes_skipped,
+        )
+        logger.info(
+            f"Synced {self.__ns_str__}: {summary.files_transferred} files "
+            f"({summary.bytes_transferred:,} bytes) transferred, "
+            f"{summary.files_skipped} skipped, {summary.files_deleted} deleted."
+        )
+        return summary
 
 
 class BlobEndpoint:
@@ -185,6 +793,8 @@ class BlobEndpoint:
         prefix: str,
         ledger_location: dict,
         ns: str,
+        parquet_options: dict | None = None,
+        backend: StorageBackend | str | None = None,
     ):
         """Basic functionality to interact with blobs to be included
         via the datasets configs.
@@ -195,6 +805,13 @@ class BlobEndpoint:
             prefix (str): the path prefix in the container to use
             ledger_location (dict): the location to write access logs to
             ns (str): the current namespace path
+            parquet_options (dict | None, optional): default parquet writer
+                options for this endpoint (see ``ParquetOptionsValidation``).
+                Defaults to None (snappy compression).
+            backend (StorageBackend | str | None, optional): the storage
+                backend, or its specification (e.g., 'azure', 'local:/path',
+                'memory'). The DATAOPS_BACKEND environment variable overrides
+                a specification. Defaults to Azure blob storage.
         """
         self.account = account
         self.container = container
@@ -202,6 +819,24 @@ class BlobEndpoint:
         self.ledger_location = ledger_location
         self.is_ledger = True if ns == "ledger_endpoint" else False
         self.__ns_str__ = ns
+        self.parquet_options = resolve_parquet_options(parquet_options).model_dump()
+        self.backend = resolve_backend(backend)
+
+    def _check_access(self) -> None:
+        """Raise if the storage backend cannot be used (e.g., no EXT access)."""
+        if self.backend.check_access():
+            return
+        if not isinstance(self.backend, AzureBackend):
+            raise AccessError(f"Storage backend {self.backend!r} is not accessible.")
+        get_environment().require()
+
+    def _list_blobs(self, name_starts_with: str) -> list:
+        """List blobs and virtual directories one level below a path."""
+        return self.backend.list(self.account, self.container, name_starts_with)
+
+    def _read_blob(self, name: str) -> bytes:
+        """Read a blob as bytes."""
+        return self.backend.get(self.account, self.container, name)
 
     def write_blob(
         self,
@@ -235,15 +870,10 @@ class BlobEndpoint:
                 auto_full_path = f"{url_parts[0]}_{str(idx).zfill(len(str(total_partitions)))}{url_parts[1]}"
             else:
                 auto_full_path = full_path
-            write_blob_stream(
-                data=fb_i,
-                blob_url=auto_full_path,
-                account_name=self.account,
-                container_name=self.container,
-                append_blob=append,
+            self.backend.put(
+                self.account, self.container, auto_full_path, fb_i, append=append
             )
-        # self.ledger_entry(action="write")
-        # print(f"file written to: {full_path}")
+        self.ledger_entry(action="write")
 
     def read_blobs(
         self,
@@ -262,25 +892,14 @@ class BlobEndpoint:
         blobs, _ = self._get_version_blobs(
             version_spec=version_spec, selection=selection, print_version=print_version
         )
-        blob_bytes = [
-            read_blob_stream(
-                blob_url=i["name"],
-                account_name=self.account,
-                container_name=self.container,
-            )
-            for i in blobs
-        ]
-        # self.ledger_entry(action="read")
+        blob_bytes = [self._read_blob(i["name"]) for i in blobs]
+        self.ledger_entry(action="read")
         return blob_bytes
 
     def read_csv(self, suffix: str) -> pd.DataFrame:
-        blob = read_blob_stream(
-            blob_url=self.prefix + "/" + suffix,
-            account_name=self.account,
-            container_name=self.container,
-        )
-        df = pd.read_csv(blob)
-        # self.ledger_entry(action="read")
+        blob = self._read_blob(self.prefix + "/" + suffix)
+        df = pd.read_csv(BytesIO(blob))
+        self.ledger_entry(action="read")
         return df
 
     def get_versions(self) -> list:
@@ -291,21 +910,55 @@ class BlobEndpoint:
             list: sorted list of data version paths in descending order
             (latest first)
         """
-        if not check_ext_env():
-            raise RuntimeError("No EXT access configured.")
+        self._check_access()
         glob_path = f"{self.prefix}/"
         return sorted(
             [
                 i["name"].removeprefix(glob_path).removesuffix("/")
-                for i in walk_blobs_in_container(
-                    name_starts_with=glob_path,
-                    account_name=self.account,
-                    container_name=self.container,
-                )
+                for i in self._list_blobs(glob_path)
             ],
             reverse=True,
         )
 
+    def get_watermark(
+        self,
+        version_spec: str | None = None,
+        selection: Literal["newest", "oldest"] = "newest",
+    ) -> dict | None:
+        """The watermark stored with a version by an incremental extract
+        (see ``soda.Query.extract_incremental``).
+
+        Args:
+            version_spec (str | None, optional): the version to read the
+                watermark of. Defaults to None (the newest version).
+            selection (Literal["newest", "oldest"], optional): whether to get the newest or oldest matching versions. Defaults to "newest".
+
+        Returns:
+            dict | None: the watermark (with its version), or None if there
+                are no versions or the version has no watermark
+        """
+        self._check_access()
+        version = version_matcher(version_spec, self.get_versions(), selection)
+        if not version:
+            return None
+        name = f"{self.prefix}/{version}/{WATERMARK_FILE}"
+        if not any(b["name"] == name for b in self._list_version_blobs(version)):
+            return None
+        return {**json.loads(self._read_blob(name)), "version": version}
+
+    def save_watermark(self, version: str, watermark: dict) -> None:
+        """Store the watermark of an incremental extract with its version.
+
+        Args:
+            version (str): the version the extract was written to
+            watermark (dict): the watermark column and value, and how the
+                version was extracted
+        """
+        self.write_blob(
+            json.dumps(watermark).encode("utf-8"),
+            path_after_prefix=f"{version}/{WATERMARK_FILE}",
+        )
+
     def get_file_ext(
         self,
         version_meta: VersionMetadata,
@@ -347,8 +1000,7 @@ class BlobEndpoint:
             ValueError: If the requested version cannot be resolved.
         """
         # check credential access
-        if not check_ext_env():
-            raise RuntimeError("No EXT access configured.")
+        self._check_access()
         version = None
         if not self.is_ledger:
             available_versions = self.get_versions()
@@ -362,19 +1014,44 @@ class BlobEndpoint:
             logger.info(f"Using version: {version}")
             if print_version:
                 print(f"Using version: {version}")
-            walk_path = f"{self.prefix}/{version}/"
-        else:
+        blobs = [
+            blob
+            for blob in self._list_version_blobs(version)
+            if PurePosixPath(blob["name"]).name != WATERMARK_FILE
+        ]
+        return blobs, version
+
+    def _list_version_blobs(self, version: str | None) -> list:
+        """List the blobs of one version (or of the ledger when version is None).
+
+        Args:
+            version (str | None): the resolved version
+
+        Returns:
+            list: Blob metadata dictionaries sorted by creation time
+        """
+        if version is None:
             walk_path = f"{self.prefix.removesuffix('/')}/"
-        return sorted(
-            list(
-                walk_blobs_in_container(
-                    name_starts_with=walk_path,
-                    account_name=self.account,
-                    container_name=self.container,
-                )
-            ),
-            key=lambda x: x["creation_time"],
-        ), version
+        else:
+            walk_path = f"{self.prefix}/{version}/"
+        return sorted(self._walk_blobs(walk_path), key=lambda x: x["creation_time"])
+
+    def _walk_blobs(self, name_starts_with: str) -> Iterator[Any]:
+        """Walk all blobs below a path, descending into the virtual
+        directories (names ending in '/') of hierarchical listings.
+
+        Args:
+            name_starts_with (str): the path to walk, ending in '/'
+
+        Yields:
+            Any: the blob properties of each blob
+        """
+        for blob in self._list_blobs(name_starts_with):
+            if blob["name"].endswith("/"):
+                if blob["name"] != name_starts_with:
+                    yield from self._walk_blobs(blob["name"])
+            else:
+                yield blob
 
     def download_version_to_local(
         self,
@@ -382,45 +1059,124 @@ class BlobEndpoint:
         version_spec: str | None = None,
         force: bool = False,
         selection: Literal["newest", "oldest"] = "newest",
-    ) -> bool:
+        max_workers: int = 8,
+        return_summary: bool = False,
+    ) -> bool | DownloadSummary:
         """Download a specific version of the data to a local path
 
+        Local files are checked before anything is fetched: files that exist
+        (and match the blob size, when known) are skipped unless forced.
+        Blobs are downloaded in parallel to ``.part`` files, which are renamed
+        into place once complete. Interrupted downloads resume from their
+        ``.part`` file when the blob is unchanged.
+
         Args:
             local_path (str): the local path to download to
             version_spec (str | None, optional): the version specifier to download. Defaults to None.
             force (bool, optional): whether to force re-download if local.
             selection (Literal["newest", "oldest"], optional): which version to select. Defaults to "newest".
+            max_workers (int, optional): number of concurrent downloads. Defaults to 8.
+            return_summary (bool, optional): whether to return a DownloadSummary
+                instead of a bool. Defaults to False.
         Returns:
-            bool: whether any files were written
+            bool | DownloadSummary: whether any files were written, or the
+                summary of transferred and skipped files if ``return_summary``
         """
-
-        written = False
-        blobs, _ = self._get_version_blobs(
+        blobs, version = self._get_version_blobs(
             version_spec=version_spec, selection=selection
         )
+        to_fetch = []
+        files_skipped = 0
+        bytes_skipped = 0
         for blob in blobs:
-            blob_data = read_blob_stream(
-                blob_url=blob["name"],
-                account_name=self.account,
-                container_name=self.container,
-            )
             relative_path = blob["name"].removeprefix(f"{self.prefix}/")
             local_file_path = os.path.join(local_path, relative_path)
-            local_dir = os.path.dirname(local_file_path)
-            os.makedirs(local_dir, exist_ok=True)
-            if os.path.exists(local_file_path) and not force:
+            size = _blob_size(blob)
+            if (
+                not force
+                and os.path.exists(local_file_path)
+                and (size is None or os.path.getsize(local_file_path) == size)
+            ):
+                files_skipped += 1
+                bytes_skipped += os.path.getsize(local_file_path)
                 continue
-            # Handle both raw bytes and objects with content_as_bytes() method
-            if isinstance(blob_data, bytes):
-                file_bytes = blob_data
-            else:
-                file_bytes = blob_data.content_as_bytes()
-            with open(local_file_path, "wb") as f:
-                f.write(file_bytes)
-                written = True
-        # if written:
-        # self.ledger_entry(action="read")
-        return written
+            to_fetch.append((blob, local_file_path))
+
+        bytes_transferred = 0
+        if to_fetch:
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(max_workers, len(to_fetch)))
+            ) as executor:
+                futures = [
+                    executor.submit(self._download_blob_to_file, blob, path)
+                    for blob, path in to_fetch
+                ]
+                for future in futures:
+                    bytes_transferred += future.result()
+
+        summary = DownloadSummary(
+            version=version,
+            files_transferred=len(to_fetch),
+            files_skipped=files_skipped,
+            bytes_transferred=bytes_transferred,
+            bytes_skipped=bytes_skipped,
+        )
+        logger.info(
+            f"Downloaded {summary.files_transferred} files "
+            f"({summary.bytes_transferred:,} bytes), skipped "
+            f"{summary.files_skipped} files ({summary.bytes_skipped:,} bytes)."
+        )
+        if summary.written:
+            self.ledger_entry(action="read")
+        return summary if return_summary else summary.written
+
+    def _download_blob_to_file(self, blob: Any, local_file_path: str) -> int:
+        """Download one blob to a ``.part`` file and atomically move it into
+        place, resuming a previous partial download of the same blob.
+
+        Args:
+            blob (Any): the blob properties from the container listing
+            local_file_path (str): the final local file path
+
+        Returns:
+            int: the number of bytes transferred
+        """
+        os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
+        part_path = local_file_path + _PART_SUFFIX
+        meta_path = local_file_path + _PART_META_SUFFIX
+        size = _blob_size(blob)
+        etag = blob.get("etag")
+        blob_id = {"etag": str(etag) if etag else None, "size": size}
+
+        offset = 0
+        if os.path.exists(part_path) and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                previous = json.load(f)
+            # only resume when the blob is known to be unchanged
+            if etag and previous == blob_id:
+                offset = os.path.getsize(part_path)
+        if offset and size is not None and offset >= size:
+            offset = 0
+        if not offset:
+            with open(meta_path, "w") as f:
+                json.dump(blob_id, f)
+
+        if offset:
+            logger.info(f"Resuming {blob['name']} at byte {offset:,}.")
+        n_bytes = 0
+        with open(part_path, "ab" if offset else "wb") as f:
+            for chunk in self.backend.iter_chunks(
+                self.account, self.container, blob["name"], offset=offset
+            ):
+                n_bytes += f.write(chunk)
+        if size is not None and offset + n_bytes != size:
+            raise OSError(
+                f"Incomplete download of {blob['name']}: "
+                f"{offset + n_bytes} of {size} bytes."
+            )
+        os.replace(part_path, local_file_path)
+        os.remove(meta_path)
+        return n_bytes
 
     @overload
     def get_dataframe(
@@ -473,8 +1229,7 @@ class BlobEndpoint:
         Returns:
             pd.DataFrame | pl.DataFrame | pl.LazyFrame: the dataframe
         """
-        if not check_ext_env():
-            raise RuntimeError("No EXT access configured.")
+        self._check_access()
         if output not in ["pandas", "polars", "pd", "pl", "pl_lazy", "lazy"]:
             raise ValueError(
                 f"Output {output} needs to be 'pandas', 'polars', 'pd', 'pl', 'pl_lazy', or 'lazy'."
@@ -493,39 +1248,29 @@ class BlobEndpoint:
             )
 
         file_ext = self.get_file_ext(version_meta)
-        fullpath = version_meta.blob_url
         if output in ["pl_lazy", "lazy"]:
-            if file_ext in ["parquet", "parq"]:
-                df = pl.scan_parquet(
-                    fullpath,
-                    storage_options={"account_name": self.account},
-                    credential_provider=pl.CredentialProviderAzure(
-                        credential=ManagedIdentityCredential()
-                    ),
+            glob_path = str(
+                PurePosixPath(version_blobs[0]["name"]).parent / f"*.{file_ext}"
+            )
+            fullpath = self.backend.url(self.account, self.container, glob_path)
+            scan_kwargs = self.backend.scan_options(self.account, self.container)
+            if scan_kwargs is None:
+                # backends without URL access are read eagerly
+                df = self.get_dataframe(
+                    output="pl", version_spec=version_spec, selection=selection
                 )
-                # self.ledger_entry(action="read")
+                return df.lazy()
+            if file_ext in ["parquet", "parq"]:
+                df = pl.scan_parquet(fullpath, **scan_kwargs)
+                self.ledger_entry(action="read")
                 return df
             elif file_ext == "csv":
-                df = pl.scan_csv(
-                    fullpath,
-                    infer_schema_length=None,
-                    storage_options={"account_name": self.account},
-                    credential_provider=pl.CredentialProviderAzure(
-                        credential=ManagedIdentityCredential()
-                    ),
-                )
-                ##self.ledger_entry(action="read")
+                df = pl.scan_csv(fullpath, infer_schema_length=None, **scan_kwargs)
+                self.ledger_entry(action="read")
                 return df
             elif file_ext == "ndjson" or file_ext == "jsonl":
-                df = pl.scan_ndjson(
-                    fullpath,
-                    infer_schema_length=None,
-                    storage_options={"account_name": self.account},
-                    credential_provider=pl.CredentialProviderAzure(
-                        credential=ManagedIdentityCredential()
-                    ),
-                )
-                ##self.ledger_entry(action="read")
+                df = pl.scan_ndjson(fullpath, infer_schema_length=None, **scan_kwargs)
+                self.ledger_entry(action="read")
                 return df
             else:
                 raise ValueError(f"Lazy loading not supported for {file_ext} files.")
@@ -585,12 +1330,18 @@ class BlobEndpoint:
             return df
 
     def ledger_entry(self, action: str) -> None:
-        """Write an access log entry to the ledger location
+        """Queue an access log entry for the ledger location. Entries are
+        buffered and appended in batches by a background writer (see
+        ``cfa.dataops.ledger``), so this does not block on storage.
 
         Args:
             action (str): the action taken (e.g., 'read', 'write')
         """
-        if self.is_ledger:
+        if (
+            self.is_ledger
+            or "prefix" not in self.ledger_location
+            or not self.ledger_location.get("enabled", True)
+        ):
             return
         log_entry = {
             "timestamp": get_timestamp(make_standard=True),
@@ -598,17 +1349,21 @@ class BlobEndpoint:
             "dataset": self.__ns_str__,
             "action": action,
         }
-        log_data = (json.dumps(log_entry) + "\n").encode("utf-8")
-        ledger_path = f"{self.ledger_location['prefix']}/{get_date()}.jsonl"
-
-        write_blob_stream(
-            data=log_data,
-            blob_url=ledger_path,
-            account_name=self.ledger_location["account"],
-            container_name=self.ledger_location["container"],
-            append_blob=True,
-            overwrite=False,
+        ledger_path = f"{self.ledger_location['prefix'].rstrip('/')}/{get_date()}.jsonl"
+        writer = get_ledger_writer(
+            **{
+                k: self.ledger_location[k]
+                for k in _LEDGER_SETTINGS
+                if k in self.ledger_location and k != "enabled"
+            }
         )
+        location = {
+            "account": self.ledger_location["account"],
+            "container": self.ledger_location["container"],
+            "path": ledger_path,
+            "backend": self.backend,
+        }
+        writer.submit(location=location, entry=log_entry)
 
     def resolve_version(
         self,
@@ -646,7 +1401,7 @@ class BlobEndpoint:
         name = version_blobs[0]["name"]
         file_ext = PurePosixPath(name).suffix.lstrip(".").lower()
         path = str(PurePosixPath(name).parent / f"*.{file_ext}")
-        fullpath = f"az://{self.container}/{path}"
+        fullpath = self.backend.url(self.account, self.container, path)
         return VersionMetadata(
             version=version,
             blob_url=fullpath,
@@ -656,22 +1411,32 @@ class BlobEndpoint:
 
     def save_dataframe(
         self,
-        df: pd.DataFrame | pl.DataFrame,
+        df: "pd.DataFrame | pl.DataFrame | pl.LazyFrame | pa.RecordBatchReader | duckdb.DuckDBPyRelation",
         path_after_prefix: str,
         file_format: str = "parquet",
         auto_version: bool = False,
+        parquet_options: dict | None = None,
+        rows_per_file: int = 1_000_000,
     ) -> None:
-        """Save a dataframe to the blob endpoint
+        """Save a dataframe to the blob endpoint. Polars LazyFrames, pyarrow
+        RecordBatchReaders and DuckDB relations are streamed batch by batch
+        into part files ({name}_{part:05d}.{ext}) of at most ``rows_per_file``
+        rows under a single version, so memory stays bounded by one part.
 
         Args:
-            df (pd.DataFrame | pl.DataFrame): the dataframe to save
+            df (pd.DataFrame | pl.DataFrame | pl.LazyFrame | pa.RecordBatchReader | duckdb.DuckDBPyRelation):
+            the dataframe or streaming source to save
             path_after_prefix (str): the path after the prefix to save to
             file_format (str, optional): the file format to save as.
             Defaults to "parquet".
             auto_version (bool, optional): whether to automatically version
             the data. Defaults to True.
-            partition_cols (List[str], optional): columns to partition by
-            when saving. Defaults to None.
+            parquet_options (dict | None, optional): parquet writer options
+            (compression, compression_level, row_group_size, use_dictionary,
+            write_statistics, write_page_index) overriding the endpoint
+            defaults. Defaults to None.
+            rows_per_file (int, optional): maximum rows per part file for
+            streaming sources. Defaults to 1,000,000.
         """
         if file_format not in ["parquet", "csv", "json", "jsonl"]:
             raise ValueError(
@@ -680,9 +1445,22 @@ class BlobEndpoint:
         if file_format in ["json", "jsonl"] and path_after_prefix.endswith(".json"):
             path_after_prefix = path_after_prefix[:-5] + ".jsonl"
             logger.info("Changing file extension to .jsonl for line-delimited JSON.")
-        if isinstance(df, pd.DataFrame):
+        if file_format == "parquet":
+            pq_options = resolve_parquet_options(self.parquet_options, parquet_options)
+        else:
+            pq_options = None
+        if not isinstance(df, pd.DataFrame | pl.DataFrame):
+            self._save_record_batches(
+                df,
+                path_after_prefix=path_after_prefix,
+                file_format=file_format,
+                auto_version=auto_version,
+                parquet_options=pq_options,
+                rows_per_file=rows_per_file,
+            )
+        elif isinstance(df, pd.DataFrame):
             if file_format == "parquet":
-                pq_bytes = df.to_parquet(index=False, compression="snappy")
+                pq_bytes = dataframe_to_parquet_bytes(df, pq_options)
                 self.write_blob(
                     file_buffer=pq_bytes,
                     path_after_prefix=path_after_prefix
@@ -710,9 +1488,7 @@ class BlobEndpoint:
                 )
         elif isinstance(df, pl.DataFrame):
             if file_format == "parquet":
-                buffer = BytesIO()
-                df.write_parquet(buffer, compression="snappy")
-                pq_bytes = buffer.getvalue()
+                pq_bytes = dataframe_to_parquet_bytes(df, pq_options)
                 self.write_blob(
                     file_buffer=pq_bytes,
                     path_after_prefix=path_after_prefix
@@ -739,6 +1515,48 @@ class BlobEndpoint:
                     auto_version=auto_version,
                 )
 
+    def _save_record_batches(
+        self,
+        source: "pl.LazyFrame | pa.RecordBatchReader | duckdb.DuckDBPyRelation",
+        path_after_prefix: str,
+        file_format: str,
+        auto_version: bool,
+        parquet_options: Any,
+        rows_per_file: int,
+    ) -> None:
+        """Stream a LazyFrame, RecordBatchReader or DuckDB relation into part
+        files under one version. See ``save_dataframe``."""
+        if rows_per_file < 1:
+            raise ValueError("rows_per_file must be a positive integer.")
+        ext = "jsonl" if file_format in ["json", "jsonl"] else file_format
+        stem = path_after_prefix.lstrip("/").removesuffix(f".{ext}")
+        if auto_version:
+            stem = f"{get_timestamp()}/{stem}"
+        schema, batches = _stream_record_batches(
+            source, batch_size=min(rows_per_file, _STREAM_BATCH_ROWS)
+        )
+        n_parts = 0
+        for part in _split_record_batches(batches, rows_per_file):
+            self.write_blob(
+                file_buffer=_encode_record_batches(
+                    part, schema, file_format, parquet_options
+                ),
+                path_after_prefix=f"{stem}_{str(n_parts).zfill(5)}.{ext}",
+                auto_version=False,
+            )
+            n_parts += 1
+        if n_parts == 0:
+            # an empty source still writes one empty part so the version exists
+            self.write_blob(
+                file_buffer=_encode_record_batches(
+                    iter(()), schema, file_format, parquet_options
+                ),
+                path_after_prefix=f"{stem}_{str(0).zfill(5)}.{ext}",
+                auto_version=False,
+            )
+            n_parts = 1
+        logger.info(f"Streamed {n_parts} part(s) to {self.prefix}/{stem}")
+
     def save_file_to_blob(
         self,
         file_path: str,
@@ -792,6 +1610,216 @@ class BlobEndpoint:
                 )
 
 
+class LedgerEndpoint(BlobEndpoint):
+    """The access ledger of a catalog. Raw entries are appended to daily JSONL
+    files ({prefix}/{YYYY-MM-DD}.jsonl); ``compact`` rolls them up into month
+    and catalog partitioned parquet under a sibling prefix
+    ({prefix}_compacted/month={YYYY-MM}/catalog={name}/ledger.parquet) so
+    ``query`` only needs to read the partitions that can match. An empty
+    ``month={YYYY-MM}/_through={YYYY-MM-DD}`` marker records the last day
+    compacted, so daily files of later days are still read raw."""
+
+    _columns = ["timestamp", "username", "dataset", "action"]
+
+    def __init__(
+        self,
+        account: str,
+        container: str,
+        prefix: str,
+        backend: StorageBackend | str | None = None,
+    ):
+        """
+        Args:
+            account (str): the azure storage account of the ledger
+            container (str): the container in the account of the ledger
+            prefix (str): the ledger path prefix in the container
+            backend (StorageBackend | str | None, optional): the storage
+                backend or its specification. Defaults to Azure blob storage.
+        """
+        super().__init__(
+            account=account,
+            container=container,
+            prefix=prefix,
+            ledger_location={},
+            ns="ledger_endpoint",
+            backend=backend,
+        )
+
+    @property
+    def compacted_prefix(self) -> str:
+        """The prefix the compacted parquet partitions are written under."""
+        return f"{self.prefix}_compacted"
+
+    def _daily_files(self) -> dict[str, str]:
+        """Map each ledger date (YYYY-MM-DD) to its raw JSONL blob name."""
+        self._check_access()
+        files = {}
+        for blob in self._list_blobs(f"{self.prefix}/"):
+            name = PurePosixPath(blob["name"]).name
+            if name.endswith(".jsonl"):
+                files[name.removesuffix(".jsonl")] = blob["name"]
+        return files
+
+    def _compacted_partitions(
+        self,
+    ) -> tuple[dict[str, dict[str, str]], dict[str, str]]:
+        """Map each compacted month to its {catalog: blob name} partitions,
+        and to the last day compacted into them."""
+        self._check_access()
+        partitions: dict[str, dict[str, str]] = {}
+        through: dict[str, str] = {}
+        for blob in self._walk_blobs(f"{self.compacted_prefix}/"):
+            path = PurePosixPath(blob["name"])
+            parts = dict(seg.split("=", 1) for seg in path.parent.parts if "=" in seg)
+            if "month" not in parts:
+                continue
+            month = parts["month"]
+            if "catalog" in parts:
+                partitions.setdefault(month, {})[parts["catalog"]] = blob["name"]
+            elif path.name.startswith("_through="):
+                day = path.name.removeprefix("_through=")
+                through[month] = max(through.get(month, day), day)
+        return partitions, through
+
+    def _read_bytes(self, blob_name: str) -> bytes:
+        blob = self._read_blob(blob_name)
+        return blob if isinstance(blob, bytes) else blob.content_as_bytes()
+
+    def _read_daily(self, blob_names: list[str]) -> pl.DataFrame:
+        frames = [
+            pl.read_ndjson(
+                BytesIO(self._read_bytes(name)),
+                schema_overrides={c: pl.String for c in self._columns},
+                infer_schema_length=None,
+            )
+            for name in blob_names
+        ]
+        frames = [f for f in frames if f.height > 0]
+        if not frames:
+            return pl.DataFrame(schema={c: pl.String for c in self._columns})
+        return pl.concat(frames, how="diagonal")
+
+    def compact(
+        self,
+        months: list[str] | None = None,
+        include_current_month: bool = False,
+    ) -> list[str]:
+        """Roll daily JSONL ledger files up into parquet partitioned by month
+        and catalog. Compacting a month rewrites its partitions from all of its
+        daily files, so it is safe to re-run. Today's file is still being
+        appended to and is left for a later run.
+
+        Args:
+            months (list[str] | None, optional): months (YYYY-MM) to compact.
+                Defaults to all months with daily files.
+            include_current_month (bool, optional): whether to compact the
+                current, still growing, month. Defaults to False.
+
+        Returns:
+            list[str]: the blob names of the written partitions
+        """
+        today = get_date()
+        by_month: dict[str, list[tuple[str, str]]] = {}
+        for day, name in sorted(self._daily_files().items()):
+            if day < today:
+                by_month.setdefault(day[:7], []).append((day, name))
+        written = []
+        for month, days in sorted(by_month.items()):
+            if months is not None and month not in months:
+                continue
+            if month == today[:7] and not include_current_month:
+                continue
+            names = [name for _, name in days]
+            df = self._read_daily(names).with_columns(
+                pl.col("dataset").str.split(".").list.first().alias("catalog")
+            )
+            for (catalog,), part in df.partition_by("catalog", as_dict=True).items():
+                blob_name = (
+                    f"{self.compacted_prefix}/month={month}/catalog={catalog}/"
+                    "ledger.parquet"
+                )
+                buffer = BytesIO()
+                part.drop("catalog").sort("timestamp").write_parquet(
+                    buffer, compression="zstd"
+                )
+                self.backend.put(
+                    self.account, self.container, blob_name, buffer.getvalue()
+                )
+                written.append(blob_name)
+            self.backend.put(
+                self.account,
+                self.container,
+                f"{self.compacted_prefix}/month={month}/_through={days[-1][0]}",
+                b"",
+            )
+            logger.info(f"Compacted {len(names)} ledger file(s) for {month}")
+        return written
+
+    def query(
+        self,
+        since: str | date | None = None,
+        dataset: str | None = None,
+        user: str | None = None,
+        output: Literal["pandas", "pd", "polars", "pl"] = "pandas",
+    ) -> pd.DataFrame | pl.DataFrame:
+        """Query ledger entries, reading only the compacted partitions and
+        daily files that can match. Compacted days are read from parquet;
+        later days are read from the raw daily files.
+
+        Args:
+            since (str | date | None, optional): only entries at or after this
+                date or timestamp (e.g. '2025-06-01' or '2025-06-01T12:00:00').
+            dataset (str | None, optional): a dataset namespace, or namespace
+                prefix (e.g. 'catalog.team'), to filter on.
+            user (str | None, optional): a username to filter on.
+            output (str, optional): 'pandas' or 'polars'. Defaults to "pandas".
+
+        Returns:
+            pd.DataFrame | pl.DataFrame: the matching ledger entries
+        """
+        if output not in ["pandas", "pd", "polars", "pl"]:
+            raise ValueError(f"Output {output} needs to be 'pandas' or 'polars'.")
+        if isinstance(since, date):
+            since = since.isoformat()
+        if isinstance(since, str):
+            since = since.replace(" ", "T")
+        catalog = dataset.split(".")[0] if dataset else None
+        compacted, through = self._compacted_partitions()
+        frames = []
+        for month, partitions in sorted(compacted.items()):
+            if since is not None and month < since[:7]:
+                continue
+            for part_catalog, name in partitions.items():
+                if catalog is not None and part_catalog != catalog:
+                    continue
+                frames.append(pl.read_parquet(BytesIO(self._read_bytes(name))))
+        daily = [
+            name
+            for day, name in sorted(self._daily_files().items())
+            if day > through.get(day[:7], "") and (since is None or day >= since[:10])
+        ]
+        if daily:
+            frames.append(self._read_daily(daily))
+        frames = [f for f in frames if f.height > 0]
+        if frames:
+            df = pl.concat(frames, how="diagonal_relaxed")
+        else:
+            df = pl.DataFrame(schema={c: pl.String for c in self._columns})
+        if since is not None:
+            df = df.filter(pl.col("timestamp") >= since)
+        if dataset is not None:
+            df = df.filter(
+                (pl.col("dataset") == dataset)
+                | pl.col("dataset").str.starts_with(f"{dataset}.")
+            )
+        if user is not None:
+            df = df.filter(pl.col("username") == user)
+        df = df.sort("timestamp")
+        if output in ["pandas", "pd"]:
+            return df.to_pandas()
+        return df
+
+
 def dict_to_sn(d: Any, defaults: dict | None = None, ns: str = "") -> CatalogNamespace:
     """Simple recursive namespace construction
 
@@ -823,17 +1851,25 @@ def dict_to_sn(d: Any, defaults: dict | None = None, ns: str = "") -> CatalogNam
         setattr(
             x,
             "_ledger_endpoint",
-            BlobEndpoint(
+            LedgerEndpoint(
                 account=defaults["storage"]["account"],
                 container=defaults["storage"]["container"],
                 prefix=defaults["access_ledger"]["path"],
-                ledger_location={},
-                ns="ledger_endpoint",
+                backend=defaults["storage"].get("backend"),
             ),
         )
     return x
 
 
+_preloaded_configs.update(
+    {
+        path: _load_dataset_config(path, all_defaults.get(k, {}))
+        for k, v in all_dataset_ns_map.items()
+        for path in _config_paths(v)
+    }
+)
+validate_catalog(_preloaded_configs)
+
 dc = []
 for k in all_dataset_ns_map.keys():
     dc.append(dict_to_sn({k: all_dataset_ns_map[k]}, all_defaults.get(k, {})))
@@ -846,6 +1882,7 @@ combined_reports_dict = {key: value for ns in rc for key, value in vars(ns).item
 
 datacat: CatalogNamespace = CatalogNamespace(**combined_dict)
 datacat.__setattr__("__namespace_list__", dataset_namespaces)
+datacat.__setattr__("__environment__", get_environment())
 reportcat: CatalogNamespace = CatalogNamespace(**combined_reports_dict)
 reportcat.__setattr__("__namespace_list__", report_namespaces)
 
@@ -4,18 +4,85 @@ CLI tools for managing data operations in the CFA project.
 
 import os
 from argparse import ArgumentParser
+from functools import cache
+from types import SimpleNamespace
+from typing import Any
 
 from rich.console import Console
 
-from .catalog import datacat
-from .utils import tree
+from .daemon import DaemonClient, DaemonError, DaemonUnavailable, connect_daemon
+from .index import DatasetIndexEntry, load_dataset_index
+from .utils import resolve_dot_path, tree
+
+
+@cache
+def _dataset_index() -> dict[str, DatasetIndexEntry]:
+    """
+    Helper function to get the lightweight index of datasets and their stages.
+    """
+    return load_dataset_index()
+
+
+def _datacat():
+    """
+    Helper function to get the full catalog, only imported by commands that
+    read or write data.
+    """
+    from .catalog import datacat
+
+    return datacat
+
+
+def _resolve(dot_path: str):
+    """
+    Helper function to get a catalog endpoint by its dotted namespace.
+    """
+    return resolve_dot_path(_datacat(), dot_path)
+
+
+def _add_daemon_argument(parser: ArgumentParser) -> None:
+    """
+    Helper function to add the --no-daemon option to a command.
+    """
+    parser.add_argument(
+        "--no-daemon",
+        help="work in this process even if a dataops_daemon is running",
+        action="store_true",
+    )
+
+
+def _daemon(args) -> DaemonClient | None:
+    """
+    Helper function to connect to a running dataops_daemon, unless disabled.
+    """
+    if args.no_daemon:
+        return None
+    return connect_daemon()
+
+
+def _call_daemon(daemon: DaemonClient | None, method: str, *args, **kwargs) -> Any:
+    """
+    Helper function to run a request in a dataops_daemon. Returns None when
+    there is no daemon or it could not serve the request (e.g. it stopped, or
+    failed to load the catalog), so the caller works in-process instead.
+    """
+    if daemon is None:
+        return None
+    try:
+        return getattr(daemon, method)(*args, **kwargs)
+    except (DaemonUnavailable, DaemonError) as e:
+        Console(stderr=True).print(
+            f"[yellow]dataops_daemon failed ({e}), working in this process.[/yellow]"
+        )
+        daemon.close()
+        return None
 
 
 def _get_dataset_namespaces() -> list[str]:
     """
     Helper function to get a list of dataset namespaces.
     """
-    return datacat.__namespace_list__
+    return list(_dataset_index())
 
 
 def _get_stages_list(dataset_namespace: str) -> list[str]:
@@ -29,16 +96,17 @@ def _get_stages_list(dataset_namespace: str) -> list[str]:
             + "\n".join(f"- {ds}" for ds in _get_dataset_namespaces())
         )
         return
-    dataset_dict = eval(f"datacat.{dataset_namespace}.__dict__")
     stages = [
         key
-        for key in dataset_dict.keys()
+        for key in _dataset_index()[dataset_namespace].stages
         if any(key.startswith(prefix) for prefix in stages_start_with)
     ]
     return sorted(stages)
 
 
-def _get_versions_list(dataset_namespace: str, stage: str) -> list[str]:
+def _get_versions_list(
+    dataset_namespace: str, stage: str, daemon: DaemonClient | None = None
+) -> list[str]:
     """
     Helper function to get a list of versions for a given dataset namespace and stage.
     """
@@ -49,10 +117,32 @@ def _get_versions_list(dataset_namespace: str, stage: str) -> list[str]:
             + "\n".join(f"- {s}" for s in stages)
         )
         return
-    versions = eval(f"datacat.{dataset_namespace}.{stage}.get_versions()")
+    versions = _call_daemon(daemon, "versions", dataset_namespace, stage)
+    if versions is not None:
+        return versions
+    versions = _resolve(f"{dataset_namespace}.{stage}").get_versions()
     return versions
 
 
+def _write_version_report(args) -> None:
+    """
+    Helper function to write the catalog-wide version report of dataops_versions --all.
+    """
+    report = _datacat().version_report(
+        prefix=args.prefix, max_workers=args.workers, output="polars"
+    )
+    if args.format == "parquet":
+        report.write_parquet(args.output)
+    elif args.output is not None:
+        report.write_json(args.output)
+    else:
+        print(report.write_json())
+        return
+    Console().print(
+        f"[bold green]Wrote the versions of {report.height} dataset stages to '{args.output}'.[/bold green]"
+    )
+
+
 def get_available_data():
     """
     Retrieve a list of available datasets for CFA.
@@ -60,11 +150,14 @@ def get_available_data():
     parser = ArgumentParser(description="Get list of available datasets")
     parser.add_argument("-p", "--prefix", help="optional prefix filter", default=None)
     args = parser.parse_args()
-    datasets = datacat.__namespace_list__
+    datasets = _get_dataset_namespaces()
     if args.prefix:
         datasets = [ds for ds in datasets if ds.startswith(args.prefix)]
     formatted_list = "\n".join(f"- {dataset}" for dataset in sorted(datasets))
-    Console().print(f"[bold]Available Datasets:[/bold]\n{formatted_list}")
+    # plain names, skip rich's repr highlighting of every line
+    Console(highlight=False).print(
+        f"[bold]Available Datasets:[/bold]\n{formatted_list}"
+    )
 
 
 def get_dataset_stages():
@@ -91,18 +184,59 @@ def get_dataset_versions():
     Retrieve versions of available datasets for CFA.
     """
     parser = ArgumentParser(description="Get dataset versions")
-    parser.add_argument("dataset", help="full dataset namespace")
+    parser.add_argument(
+        "dataset", help="full dataset namespace (omit with --all)", nargs="?"
+    )
     parser.add_argument(
         "--stage", "-s", help="specific stage to get version for", default=None
     )
+    parser.add_argument(
+        "--all",
+        help="report the versions of every stage of every dataset",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--prefix",
+        "-p",
+        help="with --all, only datasets starting with this prefix",
+        default=None,
+    )
+    parser.add_argument(
+        "--format",
+        "-f",
+        help="with --all, the report format (default json)",
+        choices=["json", "parquet"],
+        default="json",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="with --all, the report file (required for parquet, json defaults to stdout)",
+        default=None,
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        help="with --all, number of concurrent listings (default 32)",
+        type=int,
+        default=32,
+    )
+    _add_daemon_argument(parser)
     args = parser.parse_args()
+    if args.all:
+        if args.format == "parquet" and args.output is None:
+            parser.error("--format parquet requires --output")
+        _write_version_report(args)
+        return
+    if args.dataset is None:
+        parser.error("the dataset argument is required unless --all is given")
     dataset = args.dataset
     available_stages = _get_stages_list(dataset)
     if args.stage is None:
         stage = available_stages[-1]
     else:
         stage = args.stage
-    versions = _get_versions_list(dataset, stage)
+    versions = _get_versions_list(dataset, stage, daemon=_daemon(args))
     formatted_versions = "\n".join(
         f"- [red]{version}[/red]" if version == versions[0] else f"- {version}"
         for version in versions
@@ -133,25 +267,50 @@ def save_data_locally():
         help="download the oldest version of data instead of the newest",
         action="store_true",
     )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        help="number of concurrent file downloads (default 8)",
+        type=int,
+        default=8,
+    )
+    _add_daemon_argument(parser)
     args = parser.parse_args()
     dataset = args.dataset
     stage = args.stage
     version = args.version
+    daemon = _daemon(args)
     if stage is None:
         stages = _get_stages_list(dataset)
         stage = stages[-1]
     if version is None:
-        versions = _get_versions_list(dataset, stage)
+        versions = _get_versions_list(dataset, stage, daemon=daemon)
         version = versions[0]
     local_path = os.path.abspath(args.location)
     if args.oldest:
         selection = "oldest"
     else:
         selection = "newest"
-    written = eval(
-        f"datacat.{dataset}.{stage}.download_version_to_local('{local_path}', version_spec='{version}', force={args.force}, selection='{selection}')"
+    download_options = dict(
+        version_spec=version,
+        force=args.force,
+        selection=selection,
+        max_workers=args.workers,
+    )
+    result = _call_daemon(
+        daemon, "download", dataset, stage, local_path, **download_options
+    )
+    if result is not None:
+        summary = SimpleNamespace(**result)
+    else:
+        summary = _resolve(f"{dataset}.{stage}").download_version_to_local(
+            local_path, return_summary=True, **download_options
+        )
+    transfer_report = (
+        f"{summary.files_transferred} files ({summary.bytes_transferred:,} bytes) transferred, "
+        f"{summary.files_skipped} files ({summary.bytes_skipped:,} bytes) already present."
     )
-    if not written:
+    if not summary.files_transferred:
         Console().print(
             f"[bold yellow]Dataset '{dataset}' version '{version}' at stage '{stage}' is already present at location '{local_path}'. Use --force to re-download.[/bold yellow]"
         )
@@ -159,5 +318,127 @@ def save_data_locally():
     else:
         tree_output = tree(local_path, show_hidden=False)
         Console().print(
-            f"[bold green]Dataset '{dataset}' version '{version}' at stage '{stage}' has been saved locally.[/bold green]\n\n{local_path}\n{tree_output}"
+            f"[bold green]Dataset '{dataset}' version '{version}' at stage '{stage}' has been saved locally.[/bold green]\n{transfer_report}\n\n{local_path}\n{tree_output}"
         )
+
+
+def sync_data_locally():
+    """
+    Incrementally mirror datasets, or a whole catalog subtree, to a local directory.
+    """
+    parser = ArgumentParser(
+        description="Mirror versions and stages of datasets to a local directory, transferring only new or changed files"
+    )
+    parser.add_argument(
+        "namespace",
+        help="full dataset namespace, or a namespace prefix to sync every dataset below it",
+    )
+    parser.add_argument("location", help="local directory of the mirror")
+    parser.add_argument(
+        "--stage",
+        "-s",
+        help="stage to sync, can be repeated (defaults to all stages)",
+        action="append",
+        default=None,
+    )
+    parser.add_argument(
+        "--version",
+        "-v",
+        help="version specifier of the versions to sync, e.g. '>=2025-01-01' (defaults to all versions)",
+        default=None,
+    )
+    parser.add_argument(
+        "--latest",
+        "-n",
+        help="only sync the newest n matching versions of each stage",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        help="number of concurrent file transfers (default 8)",
+        type=int,
+        default=8,
+    )
+    parser.add_argument(
+        "--prune",
+        help="delete mirrored files that are no longer part of the selection",
+        action="store_true",
+    )
+    _add_daemon_argument(parser)
+    args = parser.parse_args()
+    namespace = args.namespace
+    datasets = [
+        ds
+        for ds in _get_dataset_namespaces()
+        if ds == namespace or ds.startswith(f"{namespace}.")
+    ]
+    if not datasets:
+        Console().print(
+            f"[bold red]Error:[/bold red] No datasets found under '{namespace}'."
+        )
+        return
+    local_path = os.path.abspath(args.location)
+    daemon = _daemon(args)
+    sync_options = dict(
+        versions=args.version,
+        latest=args.latest,
+        max_workers=args.workers,
+        prune=args.prune,
+    )
+    for dataset in datasets:
+        result = _call_daemon(
+            daemon, "sync", dataset, local_path, stages=args.stage, **sync_options
+        )
+        if result is not None:
+            summary = SimpleNamespace(**result)
+        else:
+            endpoint = _resolve(dataset)
+            stages = args.stage
+            if stages is not None:
+                stages = [s for s in stages if s in endpoint.stages]
+            summary = endpoint.sync_to_local(local_path, stages=stages, **sync_options)
+        n_versions = sum(len(v) for v in summary.versions.values())
+        Console().print(
+            f"[bold green]{dataset}[/bold green]: {n_versions} versions, "
+            f"{summary.files_transferred} files ({summary.bytes_transferred:,} bytes) transferred, "
+            f"{summary.files_skipped} files ({summary.bytes_skipped:,} bytes) unchanged, "
+            f"{summary.files_deleted} files deleted."
+        )
+
+
+def compact_access_ledger():
+    """
+    Compact a catalog's daily access ledger files into partitioned parquet.
+    """
+    parser = ArgumentParser(
+        description="Compact a catalog's access ledger into month and catalog partitioned parquet"
+    )
+    parser.add_argument("catalog", help="catalog name (e.g., the first namespace)")
+    parser.add_argument(
+        "--month",
+        "-m",
+        help="specific month (YYYY-MM) to compact, can be repeated",
+        action="append",
+        default=None,
+    )
+    parser.add_argument(
+        "--include-current",
+        help="also compact the current (incomplete) month",
+        action="store_true",
+    )
+    args = parser.parse_args()
+    catalog_ns = getattr(_datacat(), args.catalog, None)
+    if catalog_ns is None or not hasattr(catalog_ns, "_ledger_endpoint"):
+        Console().print(
+            f"[bold red]Error:[/bold red] Catalog '{args.catalog}' not found."
+        )
+        return
+    written = catalog_ns._ledger_endpoint.compact(
+        months=args.month, include_current_month=args.include_current
+    )
+    formatted = "\n".join(f"- {name}" for name in written)
+    Console().print(
+        f"[bold green]Wrote {len(written)} ledger partition(s) for '{args.catalog}':[/bold green]\n{formatted}"
+    )
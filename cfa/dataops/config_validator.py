@@ -1,15 +1,28 @@
 """The dataset config validator."""
 
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections.abc import Mapping
 from enum import Enum
+from typing import Literal
 
+from pydantic import VERSION as PYDANTIC_VERSION
 from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    TypeAdapter,
     ValidationError,
     model_validator,
 )
 
+from .utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
 
 class DatasetType(str, Enum):
     """Dataset types."""
@@ -51,6 +64,60 @@ class SourceValidation(BaseModel):
     """Validate the source field. This field is meant to be very open ended."""
 
     model_config = ConfigDict(extra="allow")
+    type: str | None = Field(
+        None,
+        description="how DatasetEndpoint.run_extract() reads the source (socrata, http or file). Told from the url or path when not set.",
+    )
+    format: str | None = Field(
+        None,
+        description="the file format of http and file sources (csv, json, ndjson, jsonl or parquet). Told from the file suffix when not set.",
+    )
+    watermark: str | None = Field(
+        None,
+        description="a column (e.g., :updated_at or a date column) whose maximum is stored with each extract version, so later extracts only fetch newer rows.",
+    )
+    incremental: str | None = Field(
+        None,
+        description="whether incremental extracts write only the new rows (delta) or merge them into a copy of the newest version (full). Defaults to delta.",
+    )
+    key: str | list[str] | None = Field(
+        None,
+        description="the columns identifying a row, replaced by newer rows when merging a full version.",
+    )
+
+
+class ParquetOptionsValidation(BaseModel):
+    """Validate the parquet writer options of a storage endpoint or the
+    catalog defaults."""
+
+    model_config = ConfigDict(extra="forbid")
+    compression: Literal["snappy", "zstd", "lz4", "gzip", "brotli", "uncompressed"] = (
+        Field(
+            "snappy",
+            description="the compression codec used for parquet column chunks.",
+        )
+    )
+    compression_level: int | None = Field(
+        None,
+        description="the codec specific compression level (e.g., 1-22 for zstd). Uses the codec default when not set.",
+    )
+    row_group_size: int | None = Field(
+        None,
+        description="the maximum number of rows per row group. Uses the writer default when not set.",
+        gt=0,
+    )
+    use_dictionary: bool = Field(
+        True,
+        description="whether to dictionary encode columns.",
+    )
+    write_statistics: bool = Field(
+        True,
+        description="whether to write column chunk statistics (min/max/null count).",
+    )
+    write_page_index: bool = Field(
+        False,
+        description="whether to write the parquet page index for page level pruning.",
+    )
 
 
 class StorageEndpointValidation(BaseModel):
@@ -72,6 +139,10 @@ class StorageEndpointValidation(BaseModel):
         description="the prefix (folder path) for the storage endpoint. A sub-directory within the this path will be created for each version/timestamped dataset.",
         min_length=1,
     )
+    parquet: ParquetOptionsValidation | None = Field(
+        None,
+        description="parquet writer options for dataframes saved to this endpoint. Overrides the catalog defaults.",
+    )
 
 
 class ConfigValidator(BaseModel):
@@ -99,3 +170,172 @@ class ConfigValidator(BaseModel):
         return values
 
     _validate_stages = model_validator(mode="before")(validate_stage_fields)
+
+
+def is_stage_key(key: str) -> bool:
+    """Whether a config section is a storage endpoint (load, extract, data or stage_*)."""
+    return key in ["load", "extract", "data"] or key.startswith("stage_")
+
+
+class DatasetConfigValidation(BaseModel):
+    """Validate a dataset configuration with its storage endpoint sections
+    gathered under ``stages``, so every section of every config is validated
+    by one adapter in one pass."""
+
+    model_config = ConfigDict(extra="allow")
+    properties: PropertiesValidation
+    source: SourceValidation | None = None
+    stages: dict[str, StorageEndpointValidation] = Field(default_factory=dict)
+
+
+_catalog_adapter = TypeAdapter(dict[str, DatasetConfigValidation])
+
+
+class CatalogValidationError(ValueError):
+    """Raised with the errors of every invalid dataset config of a catalog."""
+
+    def __init__(self, errors: dict[str, list[dict]]):
+        """
+        Args:
+            errors (dict[str, list[dict]]): the pydantic errors of each
+                invalid config, keyed by config path
+        """
+        self.errors = errors
+        messages = []
+        for path, path_errors in errors.items():
+            lines = [
+                f"  {'.'.join(str(i) for i in e['loc']) or '(config)'}: {e['msg']}"
+                for e in path_errors
+            ]
+            messages.append("\n".join([f"Invalid dataset {path}:", *lines]))
+        super().__init__("\n".join(messages))
+
+
+def config_hash(config: Mapping) -> str:
+    """Hash a dataset config for the validation cache.
+
+    Args:
+        config (Mapping): the dataset config
+
+    Returns:
+        str: a hex digest of the config and the validator version (including
+            the validation schema)
+    """
+    payload = json.dumps(
+        [_VALIDATOR_VERSION, config], sort_keys=True, default=str
+    ).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _validator_version(adapter: TypeAdapter = _catalog_adapter) -> str:
+    """The package and pydantic versions and a digest of the validation
+    schema, so cached results are dropped whenever the models change, even
+    without a release (e.g. in editable installs)."""
+    try:
+        from importlib.metadata import version
+
+        package_version = version("cfa-dataops")
+    except Exception:
+        package_version = "unknown"
+    schema = json.dumps(adapter.json_schema(), sort_keys=True, default=str)
+    schema_digest = hashlib.sha256(schema.encode()).hexdigest()[:16]
+    return f"{package_version}/{PYDANTIC_VERSION}/{schema_digest}"
+
+
+_VALIDATOR_VERSION = _validator_version()
+_CACHE_FILE = "validated_configs.json"
+
+
+class _ValidationCache:
+    """Hashes of configs that passed validation, kept in memory and in
+    ``validated_configs.json`` in the cfa.dataops cache directory."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes: set[str] | None = None
+
+    def _path(self) -> str:
+        return os.path.join(get_cache_dir(), _CACHE_FILE)
+
+    def _load(self) -> set[str]:
+        if self._hashes is None:
+            self._hashes = set()
+            try:
+                with open(self._path()) as f:
+                    cached = json.load(f)
+                if cached.get("version") == _VALIDATOR_VERSION:
+                    self._hashes = set(cached["hashes"])
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        return self._hashes
+
+    def __contains__(self, digest: str) -> bool:
+        with self._lock:
+            return digest in self._load()
+
+    def add(self, digests: set[str]) -> None:
+        with self._lock:
+            hashes = self._load()
+            if digests <= hashes:
+                return
+            hashes.update(digests)
+            try:
+                path = self._path()
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(
+                        {"version": _VALIDATOR_VERSION, "hashes": sorted(hashes)}, f
+                    )
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.debug(f"Could not write the validation cache: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hashes = None
+
+
+validation_cache = _ValidationCache()
+
+
+def validate_catalog(configs: Mapping[str, Mapping], use_cache: bool = True) -> None:
+    """Validate dataset configs in one pass, collecting every error.
+
+    Configs that passed validation before (by ``config_hash``) are skipped,
+    so unchanged configs are not re-validated when a catalog is imported.
+
+    Args:
+        configs (Mapping[str, Mapping]): dataset configs keyed by config path
+        use_cache (bool, optional): skip and record configs by hash. Defaults to True.
+
+    Raises:
+        CatalogValidationError: with the errors of every invalid config
+    """
+    digests = {path: config_hash(config) for path, config in configs.items()}
+    pending = {
+        path: config
+        for path, config in configs.items()
+        if not (use_cache and digests[path] in validation_cache)
+    }
+    if not pending:
+        return
+    shaped = {}
+    for path, config in pending.items():
+        item = {k: v for k, v in config.items() if not is_stage_key(k)}
+        item["stages"] = {
+            k: v for k, v in config.items() if is_stage_key(k) and v is not None
+        }
+        shaped[path] = item
+    errors: dict[str, list[dict]] = {}
+    try:
+        _catalog_adapter.validate_python(shaped)
+    except ValidationError as e:
+        for error in e.errors():
+            path, *loc = error["loc"]
+            if loc[:1] == ["stages"]:
+                loc = loc[1:]
+            errors.setdefault(path, []).append({**error, "loc": tuple(loc)})
+    if use_cache:
+        validation_cache.add({digests[p] for p in pending if p not in errors})
+    if errors:
+        raise CatalogValidationError(errors)
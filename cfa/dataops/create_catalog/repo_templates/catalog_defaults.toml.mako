@@ -2,7 +2,24 @@
 
 account = "cfadatalakeprd"
 container = "cfapredict"
+# optional storage backend: "azure" (default), "local:/path" or "memory"
+# backend = "azure"
 
 [access_ledger]
 
 path = "_access/${unique_name}/ledger/"
+# enabled = true
+# batch_size = 100
+# flush_interval = 5.0
+# max_queue = 10000
+# on_full = "drop"
+
+# [parquet]
+# optional parquet writer defaults for all datasets in this catalog
+# (can be overridden in a dataset stage table, e.g. [load.parquet])
+# compression = "zstd"
+# compression_level = 3
+# row_group_size = 250000
+# use_dictionary = true
+# write_statistics = true
+# write_page_index = false
@@ -0,0 +1,542 @@
+"""A long-lived local daemon that keeps the data catalog warm.
+
+``dataops_daemon`` imports the catalog once and serves requests on a Unix
+socket, so the Azure credentials and client pool, the EXT environment check
+and the listed versions of each stage stay in memory between calls. The
+catalog is re-imported when a dataset config or catalog default file changes.
+The CLI
+commands that read storage use a running daemon automatically (``--no-daemon``
+or ``DATAOPS_NO_DAEMON=1`` work in-process instead) and Python code can call
+it with a ``DaemonClient``.
+
+Requests and responses are newline-delimited JSON objects,
+``{"method": ..., "params": {...}}`` answered by ``{"result": ...}`` or
+``{"error": {"type": ..., "message": ...}}``, and a connection can carry any
+number of requests.
+"""
+
+import importlib
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from dataclasses import asdict
+from typing import Any
+
+from .utils import FileStat, get_cache_dir, resolve_dot_path, scan_files
+
+logger = logging.getLogger(__name__)
+
+if not logger.handlers:
+    logger.addHandler(logging.NullHandler())
+
+SOCKET_ENV_VAR = "DATAOPS_DAEMON_SOCKET"
+NO_DAEMON_ENV_VAR = "DATAOPS_NO_DAEMON"
+
+
+def default_socket_path() -> str:
+    """The socket of the daemon, ``$DATAOPS_DAEMON_SOCKET`` if set, else
+    ``daemon.sock`` in the cfa.dataops cache directory."""
+    return os.environ.get(SOCKET_ENV_VAR) or os.path.join(
+        get_cache_dir(), "daemon.sock"
+    )
+
+
+def _catalog_file_stats() -> dict[str, FileStat]:
+    """The size and modification time of the dataset configs and catalog
+    defaults of the installed catalogs."""
+    from .index import get_all_catalogs
+
+    stats = {}
+    for _, cat_name, cat_path in get_all_catalogs():
+        stats.update(scan_files(os.path.join(cat_path, cat_name), "toml"))
+    return stats
+
+
+def _load_catalog(reload: bool = False) -> Any:
+    """The data catalog, with the modules of the installed catalogs and of
+    ``cfa.dataops.catalog`` re-imported first when ``reload`` is set."""
+    if reload:
+        from .index import get_all_catalogs
+
+        for cns, cat_name, _ in get_all_catalogs():
+            for module in ["datasets", "reports"]:
+                name = f"{cns}.{cat_name}.{module}"
+                if name in sys.modules:
+                    importlib.reload(sys.modules[name])
+        if f"{__package__}.catalog" in sys.modules:
+            importlib.reload(sys.modules[f"{__package__}.catalog"])
+    from .catalog import datacat
+
+    return datacat
+
+
+class DaemonUnavailable(ConnectionError):
+    """No daemon is listening on the socket."""
+
+
+class DaemonError(RuntimeError):
+    """A request failed in the daemon.
+
+    Attributes:
+        error_type (str): the name of the exception raised by the daemon
+    """
+
+    def __init__(self, error_type: str, message: str):
+        super().__init__(f"{error_type}: {message}")
+        self.error_type = error_type
+
+
+class DataopsDaemon:
+    """Serves catalog requests from one process, caching the versions of
+    each stage for ``versions_ttl`` seconds. Unless a catalog is passed in,
+    the config files of the installed catalogs are checked at most every
+    ``reload_interval`` seconds and the catalog is re-imported when any of
+    them changed.
+    """
+
+    methods = (
+        "ping",
+        "datasets",
+        "stages",
+        "versions",
+        "download",
+        "sync",
+        "refresh",
+        "shutdown",
+    )
+
+    def __init__(
+        self,
+        socket_path: str | None = None,
+        versions_ttl: float = 60.0,
+        catalog: Any = None,
+        reload_interval: float = 2.0,
+    ):
+        """
+        Args:
+            socket_path (str | None, optional): the Unix socket to listen on.
+                Defaults to ``default_socket_path()``.
+            versions_ttl (float, optional): seconds listed versions are reused
+                before storage is listed again. Defaults to 60.0.
+            catalog (Any, optional): the catalog to serve. Defaults to
+                ``cfa.dataops.datacat``, imported on first use.
+            reload_interval (float, optional): seconds between checks of the
+                catalog config files. Defaults to 2.0.
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.versions_ttl = versions_ttl
+        self.started = time.time()
+        self.requests = 0
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._catalog = catalog
+        self._owns_catalog = catalog is None
+        self._file_stats: dict[str, FileStat] = {}
+        self._checked_at = 0.0
+        self._version_cache: dict[tuple[str, str], tuple[float, list[str]]] = {}
+        self._lock = threading.Lock()
+        self._server: socketserver.ThreadingUnixStreamServer | None = None
+
+    @property
+    def catalog(self) -> Any:
+        with self._lock:
+            if self._owns_catalog and self._catalog_files_changed():
+                reload = self._catalog is not None
+                if reload:
+                    logger.info("Catalog config files changed, reloading the catalog")
+                    self.reloads += 1
+                self._catalog = _load_catalog(reload=reload)
+                self._version_cache.clear()
+            return self._catalog
+
+    def _catalog_files_changed(self) -> bool:
+        """Whether the catalog is to be (re)loaded: it was not loaded yet, or
+        its config files changed since the last check, made at most every
+        ``reload_interval`` seconds."""
+        now = time.monotonic()
+        if self._catalog is not None and now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+        stats = _catalog_file_stats()
+        changed = self._catalog is None or stats != self._file_stats
+        self._file_stats = stats
+        return changed
+
+    def handle(self, method: str, params: dict) -> Any:
+        """Run one request.
+
+        Args:
+            method (str): one of ``DataopsDaemon.methods``
+            params (dict): the keyword arguments of the method
+
+        Returns:
+            Any: the JSON serializable result
+        """
+        if method not in self.methods:
+            raise ValueError(f"Unknown daemon method '{method}'.")
+        with self._lock:
+            self.requests += 1
+        return getattr(self, f"_{method}")(**params)
+
+    def _endpoint(self, dot_path: str) -> Any:
+        return resolve_dot_path(self.catalog, dot_path)
+
+    def _ping(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "started": self.started,
+            "requests": self.requests,
+            "cached_versions": len(self._version_cache),
+            "reloads": self.reloads,
+        }
+
+    def _datasets(self) -> list[str]:
+        return sorted(self.catalog.__namespace_list__)
+
+    def _stages(self, dataset: str) -> list[str]:
+        return list(self._endpoint(dataset).stages)
+
+    def _versions(self, dataset: str, stage: str, refresh: bool = False) -> list[str]:
+        key = (dataset, stage)
+        with self._lock:
+            cached = self._version_cache.get(key)
+        if (
+            cached is not None
+            and not refresh
+            and time.monotonic() - cached[0] < self.versions_ttl
+        ):
+            return cached[1]
+        versions = self._endpoint(f"{dataset}.{stage}").get_versions()
+        with self._lock:
+            self._version_cache[key] = (time.monotonic(), versions)
+        return versions
+
+    def _download(
+        self,
+        dataset: str,
+        stage: str,
+        local_path: str,
+        version_spec: str | None = None,
+        force: bool = False,
+        selection: str = "newest",
+        max_workers: int = 8,
+    ) -> dict:
+        summary = self._endpoint(f"{dataset}.{stage}").download_version_to_local(
+            local_path,
+            version_spec=version_spec,
+            force=force,
+            selection=selection,
+            max_workers=max_workers,
+            return_summary=True,
+        )
+        return asdict(summary)
+
+    def _sync(
+        self,
+        dataset: str,
+        local_path: str,
+        stages: list[str] | None = None,
+        versions: str | None = None,
+        latest: int | None = None,
+        max_workers: int = 8,
+        prune: bool = False,
+    ) -> dict:
+        endpoint = self._endpoint(dataset)
+        if stages is not None:
+            stages = [s for s in stages if s in endpoint.stages]
+        summary = endpoint.sync_to_local(
+            local_path,
+            stages=stages,
+            versions=versions,
+            latest=latest,
+            max_workers=max_workers,
+            prune=prune,
+        )
+        return asdict(summary)
+
+    def _refresh(self) -> dict:
+        with self._lock:
+            cleared = len(self._version_cache)
+            self._version_cache.clear()
+        environment = getattr(self.catalog, "__environment__", None)
+        if environment is not None:
+            environment.refresh()
+        return {"cleared_versions": cleared}
+
+    def _shutdown(self) -> bool:
+        # shutdown() waits for serve_forever() to return, so it cannot run
+        # on the thread handling this request
+        threading.Thread(target=self.stop, daemon=True).start()
+        return True
+
+    def serve_forever(self) -> None:
+        """Listen on the socket until ``stop()`` is called or a ``shutdown``
+        request is received. The socket is only accessible to the current user.
+
+        Raises:
+            RuntimeError: if a daemon is already listening on the socket
+        """
+        if os.path.exists(self.socket_path):
+            try:
+                DaemonClient(self.socket_path).connect().close()
+            except DaemonUnavailable:
+                os.remove(self.socket_path)  # left behind by a stopped daemon
+            else:
+                raise RuntimeError(
+                    f"A dataops daemon is already running on {self.socket_path}."
+                )
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    self.wfile.write(daemon._respond(line) + b"\n")
+                    self.wfile.flush()
+
+        umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(
+                self.socket_path, Handler
+            )
+        finally:
+            os.umask(umask)
+        self._server.daemon_threads = True
+        logger.info(f"dataops daemon listening on {self.socket_path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def stop(self) -> None:
+        """Stop serving requests."""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _respond(self, line: bytes) -> bytes:
+        try:
+            request = json.loads(line)
+            response = {
+                "result": self.handle(request["method"], request.get("params") or {})
+            }
+        except Exception as e:
+            logger.debug(f"daemon request failed: {e!r}")
+            response = {"error": {"type": type(e).__name__, "message": str(e)}}
+        return json.dumps(response).encode()
+
+
+class DaemonClient:
+    """A connection to a running ``dataops_daemon``. The connection is opened
+    on the first call and reused until ``close()``; calls are thread-safe.
+
+    Example:
+        >>> with DaemonClient() as client:  # doctest: +SKIP
+        ...     client.versions("team.dataset", "load")
+    """
+
+    def __init__(self, socket_path: str | None = None, timeout: float | None = None):
+        """
+        Args:
+            socket_path (str | None, optional): the daemon socket. Defaults to
+                ``default_socket_path()``.
+            timeout (float | None, optional): seconds to wait for a response.
+                Defaults to None (no timeout).
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self._sock: socket.socket | None = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def connect(self) -> "DaemonClient":
+        """Open the connection.
+
+        Raises:
+            DaemonUnavailable: if no daemon is listening on the socket
+        """
+        with self._lock:
+            if self._sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                try:
+                    sock.connect(self.socket_path)
+                except OSError as e:
+                    sock.close()
+                    raise DaemonUnavailable(
+                        f"No dataops daemon on {self.socket_path}: {e}"
+                    ) from e
+                self._sock = sock
+                self._file = sock.makefile("rwb")
+        return self
+
+    def close(self) -> None:
+        with self._lock:
+            if self._sock is not None:
+                self._file.close()
+                self._sock.close()
+                self._sock = None
+                self._file = None
+
+    def __enter__(self) -> "DaemonClient":
+        return self.connect()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def call(self, method: str, **params) -> Any:
+        """Send one request to the daemon.
+
+        Args:
+            method (str): the daemon method
+            **params: the keyword arguments of the method
+
+        Returns:
+            Any: the result of the method
+
+        Raises:
+            DaemonError: if the request failed in the daemon
+            DaemonUnavailable: if the daemon cannot be reached
+        """
+        self.connect()
+        with self._lock:
+            try:
+                self._file.write(
+                    json.dumps({"method": method, "params": params}).encode() + b"\n"
+                )
+                self._file.flush()
+                line = self._file.readline()
+            except OSError as e:
+                raise DaemonUnavailable(f"Lost the dataops daemon: {e}") from e
+        if not line:
+            raise DaemonUnavailable("The dataops daemon closed the connection.")
+        response = json.loads(line)
+        if "error" in response:
+            raise DaemonError(response["error"]["type"], response["error"]["message"])
+        return response["result"]
+
+    def ping(self) -> dict:
+        """The pid, start time and request count of the daemon."""
+        return self.call("ping")
+
+    def datasets(self) -> list[str]:
+        """The namespaces of all datasets of the catalog."""
+        return self.call("datasets")
+
+    def stages(self, dataset: str) -> list[str]:
+        """The stages of a dataset."""
+        return self.call("stages", dataset=dataset)
+
+    def versions(self, dataset: str, stage: str, refresh: bool = False) -> list[str]:
+        """The versions of a dataset stage, newest first, as listed by
+        ``get_versions()``. Set ``refresh`` to bypass the daemon's cache."""
+        return self.call("versions", dataset=dataset, stage=stage, refresh=refresh)
+
+    def download(self, dataset: str, stage: str, local_path: str, **kwargs) -> dict:
+        """Run ``download_version_to_local()`` of a dataset stage in the
+        daemon and return the fields of its ``DownloadSummary``."""
+        return self.call(
+            "download", dataset=dataset, stage=stage, local_path=local_path, **kwargs
+        )
+
+    def sync(self, dataset: str, local_path: str, **kwargs) -> dict:
+        """Run ``sync_to_local()`` of a dataset in the daemon and return the
+        fields of its ``SyncSummary``."""
+        return self.call("sync", dataset=dataset, local_path=local_path, **kwargs)
+
+    def refresh(self) -> dict:
+        """Drop the daemon's cached versions and re-check the environment."""
+        return self.call("refresh")
+
+    def shutdown(self) -> bool:
+        """Stop the daemon."""
+        return self.call("shutdown")
+
+
+def connect_daemon(socket_path: str | None = None) -> DaemonClient | None:
+    """Connect to a running daemon, if any.
+
+    Args:
+        socket_path (str | None, optional): the daemon socket. Defaults to
+            ``default_socket_path()``.
+
+    Returns:
+        DaemonClient | None: a connected client, or None if no daemon is
+            running or ``DATAOPS_NO_DAEMON`` is set
+    """
+    if os.environ.get(NO_DAEMON_ENV_VAR):
+        return None
+    socket_path = socket_path or default_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        return DaemonClient(socket_path).connect()
+    except DaemonUnavailable:
+        return None
+
+
+def main():
+    """
+    Run the dataops daemon, or report on or stop a running one.
+    """
+    parser = ArgumentParser(
+        description="Serve the data catalog from a long-lived local process on a Unix socket"
+    )
+    parser.add_argument(
+        "--socket",
+        help="Unix socket path (defaults to $DATAOPS_DAEMON_SOCKET or daemon.sock in the cache directory)",
+        default=None,
+    )
+    parser.add_argument(
+        "--ttl",
+        help="seconds to reuse listed versions of a stage (default 60)",
+        type=float,
+        default=60.0,
+    )
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument(
+        "--status", help="report on a running daemon", action="store_true"
+    )
+    action.add_argument("--stop", help="stop a running daemon", action="store_true")
+    args = parser.parse_args()
+    socket_path = args.socket or default_socket_path()
+
+    if args.status or args.stop:
+        try:
+            with DaemonClient(socket_path) as client:
+                info = client.ping()
+                if args.stop:
+                    client.shutdown()
+                    print(f"Stopped the dataops daemon (pid {info['pid']}).")
+                else:
+                    print(
+                        f"dataops daemon running on {socket_path} (pid {info['pid']}): "
+                        f"{info['requests']} requests served, "
+                        f"{info['cached_versions']} cached version listings."
+                    )
+        except DaemonUnavailable:
+            print(f"No dataops daemon running on {socket_path}.")
+            raise SystemExit(1)
+        return
+
+    logging.basicConfig(level=logging.INFO)
+    daemon = DataopsDaemon(socket_path, versions_ttl=args.ttl)
+    # warm the catalog, credentials and environment check before serving
+    catalog = daemon.catalog
+    environment = getattr(catalog, "__environment__", None)
+    if environment is not None and not environment.ext_access:
+        logger.warning(f"No EXT access ({environment.error}).")
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(
+            sig, lambda *_: threading.Thread(target=daemon.stop, daemon=True).start()
+        )
+    print(f"dataops daemon (pid {os.getpid()}) serving on {socket_path}")
+    daemon.serve_forever()
@@ -0,0 +1,292 @@
+"""On-disk cache of HTTP responses, revalidated with conditional requests."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+from .utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+if not logger.handlers:
+    logger.addHandler(logging.NullHandler())
+
+_META_SUFFIX = ".json"
+_BODY_SUFFIX = ".body"
+
+# response headers kept with a cached body
+_STORED_HEADERS = ["content-type", "etag", "last-modified"]
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A response body stored in an ``HTTPCache`` with its validators."""
+
+    key: str
+    url: str
+    content: bytes
+    headers: dict[str, str]
+    stored_at: float
+
+    @property
+    def etag(self) -> str | None:
+        return self.headers.get("etag")
+
+    @property
+    def last_modified(self) -> str | None:
+        return self.headers.get("last-modified")
+
+    def age(self) -> float:
+        """Seconds since the response was stored or last revalidated."""
+        return time.time() - self.stored_at
+
+    def conditional_headers(self) -> dict[str, str]:
+        """The If-None-Match and If-Modified-Since headers revalidating
+        the response."""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """Response bodies of GET requests stored on disk by URL and query
+    parameters.
+
+    Responses younger than ``ttl`` seconds are served without a request.
+    Older ones are revalidated with If-None-Match / If-Modified-Since, so an
+    unchanged response costs a bodiless 304 instead of a download. When the
+    cache grows over ``max_bytes`` the least recently used responses are
+    evicted. The size is scanned once, then kept as a running total of the
+    responses stored, so writes below the bound never list the directory.
+
+    Example:
+        >>> from cfa.dataops.soda import Query  # doctest: +SKIP
+        >>> query = Query("data.cdc.gov", "abc1-2345", cache=HTTPCache(ttl=600))  # doctest: +SKIP
+    """
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        ttl: float = 3600.0,
+        max_bytes: int = 1_000_000_000,
+    ):
+        """
+        Args:
+            directory (str | None, optional): where responses are stored.
+                Defaults to None (``http`` under the cfa.dataops cache).
+            ttl (float, optional): seconds a response is served without
+                revalidation. Defaults to 3600.
+            max_bytes (int, optional): size of stored responses above which
+                the least recently used are evicted. Defaults to 1 GB.
+        """
+        if ttl < 0:
+            raise ValueError("ttl must not be negative.")
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be a positive integer.")
+        self.directory = directory or get_cache_dir("http")
+        os.makedirs(self.directory, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # running total of stored bytes, None until the directory is scanned
+        self._size = None
+
+    @staticmethod
+    def key(url: str, params: Mapping | None = None) -> str:
+        """The cache key of a GET request.
+
+        Args:
+            url (str): the URL, without query string
+            params (Mapping | None, optional): the query parameters
+
+        Returns:
+            str: a hex digest of the URL and the sorted parameters
+        """
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        return hashlib.sha256(json.dumps([url, items]).encode()).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key: str) -> CachedResponse | None:
+        """The stored response of a key, if any.
+
+        Args:
+            key (str): the cache key
+
+        Returns:
+            CachedResponse | None: the response, or None if not stored
+        """
+        try:
+            with open(self._path(key, _META_SUFFIX)) as f:
+                meta = json.load(f)
+            with open(self._path(key, _BODY_SUFFIX), "rb") as f:
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        if len(content) != meta.get("size"):
+            return None
+        try:
+            # the body's access time orders eviction
+            os.utime(self._path(key, _BODY_SUFFIX))
+        except FileNotFoundError:
+            pass
+        return CachedResponse(
+            key=key,
+            url=meta["url"],
+            content=content,
+            headers=meta["headers"],
+            stored_at=meta["stored_at"],
+        )
+
+    def record(self, outcome: str) -> None:
+        """Count a request served from the cache ('hits'), revalidated
+        ('revalidations') or downloaded ('misses')."""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def is_fresh(self, cached: CachedResponse) -> bool:
+        """Whether a response can be served without revalidation."""
+        return cached.age() < self.ttl
+
+    def put(
+        self, key: str, url: str, content: bytes, headers: Mapping[str, str]
+    ) -> None:
+        """Store a response, unless it asks not to be stored, and evict the
+        least recently used responses if the cache is over its size.
+
+        Args:
+            key (str): the cache key
+            url (str): the requested URL
+            content (bytes): the response body
+            headers (Mapping[str, str]): the response headers
+        """
+        if "no-store" in headers.get("cache-control", ""):
+            return
+        meta = {
+            "url": url,
+            "headers": {
+                name: headers[name] for name in _STORED_HEADERS if name in headers
+            },
+            "stored_at": time.time(),
+            "size": len(content),
+        }
+        body = self._path(key, _BODY_SUFFIX)
+        try:
+            replaced = os.path.getsize(body)
+        except OSError:
+            replaced = 0
+        # the body is written first, an entry exists once its metadata does
+        self._write(body, content)
+        self._write(self._path(key, _META_SUFFIX), json.dumps(meta).encode())
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(content) - replaced
+            full = self._size > self.max_bytes
+        if full:
+            self.evict()
+
+    def touch(self, cached: CachedResponse) -> CachedResponse:
+        """Mark a response as revalidated now, after a 304 Not Modified.
+
+        Args:
+            cached (CachedResponse): the revalidated response
+
+        Returns:
+            CachedResponse: the response with its new storage time
+        """
+        path = self._path(cached.key, _META_SUFFIX)
+        try:
+            with open(path) as f:
+                meta = json.load(f)
+            meta["stored_at"] = time.time()
+            self._write(path, json.dumps(meta).encode())
+        except (OSError, ValueError):
+            return cached
+        return CachedResponse(
+            key=cached.key,
+            url=cached.url,
+            content=cached.content,
+            headers=cached.headers,
+            stored_at=meta["stored_at"],
+        )
+
+    def size(self) -> int:
+        """Total bytes of the stored responses."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Delete the least recently used responses until the cache fits in
+        ``max_bytes``.
+
+        Returns:
+            int: the number of responses deleted
+        """
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            evicted = 0
+            for key, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(key)
+                total -= size
+                evicted += 1
+            self._size = total
+        if evicted:
+            logger.info(f"Evicted {evicted} responses from {self.directory}")
+        return evicted
+
+    def clear(self) -> None:
+        """Delete every stored response."""
+        with self._lock:
+            for key, _, _ in self._entries():
+                self._remove(key)
+            self._size = 0
+
+    def _entries(self) -> list[tuple[str, int, float]]:
+        """The key, size and last access time of each stored body."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(_BODY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                key = entry.name.removesuffix(_BODY_SUFFIX)
+                entries.append((key, stat.st_size, max(stat.st_atime, stat.st_mtime)))
+        return entries
+
+    def _remove(self, key: str) -> None:
+        for suffix in [_META_SUFFIX, _BODY_SUFFIX]:
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    def _write(self, path: str, data: bytes) -> None:
+        """Write a file atomically, so readers never see part of it."""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
@@ -0,0 +1,133 @@
+"""A lightweight index of the dataset namespaces and stages of the installed
+catalogs.
+
+The index is built from each catalog's dataset discovery without importing
+``cfa.dataops.catalog`` (and with it pandas, polars and the Azure SDKs), so
+commands that only list datasets or stages start quickly. The stages of each
+config are cached by file size and modification time in the cfa.dataops cache
+directory.
+"""
+
+import json
+import logging
+import os
+import pkgutil
+from collections.abc import Iterator
+from configparser import ConfigParser
+from importlib import import_module
+from typing import NamedTuple
+
+from .utils import get_cache_dir
+
+_here = os.path.abspath(os.path.dirname(__file__))
+_config = ConfigParser()
+_config.read(os.path.join(_here, "config.ini"))
+
+logger = logging.getLogger(__name__)
+
+_INDEX_FILE = "dataset_index.json"
+
+
+class DatasetIndexEntry(NamedTuple):
+    """A dataset of the index."""
+
+    namespace: str
+    config_path: str
+    stages: tuple[str, ...]
+
+
+def get_all_catalogs() -> list:
+    """Get a list of all available dataops catalogs.
+
+    Returns:
+        list[tuple]: A list of catalog names and paths.
+    """
+
+    catalogs = []
+    catalog_nspace = _config.get("DEFAULT", "catalog_namespaces")
+    try:
+        catalog_pkg = import_module(catalog_nspace)
+        for module_finder, modname, ispkg in pkgutil.iter_modules(catalog_pkg.__path__):
+            if ispkg:
+                catalogs.append((catalog_nspace, modname, module_finder.path))
+    except ModuleNotFoundError as e:
+        if e.name != catalog_nspace:
+            raise
+        logger.warning("No catalogs exist in namespace %s", catalog_nspace)
+
+    return catalogs
+
+
+def iter_dataset_configs(ns_map: dict, ns: str = "") -> Iterator[tuple[str, str]]:
+    """Walk a nested dataset namespace map.
+
+    Args:
+        ns_map (dict): the nested map of names to config paths
+        ns (str, optional): the namespace of the map. Defaults to "".
+
+    Yields:
+        tuple[str, str]: the dotted namespace and config path of each dataset
+    """
+    for k, v in ns_map.items():
+        path = f"{ns}.{k}" if ns else k
+        if isinstance(v, str) and v.endswith(".toml"):
+            yield path, v
+        elif isinstance(v, dict):
+            yield from iter_dataset_configs(v, path)
+
+
+def read_config_stages(config_path: str) -> list[str]:
+    """The storage stages of a dataset config (e.g., extract, load, stage_01),
+    in the order they are defined."""
+    import tomli
+
+    with open(config_path, "rb") as f:
+        config = tomli.load(f)
+    return [
+        k
+        for k in config.keys()
+        if k in ["load", "extract", "data"] or k.startswith("stage")
+    ]
+
+
+def _read_cache(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_dataset_index() -> dict[str, DatasetIndexEntry]:
+    """Build the index of all datasets of the installed catalogs.
+
+    Returns:
+        dict[str, DatasetIndexEntry]: the datasets keyed by dotted namespace
+    """
+    cache_path = os.path.join(get_cache_dir(), _INDEX_FILE)
+    cached = _read_cache(cache_path)
+    entries = {}
+    index = {}
+    for cns, cat_name, _ in get_all_catalogs():
+        dataset_mod = import_module(f"{cns}.{cat_name}.datasets")
+        file_stats = getattr(dataset_mod, "dataset_file_stats", {})
+        for ns, config_path in iter_dataset_configs(dataset_mod.dataset_ns_map):
+            file_stat = file_stats.get(config_path)
+            if file_stat is None:
+                st = os.stat(config_path)
+                file_stat = (st.st_size, st.st_mtime_ns)
+            key = list(file_stat)
+            entry = cached.get(config_path)
+            if entry is None or entry["stat"] != key:
+                entry = {"stat": key, "stages": read_config_stages(config_path)}
+            entries[config_path] = entry
+            index[ns] = DatasetIndexEntry(ns, config_path, tuple(entry["stages"]))
+    if entries != cached:
+        try:
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.debug(f"Could not write the dataset index: {e}")
+    return index
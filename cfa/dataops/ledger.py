@@ -0,0 +1,229 @@
+"""Batched, asynchronous writer for the access ledger."""
+
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Literal
+
+from .backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+if not logger.handlers:
+    logger.addHandler(logging.NullHandler())
+
+
+class _Flush:
+    """Queue marker asking the worker to write everything queued before it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class LedgerWriter:
+    """Buffers access ledger entries in memory and appends them to the
+    ledger blobs from a background thread, in batches by count or interval.
+    One append-blob write is made per ledger file per batch.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval: float = 5.0,
+        max_queue: int = 10_000,
+        on_full: Literal["drop", "block"] = "drop",
+    ):
+        """
+        Args:
+            batch_size (int, optional): entries that trigger a write. Defaults to 100.
+            flush_interval (float, optional): maximum seconds an entry waits
+                before being written. Defaults to 5.0.
+            max_queue (int, optional): maximum queued entries. Defaults to 10,000.
+            on_full (Literal["drop", "block"], optional): whether to drop new
+                entries or block the caller when the queue is full. Defaults to "drop".
+        """
+        if on_full not in ["drop", "block"]:
+            raise ValueError("on_full must be 'drop' or 'block'.")
+        if batch_size < 1 or max_queue < 1 or flush_interval <= 0:
+            raise ValueError(
+                "batch_size, max_queue and flush_interval must be positive."
+            )
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_full = on_full
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="dataops-ledger-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, location: dict, entry: dict) -> bool:
+        """Queue a ledger entry for writing.
+
+        Args:
+            location (dict): the ledger location with 'account', 'container'
+                and the blob 'path' of the ledger file to append to, and
+                optionally the storage 'backend' (defaults to Azure blob storage)
+            entry (dict): the JSON serializable ledger entry
+
+        Returns:
+            bool: whether the entry was queued (False if dropped or closed)
+        """
+        if self._closed:
+            return False
+        self._ensure_started()
+        item = (
+            (
+                location["account"],
+                location["container"],
+                location["path"],
+                location.get("backend"),
+            ),
+            json.dumps(entry) + "\n",
+        )
+        try:
+            self._queue.put(item, block=self.on_full == "block")
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Ledger queue full, {self.dropped} entries dropped.")
+            return False
+        return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Write all entries queued so far and wait for completion.
+
+        Args:
+            timeout (float | None, optional): maximum seconds to wait.
+
+        Returns:
+            bool: whether the flush completed within the timeout
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        marker = _Flush()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float | None = 10.0) -> None:
+        """Flush remaining entries and stop the background thread.
+
+        Args:
+            timeout (float | None, optional): maximum seconds to wait. Defaults to 10.0.
+        """
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch = []
+            markers = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = (
+                    None if deadline is None else max(deadline - time.monotonic(), 0)
+                )
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                if isinstance(item, _Flush):
+                    markers.append(item)
+                    break
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.done.set()
+
+    def _write(self, batch: list[tuple[tuple, str]]) -> None:
+        grouped = defaultdict(list)
+        for key, line in batch:
+            grouped[key].append(line)
+        for (account, container, path, backend), lines in grouped.items():
+            try:
+                (backend or get_backend("azure")).put(
+                    account,
+                    container,
+                    path,
+                    "".join(lines).encode("utf-8"),
+                    append=True,
+                    overwrite=False,
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Failed to write {len(lines)} ledger entries to {path}: {e}"
+                )
+
+
+_writers: dict[tuple, LedgerWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_ledger_writer(
+    batch_size: int = 100,
+    flush_interval: float = 5.0,
+    max_queue: int = 10_000,
+    on_full: Literal["drop", "block"] = "drop",
+) -> LedgerWriter:
+    """Get the process-wide ledger writer for the given settings. Writers are
+    flushed and stopped when the interpreter exits.
+
+    Returns:
+        LedgerWriter: the shared ledger writer
+    """
+    key = (batch_size, flush_interval, max_queue, on_full)
+    with _writers_lock:
+        if key not in _writers:
+            _writers[key] = LedgerWriter(
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+                max_queue=max_queue,
+                on_full=on_full,
+            )
+        return _writers[key]
+
+
+def flush_ledger(timeout: float | None = None) -> bool:
+    """Write all queued ledger entries of every ledger writer.
+
+    Args:
+        timeout (float | None, optional): maximum seconds to wait per writer.
+
+    Returns:
+        bool: whether all writers flushed within the timeout
+    """
+    with _writers_lock:
+        writers = list(_writers.values())
+    return all([writer.flush(timeout) for writer in writers])
+
+
+@atexit.register
+def _close_ledger_writers() -> None:
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.close()
@@ -0,0 +1,148 @@
+"""Parquet writer options shared by the blob endpoints and benchmarks."""
+
+from collections.abc import Iterable
+from io import BytesIO
+from typing import TYPE_CHECKING, Any
+
+import pandas as pd
+import polars as pl
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+from .config_validator import ParquetOptionsValidation, ValidationError
+
+
+def resolve_parquet_options(*layers: dict | None) -> ParquetOptionsValidation:
+    """Merge layers of parquet options and validate the result. Later layers
+    take precedence over earlier ones (e.g., catalog defaults, then stage
+    table, then call arguments).
+
+    Args:
+        *layers (dict | None): option mappings, lowest precedence first
+
+    Raises:
+        ValueError: if the merged options are invalid
+
+    Returns:
+        ParquetOptionsValidation: the validated options
+    """
+    merged = {}
+    for layer in layers:
+        if layer:
+            merged.update(layer)
+    try:
+        return ParquetOptionsValidation(**merged)
+    except ValidationError as e:
+        raise ValueError(f"Invalid parquet options {merged}: {e}") from e
+
+
+def pyarrow_parquet_kwargs(options: ParquetOptionsValidation) -> dict[str, Any]:
+    """Translate parquet options to ``pyarrow.parquet.ParquetWriter`` keyword
+    arguments. The row group size is a per write argument and is excluded.
+
+    Args:
+        options (ParquetOptionsValidation): the parquet options
+
+    Returns:
+        dict[str, Any]: keyword arguments for ``ParquetWriter``
+    """
+    kwargs = {
+        "compression": None
+        if options.compression == "uncompressed"
+        else options.compression,
+        "use_dictionary": options.use_dictionary,
+        "write_statistics": options.write_statistics,
+    }
+    if options.compression_level is not None:
+        kwargs["compression_level"] = options.compression_level
+    if options.write_page_index:
+        kwargs["write_page_index"] = True
+    return kwargs
+
+
+def pandas_parquet_kwargs(options: ParquetOptionsValidation) -> dict[str, Any]:
+    """Translate parquet options to ``pd.DataFrame.to_parquet`` keyword
+    arguments (passed through to ``pyarrow.parquet.write_table``).
+
+    Args:
+        options (ParquetOptionsValidation): the parquet options
+
+    Returns:
+        dict[str, Any]: keyword arguments for ``to_parquet``
+    """
+    kwargs = pyarrow_parquet_kwargs(options)
+    if options.row_group_size is not None:
+        kwargs["row_group_size"] = options.row_group_size
+    return kwargs
+
+
+def polars_parquet_kwargs(options: ParquetOptionsValidation) -> dict[str, Any]:
+    """Translate parquet options to ``pl.DataFrame.write_parquet`` keyword
+    arguments. The native polars writer does not expose dictionary or page
+    index toggles, so the pyarrow writer is used when those differ from the
+    defaults.
+
+    Args:
+        options (ParquetOptionsValidation): the parquet options
+
+    Returns:
+        dict[str, Any]: keyword arguments for ``write_parquet``
+    """
+    kwargs = {
+        "compression": options.compression,
+        "compression_level": options.compression_level,
+        "statistics": options.write_statistics,
+        "row_group_size": options.row_group_size,
+    }
+    if not options.use_dictionary or options.write_page_index:
+        kwargs["use_pyarrow"] = True
+        kwargs["pyarrow_options"] = {
+            "use_dictionary": options.use_dictionary,
+            "write_page_index": options.write_page_index,
+        }
+    return kwargs
+
+
+def dataframe_to_parquet_bytes(
+    df: pd.DataFrame | pl.DataFrame, options: ParquetOptionsValidation
+) -> bytes:
+    """Encode a pandas or polars dataframe to parquet bytes.
+
+    Args:
+        df (pd.DataFrame | pl.DataFrame): the dataframe to encode
+        options (ParquetOptionsValidation): the parquet options
+
+    Returns:
+        bytes: the parquet file contents
+    """
+    if isinstance(df, pd.DataFrame):
+        return df.to_parquet(index=False, **pandas_parquet_kwargs(options))
+    buffer = BytesIO()
+    df.write_parquet(buffer, **polars_parquet_kwargs(options))
+    return buffer.getvalue()
+
+
+def record_batches_to_parquet_bytes(
+    batches: Iterable["pa.RecordBatch"],
+    schema: "pa.Schema",
+    options: ParquetOptionsValidation,
+) -> bytes:
+    """Incrementally encode record batches into a single parquet file. Only
+    the encoded output and the current batch are held in memory.
+
+    Args:
+        batches (Iterable[pa.RecordBatch]): the batches to encode
+        schema (pa.Schema): the schema shared by all batches
+        options (ParquetOptionsValidation): the parquet options
+
+    Returns:
+        bytes: the parquet file contents
+    """
+    import pyarrow.parquet as pq
+
+    buffer = BytesIO()
+    with pq.ParquetWriter(buffer, schema, **pyarrow_parquet_kwargs(options)) as writer:
+        for batch in batches:
+            writer.write_batch(batch, row_group_size=options.row_group_size)
+    return buffer.getvalue()
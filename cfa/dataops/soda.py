@@ -1,16 +1,417 @@
+import asyncio
+import codecs
+import copy
+import csv
+import json
+import os
+import queue
+import random
+import re
+import tempfile
+import threading
+import time
 import warnings
-from collections.abc import Iterator, Sequence
-from typing import Any
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import date, datetime
+from importlib.util import find_spec
+from io import BufferedReader, BytesIO, RawIOBase
+from itertools import chain
+from typing import TYPE_CHECKING, Any, TypeVar
 from urllib.parse import urlunparse
 
 import httpx
 
+from .http_cache import CachedResponse, HTTPCache
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import polars as pl
+    import pyarrow as pa
+
+    from .catalog import BlobEndpoint
+
+T = TypeVar("T")
+
+# HTTP/2 needs the optional h2 package (pip install "cfa.dataops[http2]")
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+# responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRY_DELAY = 60.0
+
+# arrow types of Socrata column types (dataTypeName); other types, such as
+# text, url and geometries, are read as strings
+SOCRATA_ARROW_TYPES = {
+    "number": "float64",
+    "double": "float64",
+    "money": "float64",
+    "percent": "float64",
+    "checkbox": "bool",
+    "calendar_date": "timestamp[ms]",
+    "floating_timestamp": "timestamp[ms]",
+    "date": "timestamp[ms]",
+    "fixed_timestamp": "timestamp[ms, tz=UTC]",
+}
+
+
+# marks the end of the items passed between to_endpoint stages
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    """Rows handled by one stage of ``Query.to_endpoint`` and the seconds it
+    spent working on them, excluding time spent waiting on other stages."""
+
+    stage: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else float("inf")
+
+
+@dataclass(frozen=True)
+class ExtractSummary:
+    """Result of streaming a query into a blob endpoint."""
+
+    version: str | None
+    files: list[str]
+    rows: int
+    seconds: float
+    stages: list[StageTiming]
+    watermark: str | float | None = None
+
+
+def _watermark_value(value: Any) -> str | float | None:
+    """A column maximum as stored in a watermark: numbers as they are, and
+    timestamps in the floating timestamp format of Socrata."""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None).isoformat(timespec="milliseconds")
+    if isinstance(value, date):
+        return f"{value.isoformat()}T00:00:00.000"
+    return value
+
+
+def _soql_literal(value: str | float) -> str:
+    if isinstance(value, int | float):
+        return repr(value)
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
+def _cached_response(cached: CachedResponse) -> httpx.Response:
+    return httpx.Response(
+        200,
+        content=cached.content,
+        headers=cached.headers,
+        request=httpx.Request("GET", cached.url),
+    )
+
+
+class _JSONArrayParser:
+    """Incremental parser of a JSON array arriving in chunks. Each call
+    returns the elements completed so far, so a response body is never held
+    whole, neither as bytes nor as text."""
+
+    _decoder = json.JSONDecoder()
+    _whitespace = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        # start, first (after "["), item (after ","), next (after items), end
+        self._state = "start"
+
+    def feed(self, chunk: bytes) -> list:
+        self._buffer += self._utf8.decode(chunk)
+        return self._parse(final=False)
+
+    def close(self) -> list:
+        self._buffer += self._utf8.decode(b"", final=True)
+        items = self._parse(final=True)
+        if self._state != "end":
+            raise ValueError("The response ended before its JSON array did.")
+        return items
+
+    def _parse(self, final: bool) -> list:
+        items = []
+        buffer, pos = self._buffer, 0
+        while True:
+            pos = self._whitespace.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if self._state == "start" and char == "[":
+                self._state = "first"
+            elif self._state in ["first", "next"] and char == "]":
+                self._state = "end"
+            elif self._state == "next" and char == ",":
+                self._state = "item"
+            elif self._state in ["first", "item"]:
+                parsed, end = self._parse_items(buffer, pos, final)
+                if not parsed:
+                    break
+                items.extend(parsed)
+                self._state = "next"
+                pos = end
+                continue
+            else:
+                raise ValueError(
+                    f"Expected a JSON array of records, got {buffer[pos : pos + 20]!r}"
+                )
+            pos += 1
+        self._buffer = buffer[pos:]
+        return items
+
+    def _parse_items(self, buffer: str, pos: int, final: bool) -> tuple[list, int]:
+        """The complete elements from ``pos`` and the position after them.
+
+        Records are parsed together up to the last ``}`` that ends one, in
+        one ``json.loads`` call that shares key strings between them. A
+        ``}`` inside a string or a nested object leaves brackets or a string
+        open, so a wrong guess fails to parse and an earlier one is tried.
+        """
+        end = len(buffer)
+        for _ in range(3):
+            cut = buffer.rfind("}", pos, end)
+            if cut < 0:
+                break
+            try:
+                return json.loads("[" + buffer[pos : cut + 1] + "]"), cut + 1
+            except json.JSONDecodeError:
+                end = cut
+        try:
+            item, end = self._decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return [], pos
+        # a number at the end of the buffer may go on in the next chunk
+        if end == len(buffer) and not final:
+            return [], pos
+        return [item], end
+
+
+def _parse_json_array(chunks: Iterator[bytes]) -> list:
+    parser = _JSONArrayParser()
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    return items
+
+
+class _ChunkReader(RawIOBase):
+    """A readable file over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._pending:
+            self._pending = next(self._chunks, None)
+            if self._pending is None:
+                self._pending = b""
+                return 0
+        n = min(len(b), len(self._pending))
+        b[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def _read_csv_stream(
+    chunks: Iterator[bytes], column_types: "dict[str, pa.DataType]"
+) -> "pa.Table":
+    """Parse a CSV body into an arrow table block by block as it arrives, so
+    only the record batches and a block of text are held, never the whole
+    body. Columns not in ``column_types`` are read as strings."""
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if b"\n" in head:
+            break
+    header = next(csv.reader([head.split(b"\n", 1)[0].decode()]), [])
+    convert_options = pa_csv.ConvertOptions(
+        column_types={name: column_types.get(name, pa.string()) for name in header},
+        strings_can_be_null=True,
+        true_values=["true"],
+        false_values=["false"],
+        timestamp_parsers=[pa_csv.ISO8601],
+    )
+    reader = pa_csv.open_csv(
+        BufferedReader(_ChunkReader(chain([head], chunks))),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=convert_options,
+    )
+    return reader.read_all()
+
+
+class _Checkpoint:
+    """Pages of a download saved to a work directory, with a manifest of the
+    completed pages, so a failed download resumes after the last of them.
+    The manifest records the query so a directory is not reused for
+    another one."""
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: str, query: dict):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        query = json.loads(json.dumps(query, default=str))
+        path = os.path.join(directory, self.MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+            if self.manifest["query"] != query:
+                raise ValueError(
+                    f"Checkpoint {directory} is of another query, remove it or "
+                    "use another directory."
+                )
+        else:
+            self.manifest = {"query": query, "pages": [], "complete": False}
+            self._save_manifest()
+
+    @property
+    def pages(self) -> list[dict]:
+        return self.manifest["pages"]
+
+    @property
+    def complete(self) -> bool:
+        return self.manifest["complete"]
+
+    def read(self, page: dict) -> bytes:
+        with open(os.path.join(self.directory, page["file"]), "rb") as f:
+            return f.read()
+
+    def add(self, data: bytes, ext: str, **info) -> None:
+        """Save a page, then record it in the manifest."""
+        name = f"page_{len(self.pages):05d}.{ext}"
+        _write_atomic(os.path.join(self.directory, name), data)
+        self.pages.append({"file": name, **info})
+        self._save_manifest()
+
+    def update(self, **info) -> None:
+        self.manifest.update(info)
+        self._save_manifest()
+
+    def _save_manifest(self) -> None:
+        _write_atomic(
+            os.path.join(self.directory, self.MANIFEST),
+            json.dumps(self.manifest).encode("utf-8"),
+        )
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Put an item on a bounded queue unless the pipeline has stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _remove_parts(endpoint: "BlobEndpoint", files: list[str]) -> None:
+    """Delete the parts a failed extract already wrote to an endpoint."""
+    for path in files:
+        try:
+            endpoint.backend.delete(
+                endpoint.account, endpoint.container, f"{endpoint.prefix}/{path}"
+            )
+        except Exception as e:
+            warnings.warn(f"Could not remove part {path} of a failed extract: {e}")
+
+
+def _drain(q: queue.Queue, stop: threading.Event, waited: list[float]) -> Iterator:
+    """Yield items from a queue until the end marker or the pipeline stops,
+    adding the time spent waiting for them to ``waited[0]``."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            item = q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        finally:
+            waited[0] += time.perf_counter() - start
+        if item is _DONE or stop.is_set():
+            return
+        yield item
+
 
 def _int_divide_ceiling(a: int, b: int) -> int:
     return -(a // -b)
 
 
-class Query:
+def _client_options(
+    timeout: float | httpx.Timeout | None,
+    max_connections: int,
+    http2: bool | None,
+) -> dict:
+    if http2 is None:
+        http2 = HTTP2_AVAILABLE
+    return {
+        "timeout": DEFAULT_TIMEOUT if timeout is None else timeout,
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        "http2": http2,
+    }
+
+
+def _arrow_type(dtype: "str | pa.DataType") -> "pa.DataType":
+    import pyarrow as pa
+
+    if not isinstance(dtype, str):
+        return dtype
+    if dtype.startswith("timestamp[") and ", tz=" in dtype:
+        unit, tz = dtype.removeprefix("timestamp[").removesuffix("]").split(", tz=")
+        return pa.timestamp(unit, tz=tz)
+    return pa.type_for_alias(dtype)
+
+
+def _retry_delay(
+    attempt: int, backoff: float, response: httpx.Response | None = None
+) -> float:
+    """Seconds to wait before retrying: the server's Retry-After if given,
+    else exponential backoff with jitter."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after is not None:
+        try:
+            return min(max(0.0, float(retry_after)), MAX_RETRY_DELAY)
+        except ValueError:
+            pass  # an HTTP date, fall back to backoff
+    delay = min(backoff * 2**attempt, MAX_RETRY_DELAY)
+    return delay * (0.5 + random.random() / 2)
+
+
+class _BaseQuery:
     def __init__(
         self,
         domain: str,
@@ -22,7 +423,31 @@ class Query:
         offset: int = 0,
         app_token: str | None = None,
         verbose=True,
+        client: httpx.Client | httpx.AsyncClient | None = None,
+        timeout: float | httpx.Timeout | None = None,
+        max_connections: int = 10,
+        http2: bool | None = None,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        cache: HTTPCache | bool | None = None,
     ):
+        """A SoQL query of a Socrata dataset.
+
+        Requests share one keep-alive connection pool: ``client`` if given
+        (left open for its owner to close), else a client created on first
+        use and closed by ``close()`` or on leaving a ``with`` block.
+        ``timeout``, ``max_connections`` and ``http2`` (defaults to whether
+        the h2 package is installed) configure the created client.
+
+        Rate limited (429) and transient server error (5xx) responses and
+        connection errors are retried up to ``max_retries`` times, waiting
+        for the server's Retry-After or an exponential ``backoff`` (seconds).
+
+        With a ``cache`` (``True`` for an ``HTTPCache`` with its defaults),
+        responses are stored on disk and repeated requests are served from
+        it, revalidated with If-None-Match / If-Modified-Since once older
+        than its ttl.
+        """
         self.domain = domain
         self.id = id
         self.select = select
@@ -32,62 +457,71 @@ class Query:
         self.app_token = app_token
         self.verbose = verbose
         self.clauses = clauses
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._client = client
+        self._owns_client = client is None
+        self._client_options = _client_options(timeout, max_connections, http2)
+        self.cache = HTTPCache() if cache is True else cache or None
 
-    def get_all(self) -> list[dict]:
-        if self.verbose:
-            print(f"Downloading dataset {self.domain} {self.id}: {self.n_rows} rows")
-
-        if self.clauses is None:
-            self.clauses = self._build_payload(
-                select=self.select,
-                where=self.where,
-                limit=self.limit,
-                offset=self.offset,
-            )
-
-        result = self._get_request(
-            self.url,
-            params=self.clauses,
-            app_token=self.app_token,
-        )
-
-        if self.verbose:
-            print(f"  Downloaded {len(result)} rows")
+    @classmethod
+    def _build_payload(
+        cls,
+        select: str | Sequence[str] | None = None,
+        where: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> dict:
+        clauses = {}
 
-        return result
+        if select is None:
+            pass
+        elif isinstance(select, str):
+            clauses["$select"] = select
+        else:
+            clauses["$select"] = ",".join(select)
 
-    def get_pages(self, page_size: int = 10_000) -> Iterator[list[dict]]:
-        row_count = self.n_rows
-        n_pages = _int_divide_ceiling(row_count, page_size)
+        if where is not None:
+            clauses["$where"] = where
 
-        if self.verbose:
-            print(
-                f"Downloading dataset {self.domain} {self.id}: "
-                f"{row_count} rows in {n_pages} page(s) of at most "
-                f"{page_size} rows each..."
-            )
+        if limit is not None:
+            assert isinstance(limit, int)
+            assert limit > 0
+            clauses["$limit"] = limit
 
-        for i in range(n_pages):
-            if self.verbose:
-                print(f"  Downloading page {i + 1}/{n_pages}")
+        assert isinstance(offset, int)
+        assert offset >= 0
+        clauses["$offset"] = offset
 
-            start = i * page_size
-            end = (i + 1) * page_size - 1
-            page = self._get_records(start=start, end=end)
+        return clauses
 
-            assert len(page) > 0
-            assert len(page) <= page_size
+    @property
+    def url(self) -> str:
+        return urlunparse(
+            ("https", self.domain, f"resource/{self.id}.json", "", "", "")
+        )
 
-            yield page
+    @property
+    def csv_url(self) -> str:
+        return urlunparse(("https", self.domain, f"resource/{self.id}.csv", "", "", ""))
 
     @property
-    def n_rows(self) -> int:
-        result = self._get_request(
-            self.url,
-            params=self._build_payload(select="count(:id)", where=self.where, limit=1),
-            app_token=self.app_token,
+    def metadata_url(self) -> str:
+        return urlunparse(
+            ("https", self.domain, f"api/views/{self.id}.json", "", "", "")
         )
 
+    @property
+    def _headers(self) -> dict:
+        headers = {}
+        if self.app_token is not None:
+            headers["X-App-Token"] = self.app_token
+        return headers
+
+    def _count_params(self) -> dict:
+        return self._build_payload(select="count(:id)", where=self.where, limit=1)
+
+    def _rows_from_count(self, result: list[dict]) -> int:
         assert len(result) == 1, f"Expected length 1, got {len(result)}"
         assert "count_id" in result[0]
         n_dataset_rows = int(result[0]["count_id"])
@@ -113,75 +547,1011 @@ class Query:
         if self.limit is None or self.limit > n_rows_after_offset:
             return n_rows_after_offset
         else:
-            return n_rows_after_offset - self.limit
+            return self.limit
 
-    def _get_records(self, start: int, end: int) -> list[dict]:
+    def _records_params(self, start: int, end: int) -> dict:
         assert end >= start
         assert self.limit is None or end < self.limit, (
             f"End index {end} is larger than limit {self.limit}."
         )
         n_rows = end - start + 1
 
-        return self._get_request(
-            self.url,
-            params=self._build_payload(
+        return self._build_payload(
+            select=self.select,
+            where=self.where,
+            offset=self.offset + start,
+            limit=n_rows,
+        )
+
+    def _all_params(self) -> dict:
+        if self.clauses is None:
+            self.clauses = self._build_payload(
                 select=self.select,
                 where=self.where,
-                offset=self.offset + start,
-                limit=n_rows,
-            ),
-            app_token=self.app_token,
-        )
+                limit=self.limit,
+                offset=self.offset,
+            )
+        return self.clauses
 
-    @classmethod
-    def _build_payload(
-        cls,
-        select: str | Sequence[str] | None = None,
-        where: str | None = None,
-        limit: int | None = None,
-        offset: int = 0,
+    def _page_bounds(self, row_count: int, page_size: int) -> list[tuple[int, int]]:
+        n_pages = _int_divide_ceiling(row_count, page_size)
+
+        if self.verbose:
+            print(
+                f"Downloading dataset {self.domain} {self.id}: "
+                f"{row_count} rows in {n_pages} page(s) of at most "
+                f"{page_size} rows each..."
+            )
+
+        return [
+            (i * page_size, min((i + 1) * page_size, row_count) - 1)
+            for i in range(n_pages)
+        ]
+
+    def _keyset_select(self) -> tuple[str, bool]:
+        """The select clause of keyset pages, which must include :id, and
+        whether :id is to be dropped from the rows (not selected by the user)."""
+        if self.select is None:
+            return ":id,*", True
+        columns = [self.select] if isinstance(self.select, str) else list(self.select)
+        if ":id" in ",".join(columns).replace(" ", "").split(","):
+            return ",".join(columns), False
+        return ",".join([":id", *columns]), True
+
+    def _keyset_params(
+        self, select: str, last_id: str | None, page_size: int, n_rows: int
     ) -> dict:
-        clauses = {}
+        where = self.where
+        if last_id is not None:
+            after = ":id > '{}'".format(last_id.replace("'", "''"))
+            where = after if where is None else f"({where}) AND {after}"
+        params = self._build_payload(
+            select=select,
+            where=where,
+            limit=page_size
+            if self.limit is None
+            else min(page_size, self.limit - n_rows),
+            offset=self.offset if last_id is None else 0,
+        )
+        params["$order"] = ":id"
+        return params
 
-        if select is None:
-            pass
-        elif isinstance(select, str):
-            clauses["$select"] = select
+    def _keyset_done(self, page: list[dict], page_size: int, n_rows: int) -> bool:
+        return len(page) < page_size or (
+            self.limit is not None and n_rows >= self.limit
+        )
+
+    def _should_retry(self, attempt: int, response: httpx.Response) -> bool:
+        return response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries
+
+    def _cache_lookup(
+        self, url: str, params: dict | None
+    ) -> tuple[str | None, CachedResponse | None]:
+        """The cache key of a request and its stored response, if any."""
+        if self.cache is None:
+            return None, None
+        key = self.cache.key(url, params)
+        return key, self.cache.get(key)
+
+    def _cache_store(
+        self, key: str | None, cached: CachedResponse | None, r: httpx.Response
+    ) -> httpx.Response:
+        """Serve a 304 from the cache, or store a fresh response."""
+        if self.cache is None:
+            return r
+        if r.status_code == 304 and cached is not None:
+            self.cache.record("revalidations")
+            return _cached_response(self.cache.touch(cached))
+        self.cache.record("misses")
+        self.cache.put(key, str(r.url.copy_with(query=None)), r.content, r.headers)
+        return r
+
+
+class Query(_BaseQuery):
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(**self._client_options)
+            self._owns_client = True
+        return self._client
+
+    def close(self) -> None:
+        if self._owns_client and self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def __enter__(self) -> "Query":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get_all(self) -> list[dict]:
+        if self.verbose:
+            print(f"Downloading dataset {self.domain} {self.id}: {self.n_rows} rows")
+
+        result = self._get_rows(self.url, params=self._all_params())
+
+        if self.verbose:
+            print(f"  Downloaded {len(result)} rows")
+
+        return result
+
+    def get_pages(
+        self, page_size: int = 10_000, checkpoint_dir: str | None = None
+    ) -> Iterator[list[dict]]:
+        """Page through the query with ``$offset``.
+
+        With a ``checkpoint_dir``, each page is saved there as it is
+        downloaded, and a later call with the same query and directory
+        yields the saved pages and resumes from the first missing one
+        (with the row count of the first call, so pages stay aligned).
+        """
+        checkpoint = None
+        if checkpoint_dir is not None:
+            checkpoint = _Checkpoint(
+                checkpoint_dir,
+                {
+                    "pages": self.url,
+                    "select": self.select,
+                    "where": self.where,
+                    "limit": self.limit,
+                    "offset": self.offset,
+                    "page_size": page_size,
+                },
+            )
+            if "n_rows" not in checkpoint.manifest:
+                checkpoint.update(n_rows=self.n_rows)
+            n_rows = checkpoint.manifest["n_rows"]
         else:
-            clauses["$select"] = ",".join(select)
+            n_rows = self.n_rows
+        pages = self._page_bounds(n_rows, page_size)
 
-        if where is not None:
-            clauses["$where"] = where
+        for i, (start, end) in enumerate(pages):
+            if checkpoint is not None and i < len(checkpoint.pages):
+                yield json.loads(checkpoint.read(checkpoint.pages[i]))
+                continue
 
-        if limit is not None:
-            assert isinstance(limit, int)
-            assert limit > 0
-            clauses["$limit"] = limit
+            if self.verbose:
+                print(f"  Downloading page {i + 1}/{len(pages)}")
 
-        assert isinstance(offset, int)
-        assert offset >= 0
-        clauses["$offset"] = offset
+            page = self._get_records(start=start, end=end)
 
-        return clauses
+            assert len(page) > 0
+            assert len(page) <= page_size
+
+            if checkpoint is not None:
+                checkpoint.add(json.dumps(page).encode("utf-8"), "json")
+
+            yield page
+        if checkpoint is not None and not checkpoint.complete:
+            checkpoint.update(complete=True)
+
+    def get_pages_keyset(
+        self, page_size: int = 10_000, count_rows: bool = False
+    ) -> Iterator[list[dict]]:
+        """Page through the query ordered by ``:id``, asking for the rows after
+        the last ``:id`` seen instead of an ``$offset``. Each page costs the
+        same however deep it is, pages cannot overlap or skip rows, and no
+        count query is needed; ``count_rows`` runs one anyway to report
+        progress."""
+        total = self.n_rows if count_rows else None
+        if self.verbose:
+            print(
+                f"Downloading dataset {self.domain} {self.id}"
+                + (f": {total} rows" if total is not None else "")
+                + f" in pages of at most {page_size} rows..."
+            )
+
+        select, drop_id = self._keyset_select()
+        last_id = None
+        n_rows = 0
+        while True:
+            page = self._get_rows(
+                self.url,
+                params=self._keyset_params(select, last_id, page_size, n_rows),
+            )
+            if not page:
+                return
+            n_rows += len(page)
+            last_id = page[-1][":id"]
+            if drop_id:
+                for row in page:
+                    del row[":id"]
+
+            if self.verbose:
+                print(
+                    f"  Downloaded {n_rows}" + (f"/{total}" if total else "") + " rows"
+                )
+
+            yield page
+
+            if self._keyset_done(page, page_size, n_rows):
+                return
+
+    def get_pages_concurrent(
+        self, page_size: int = 10_000, max_in_flight: int = 8
+    ) -> Iterator[list[dict]]:
+        """Like ``get_pages``, but with up to ``max_in_flight`` page requests
+        running at once on the shared client. Pages are yielded in order, and
+        at most ``max_in_flight`` pages are held in memory."""
+        assert max_in_flight > 0
+        pages = deque(self._page_bounds(self.n_rows, page_size))
+        n_pages = len(pages)
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            try:
+                for i in range(n_pages):
+                    while pages and len(in_flight) < max_in_flight:
+                        start, end = pages.popleft()
+                        in_flight.append(
+                            executor.submit(self._get_records, start=start, end=end)
+                        )
+                    page = in_flight.popleft().result()
+
+                    if self.verbose:
+                        print(f"  Downloaded page {i + 1}/{n_pages}")
+
+                    assert len(page) > 0
+                    assert len(page) <= page_size
+
+                    yield page
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+    def get_column_types(self) -> dict[str, str]:
+        """The Socrata data type (e.g. text, number, calendar_date) of each
+        column of the dataset, by field name, from the dataset metadata."""
+        metadata = self._get_request(self.metadata_url, app_token=self.app_token)
+        return {
+            column["fieldName"]: column["dataTypeName"]
+            for column in metadata.get("columns", [])
+        }
+
+    def to_arrow(
+        self,
+        page_size: int = 50_000,
+        dtypes: "dict[str, str | pa.DataType] | None" = None,
+        checkpoint_dir: str | None = None,
+    ) -> "pa.Table":
+        """Download the query as CSV pages (in ``:id`` keyset order) parsed
+        into an arrow table as they stream in, without building a dict per
+        row or holding the text of a whole page.
+
+        Column types come from the Socrata metadata of the dataset (see
+        ``SOCRATA_ARROW_TYPES``) and columns it does not describe, such as
+        computed selects, are read as strings.
+
+        Args:
+            page_size (int, optional): rows per request. Defaults to 50,000.
+            dtypes (dict[str, str | pa.DataType] | None, optional): arrow types
+                (or aliases such as "int64") overriding the type of columns.
+                Defaults to None.
+            checkpoint_dir (str | None, optional): a work directory pages are
+                saved to as they are downloaded, so that calling again with
+                the same query and directory after a failure resumes after
+                the last saved page. Defaults to None.
+
+        Returns:
+            pa.Table: the rows of the query
+        """
+        import pyarrow as pa
+
+        tables = []
+        for page in self._iter_arrow_pages(
+            page_size=page_size, dtypes=dtypes, checkpoint_dir=checkpoint_dir
+        ):
+            if page.num_rows or not tables:
+                tables.append(page)
+        return pa.concat_tables(tables)
+
+    def _iter_arrow_pages(
+        self,
+        page_size: int = 50_000,
+        dtypes: "dict[str, str | pa.DataType] | None" = None,
+        checkpoint_dir: str | None = None,
+    ) -> "Iterator[pa.Table]":
+        """Yield the CSV pages of ``to_arrow`` as arrow tables. The first
+        page is yielded even when empty so the schema is always known.
+
+        With a ``checkpoint_dir``, pages are saved there as parquet and a
+        later call with the same query yields them and resumes after the
+        last ``:id`` saved."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        last_id = None
+        n_rows = 0
+        checkpoint = None
+        if checkpoint_dir is not None:
+            checkpoint = _Checkpoint(
+                checkpoint_dir,
+                {
+                    "arrow": self.csv_url,
+                    "select": self.select,
+                    "where": self.where,
+                    "limit": self.limit,
+                    "offset": self.offset,
+                    "page_size": page_size,
+                    "dtypes": dtypes,
+                },
+            )
+            for saved in checkpoint.pages:
+                n_rows += saved["rows"]
+                last_id = saved["last_id"] or last_id
+                yield pq.read_table(BytesIO(checkpoint.read(saved)))
+            if checkpoint.complete:
+                return
+            if checkpoint.pages and self.verbose:
+                print(f"  Resuming after {n_rows} saved rows")
+
+        column_types = {
+            name: _arrow_type(SOCRATA_ARROW_TYPES.get(socrata_type, "string"))
+            for name, socrata_type in self.get_column_types().items()
+        }
+        column_types.update(
+            {name: _arrow_type(dtype) for name, dtype in (dtypes or {}).items()}
+        )
+        # Socrata dates are timestamps in CSV, read them as such and cast
+        read_types = {
+            name: pa.timestamp("ms") if pa.types.is_date(dtype) else dtype
+            for name, dtype in column_types.items()
+        }
+        select, drop_id = self._keyset_select()
+
+        while True:
+            page = self._stream(
+                self.csv_url,
+                params=self._keyset_params(select, last_id, page_size, n_rows),
+                parse=lambda chunks: _read_csv_stream(chunks, read_types),
+            )
+            page = page.cast(
+                pa.schema(
+                    [
+                        (field.name, column_types.get(field.name, field.type))
+                        for field in page.schema
+                    ]
+                )
+            )
+            page_last_id = None
+            if page.num_rows:
+                n_rows += page.num_rows
+                last_id = page_last_id = page.column(":id")[-1].as_py()
+            if drop_id:
+                page = page.drop_columns([":id"])
+            done = self._keyset_done(page, page_size, n_rows)
+
+            if self.verbose:
+                print(f"  Downloaded {n_rows} rows")
+
+            if checkpoint is not None:
+                buffer = BytesIO()
+                pq.write_table(page, buffer)
+                checkpoint.add(
+                    buffer.getvalue(),
+                    "parquet",
+                    rows=page.num_rows,
+                    last_id=page_last_id,
+                )
+                if done:
+                    checkpoint.update(complete=True)
+
+            yield page
+
+            if done:
+                return
+
+    def to_endpoint(
+        self,
+        endpoint: "BlobEndpoint",
+        path_after_prefix: str = "data",
+        file_format: str = "parquet",
+        rows_per_file: int = 1_000_000,
+        page_size: int = 50_000,
+        dtypes: "dict[str, str | pa.DataType] | None" = None,
+        parquet_options: dict | None = None,
+        auto_version: bool = True,
+        max_queued: int = 2,
+        watermark: str | None = None,
+        checkpoint_dir: str | None = None,
+        write_empty: bool = True,
+    ) -> ExtractSummary:
+        """Stream the query into part files ({name}_{part:05d}.{ext}) of at
+        most ``rows_per_file`` rows under one version of a blob endpoint,
+        without collecting it in memory first.
+
+        Downloading CSV pages, encoding parts and uploading them run as three
+        overlapping stages joined by queues of at most ``max_queued`` items,
+        so memory stays bounded by a few pages and parts whatever the size of
+        the query. If any stage fails, the parts already uploaded are deleted
+        so no partial version is left behind.
+
+        Args:
+            endpoint (BlobEndpoint): the endpoint to write to
+            path_after_prefix (str, optional): name of the part files after
+                the prefix (and version). Defaults to "data".
+            file_format (str, optional): 'parquet', 'csv', 'json' or 'jsonl'.
+                Defaults to "parquet".
+            rows_per_file (int, optional): maximum rows per part file.
+                Defaults to 1,000,000.
+            page_size (int, optional): rows per request. Defaults to 50,000.
+            dtypes (dict[str, str | pa.DataType] | None, optional): arrow types
+                overriding the type of columns, as in ``to_arrow``. Defaults
+                to None.
+            parquet_options (dict | None, optional): parquet writer options
+                overriding the endpoint defaults. Defaults to None.
+            auto_version (bool, optional): whether to write under a new
+                timestamp version. Defaults to True.
+            max_queued (int, optional): pages or parts waiting between
+                stages. Defaults to 2.
+            watermark (str | None, optional): a column whose maximum is
+                returned as the watermark of the summary. Defaults to None.
+            checkpoint_dir (str | None, optional): a work directory downloaded
+                pages are saved to, as in ``to_arrow``. Defaults to None.
+            write_empty (bool, optional): whether a query without rows writes
+                one empty part, so the version exists. Defaults to True.
+
+        Returns:
+            ExtractSummary: the version and files written, with the rows per
+                second of each stage
+        """
+        import pyarrow.compute as pc
+
+        from .catalog import _encode_record_batches, _split_record_batches
+        from .parquet import resolve_parquet_options
+        from .utils import get_timestamp
+
+        if file_format not in ["parquet", "csv", "json", "jsonl"]:
+            raise ValueError(
+                f"File format {file_format} not supported. Use 'parquet', 'csv', 'json', or 'jsonl'."
+            )
+        if rows_per_file < 1:
+            raise ValueError("rows_per_file must be a positive integer.")
+        assert max_queued > 0
+        pq_options = (
+            resolve_parquet_options(endpoint.parquet_options, parquet_options)
+            if file_format == "parquet"
+            else None
+        )
+        ext = "jsonl" if file_format in ["json", "jsonl"] else file_format
+        stem = path_after_prefix.lstrip("/").removesuffix(f".{ext}")
+        version = get_timestamp() if auto_version else None
+        if version is not None:
+            stem = f"{version}/{stem}"
+
+        stop = threading.Event()
+        pages = queue.Queue(maxsize=max_queued)
+        parts = queue.Queue(maxsize=max_queued)
+        timings = {}
+        highest = None
+
+        def download() -> None:
+            rows, waited, start = 0, 0.0, time.perf_counter()
+            try:
+                for page in self._iter_arrow_pages(
+                    page_size=page_size, dtypes=dtypes, checkpoint_dir=checkpoint_dir
+                ):
+                    rows += page.num_rows
+                    put_start = time.perf_counter()
+                    if not _put(pages, page, stop):
+                        return
+                    waited += time.perf_counter() - put_start
+                _put(pages, _DONE, stop)
+            except BaseException:
+                stop.set()
+                raise
+            finally:
+                timings["download"] = (rows, time.perf_counter() - start - waited)
+
+        def encode() -> None:
+            rows, waited, start = 0, [0.0], time.perf_counter()
+            schema = None
+
+            def batches() -> "Iterator[pa.RecordBatch]":
+                nonlocal schema, highest
+                for page in _drain(pages, stop, waited):
+                    if schema is None:
+                        schema = page.schema
+                    if watermark is not None and page.num_rows:
+                        value = pc.max(page.column(watermark)).as_py()
+                        if value is not None and (highest is None or value > highest):
+                            highest = value
+                    yield from page.to_batches()
+
+            try:
+                n_parts = 0
+                for part in _split_record_batches(batches(), rows_per_file):
+                    part = list(part)
+                    n_rows = sum(batch.num_rows for batch in part)
+                    data = _encode_record_batches(
+                        iter(part), schema, file_format, pq_options
+                    )
+                    rows += n_rows
+                    put_start = time.perf_counter()
+                    path = f"{stem}_{str(n_parts).zfill(5)}.{ext}"
+                    if not _put(parts, (path, data, n_rows), stop):
+                        return
+                    waited[0] += time.perf_counter() - put_start
+                    n_parts += 1
+                if stop.is_set():
+                    return
+                if n_parts == 0 and schema is not None and write_empty:
+                    # an empty query still writes one empty part so the
+                    # version exists
+                    data = _encode_record_batches(
+                        iter(()), schema, file_format, pq_options
+                    )
+                    _put(parts, (f"{stem}_{str(0).zfill(5)}.{ext}", data, 0), stop)
+                _put(parts, _DONE, stop)
+            except BaseException:
+                stop.set()
+                raise
+            finally:
+                timings["encode"] = (rows, time.perf_counter() - start - waited[0])
+
+        files = []
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                stages = [executor.submit(download), executor.submit(encode)]
+                rows, waited = 0, [0.0]
+                try:
+                    for path, data, n_rows in _drain(parts, stop, waited):
+                        endpoint.write_blob(data, path_after_prefix=path)
+                        files.append(path)
+                        rows += n_rows
+                except BaseException:
+                    stop.set()
+                    raise
+                finally:
+                    timings["upload"] = (
+                        rows,
+                        time.perf_counter() - start - waited[0],
+                    )
+                for stage in stages:
+                    stage.result()
+        except BaseException:
+            _remove_parts(endpoint, files)
+            raise
+        seconds = time.perf_counter() - start
+
+        summary = ExtractSummary(
+            version=version,
+            files=files,
+            rows=rows,
+            seconds=seconds,
+            stages=[
+                StageTiming(stage, *timings[stage])
+                for stage in ["download", "encode", "upload"]
+            ],
+            watermark=_watermark_value(highest),
+        )
+        if self.verbose:
+            print(
+                f"Wrote {rows} rows in {len(files)} file(s) to "
+                f"{endpoint.prefix}/{version or ''} in {seconds:.1f}s"
+            )
+            for timing in summary.stages:
+                print(
+                    f"  {timing.stage}: {timing.rows_per_second:,.0f} rows/s "
+                    f"({timing.seconds:.1f}s busy)"
+                )
+        return summary
+
+    def extract_incremental(
+        self,
+        endpoint: "BlobEndpoint",
+        watermark: str,
+        mode: str = "delta",
+        key: str | Sequence[str] | None = None,
+        path_after_prefix: str = "data",
+        **kwargs,
+    ) -> ExtractSummary:
+        """Extract only the rows added or changed since the last extract to a
+        new version of a blob endpoint, using the maximum of a ``watermark``
+        column (e.g. ``:updated_at`` or a date column) stored with each
+        version (see ``BlobEndpoint.get_watermark``).
+
+        The first extract, or one after the newest version without a
+        watermark, downloads the whole query. Later ones only ask for rows
+        where ``watermark`` is greater than the stored value, and write them
+        as a version of their own (``mode="delta"``) or merged into a copy of
+        the newest version (``mode="full"``), in which rows of the newest
+        version with the ``key`` of a downloaded row are replaced. A delta
+        extract without new rows writes nothing and returns a summary whose
+        version is None.
+
+        Args:
+            endpoint (BlobEndpoint): the endpoint to write to
+            watermark (str): the column rows are extracted after
+            mode (str, optional): 'delta' or 'full'. Defaults to "delta".
+            key (str | Sequence[str] | None, optional): columns identifying a
+                row when merging a full version. Defaults to None (rows are
+                only appended).
+            path_after_prefix (str, optional): name of the part files after
+                the version. Defaults to "data".
+            **kwargs: passed to ``to_endpoint``
+
+        Raises:
+            ValueError: if mode is not 'delta' or 'full', or a full version
+                would be merged into a delta version
+
+        Returns:
+            ExtractSummary: the version (None if nothing was written) and files
+                written and the new watermark
+        """
+        import polars as pl
+
+        from .utils import get_timestamp
+
+        if mode not in ["delta", "full"]:
+            raise ValueError(f"Mode {mode} not supported. Use 'delta' or 'full'.")
+        previous = endpoint.get_watermark()
+        if previous is not None and previous["column"] != watermark:
+            previous = None
+        since = previous["watermark"] if previous is not None else None
+        query = self._after(watermark, since)
+
+        if previous is None or mode == "delta":
+            summary = query.to_endpoint(
+                endpoint,
+                path_after_prefix=path_after_prefix,
+                watermark=watermark,
+                auto_version=True,
+                write_empty=previous is None,
+                **kwargs,
+            )
+            extracted = "full" if previous is None else "delta"
+            if extracted == "delta" and not summary.files:
+                if self.verbose:
+                    print(f"No rows with {watermark} > {since}, nothing extracted")
+                return replace(summary, version=None, watermark=since)
+        else:
+            if previous["mode"] != "full":
+                raise ValueError(
+                    f"Version {previous['version']} of {endpoint.prefix} is a "
+                    "delta extract, a full version can only be merged into a "
+                    "full version."
+                )
+            start = time.perf_counter()
+            delta = pl.from_arrow(
+                query.to_arrow(
+                    page_size=kwargs.get("page_size", 50_000),
+                    dtypes=kwargs.get("dtypes"),
+                )
+            )
+            base = endpoint.get_dataframe(
+                output="pl_lazy", version_spec=f"=={previous['version']}"
+            )
+            if key is not None and delta.height:
+                base = base.join(delta.lazy().select(key), on=key, how="anti")
+            version = get_timestamp()
+            endpoint.save_dataframe(
+                pl.concat([base, delta.lazy()], how="diagonal_relaxed"),
+                path_after_prefix=f"{version}/{path_after_prefix}",
+                file_format=kwargs.get("file_format", "parquet"),
+                parquet_options=kwargs.get("parquet_options"),
+                rows_per_file=kwargs.get("rows_per_file", 1_000_000),
+            )
+            highest = delta.get_column(watermark).max() if delta.height else None
+            summary = ExtractSummary(
+                version=version,
+                files=[
+                    blob["name"].removeprefix(f"{endpoint.prefix}/")
+                    for blob in endpoint._list_version_blobs(version)
+                ],
+                rows=delta.height,
+                seconds=time.perf_counter() - start,
+                stages=[],
+                watermark=_watermark_value(highest),
+            )
+            extracted = "full"
+
+        if summary.watermark is None:
+            # nothing new, the next extract starts from the same watermark
+            summary = replace(summary, watermark=since)
+        endpoint.save_watermark(
+            summary.version,
+            {
+                "column": watermark,
+                "watermark": summary.watermark,
+                "since": since,
+                "mode": extracted,
+                "rows": summary.rows,
+            },
+        )
+        if self.verbose:
+            after = "" if since is None else f" with {watermark} > {since}"
+            print(
+                f"Extracted {summary.rows} rows{after} to {extracted} "
+                f"version {summary.version}"
+            )
+        return summary
+
+    def _after(self, column: str, value: str | float | None) -> "Query":
+        """A copy of the query, on the same client, that selects ``column``
+        and, if ``value`` is given, only rows where it is greater."""
+        query = copy.copy(self)
+        query._client = self.client
+        query._owns_client = False
+        columns = (
+            ["*"]
+            if self.select is None
+            else [self.select]
+            if isinstance(self.select, str)
+            else list(self.select)
+        )
+        selected = ",".join(columns).replace(" ", "").split(",")
+        if column not in selected and not (
+            "*" in selected and not column.startswith(":")
+        ):
+            query.select = [*columns, column]
+        if value is not None:
+            after = f"{column} > {_soql_literal(value)}"
+            query.where = after if self.where is None else f"({self.where}) AND {after}"
+        return query
+
+    def to_polars(
+        self,
+        page_size: int = 50_000,
+        dtypes: "dict[str, str | pa.DataType] | None" = None,
+        checkpoint_dir: str | None = None,
+    ) -> "pl.DataFrame":
+        """``to_arrow`` as a polars DataFrame."""
+        import polars as pl
+
+        return pl.from_arrow(
+            self.to_arrow(
+                page_size=page_size, dtypes=dtypes, checkpoint_dir=checkpoint_dir
+            )
+        )
+
+    def to_pandas(
+        self,
+        page_size: int = 50_000,
+        dtypes: "dict[str, str | pa.DataType] | None" = None,
+        checkpoint_dir: str | None = None,
+    ) -> "pd.DataFrame":
+        """``to_arrow`` as a pandas DataFrame."""
+        return self.to_arrow(
+            page_size=page_size, dtypes=dtypes, checkpoint_dir=checkpoint_dir
+        ).to_pandas()
 
     @property
-    def url(self) -> str:
-        return urlunparse(
-            ("https", self.domain, f"resource/{self.id}.json", "", "", "")
+    def n_rows(self) -> int:
+        result = self._get_request(
+            self.url,
+            params=self._count_params(),
+            app_token=self.app_token,
         )
+        return self._rows_from_count(result)
+
+    def _get_records(self, start: int, end: int) -> list[dict]:
+        return self._get_rows(self.url, params=self._records_params(start, end))
+
+    def _get_rows(self, url: str, params: dict | None = None) -> list[dict]:
+        """The rows of a JSON request, parsed as the response streams in."""
+        return self._stream(url, params=params, parse=_parse_json_array)
+
+    def _stream(
+        self,
+        url: str,
+        params: dict | None,
+        parse: Callable[[Iterator[bytes]], T],
+    ) -> T:
+        """Send a GET request like ``_send`` and parse the response body
+        from its chunks as they arrive. A page failing midway is requested
+        again from the start. With a cache, whole bodies are stored, so they
+        are downloaded with ``_send`` and parsed from memory."""
+        if self.cache is not None:
+            content = self._send(url, params=params, app_token=self.app_token).content
+            return parse(iter([content]))
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.client.stream(
+                    "GET", url, headers=self._headers, params=params
+                ) as r:
+                    if not self._should_retry(attempt, r):
+                        r.raise_for_status()
+                        return parse(r.iter_bytes())
+                    delay = _retry_delay(attempt, self.backoff, r)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                delay = _retry_delay(attempt, self.backoff)
+            time.sleep(delay)
 
-    @classmethod
     def _get_request(
-        cls,
+        self,
         url: str,
         params: dict | None = None,
         app_token: str | None = None,
     ) -> list[dict]:
+        return self._send(url, params=params, app_token=app_token).json()
+
+    def _send(
+        self,
+        url: str,
+        params: dict | None = None,
+        app_token: str | None = None,
+    ) -> httpx.Response:
         headers = {}
         if app_token is not None:
             headers["X-App-Token"] = app_token
+        key, cached = self._cache_lookup(url, params)
+        if cached is not None:
+            if self.cache.is_fresh(cached):
+                self.cache.record("hits")
+                return _cached_response(cached)
+            headers.update(cached.conditional_headers())
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                r = self.client.get(url, headers=headers, params=params)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(_retry_delay(attempt, self.backoff))
+                continue
+            if self._should_retry(attempt, r):
+                time.sleep(_retry_delay(attempt, self.backoff, r))
+                continue
+            if r.status_code != 304:
+                r.raise_for_status()
+            return self._cache_store(key, cached, r)
+
+
+class AsyncQuery(_BaseQuery):
+    """A ``Query`` on an ``httpx.AsyncClient``, for fetching many pages
+    concurrently from async code.
+
+    Example:
+        >>> async with AsyncQuery("data.cdc.gov", "abc1-2345") as query:  # doctest: +SKIP
+        ...     async for page in query.get_pages_concurrent(max_in_flight=8):
+        ...         ...
+    """
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(**self._client_options)
+            self._owns_client = True
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "AsyncQuery":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def get_n_rows(self) -> int:
+        result = await self._get_request(self.url, params=self._count_params())
+        return self._rows_from_count(result)
+
+    async def get_all(self) -> list[dict]:
+        if self.verbose:
+            n_rows = await self.get_n_rows()
+            print(f"Downloading dataset {self.domain} {self.id}: {n_rows} rows")
+
+        result = await self._get_rows(self.url, params=self._all_params())
+
+        if self.verbose:
+            print(f"  Downloaded {len(result)} rows")
+
+        return result
+
+    async def get_pages_concurrent(
+        self, page_size: int = 10_000, max_in_flight: int = 8
+    ) -> AsyncIterator[list[dict]]:
+        """Fetch the pages of the query with up to ``max_in_flight`` requests
+        at once and yield them in order. At most ``max_in_flight`` pages are
+        held in memory."""
+        assert max_in_flight > 0
+        pages = deque(self._page_bounds(await self.get_n_rows(), page_size))
+        n_pages = len(pages)
+        in_flight = deque()
+        try:
+            for i in range(n_pages):
+                while pages and len(in_flight) < max_in_flight:
+                    start, end = pages.popleft()
+                    in_flight.append(
+                        asyncio.ensure_future(self._get_records(start, end))
+                    )
+                page = await in_flight.popleft()
+
+                if self.verbose:
+                    print(f"  Downloaded page {i + 1}/{n_pages}")
+
+                assert len(page) > 0
+                assert len(page) <= page_size
+
+                yield page
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def get_pages_keyset(
+        self, page_size: int = 10_000
+    ) -> AsyncIterator[list[dict]]:
+        """Page through the query ordered by ``:id``, like
+        ``Query.get_pages_keyset``."""
+        select, drop_id = self._keyset_select()
+        last_id = None
+        n_rows = 0
+        while True:
+            page = await self._get_rows(
+                self.url,
+                params=self._keyset_params(select, last_id, page_size, n_rows),
+            )
+            if not page:
+                return
+            n_rows += len(page)
+            last_id = page[-1][":id"]
+            if drop_id:
+                for row in page:
+                    del row[":id"]
+
+            yield page
+
+            if self._keyset_done(page, page_size, n_rows):
+                return
+
+    async def _get_records(self, start: int, end: int) -> list[dict]:
+        return await self._get_rows(self.url, params=self._records_params(start, end))
+
+    async def _get_rows(self, url: str, params: dict | None = None) -> list[dict]:
+        """The rows of a JSON request, parsed as the response streams in,
+        like ``Query._get_rows``."""
+        if self.cache is not None:
+            return await self._get_request(url, params=params)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.client.stream(
+                    "GET", url, headers=self._headers, params=params
+                ) as r:
+                    if not self._should_retry(attempt, r):
+                        r.raise_for_status()
+                        parser = _JSONArrayParser()
+                        rows = []
+                        async for chunk in r.aiter_bytes():
+                            rows.extend(parser.feed(chunk))
+                        rows.extend(parser.close())
+                        return rows
+                    delay = _retry_delay(attempt, self.backoff, r)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                delay = _retry_delay(attempt, self.backoff)
+            await asyncio.sleep(delay)
+
+    async def _get_request(self, url: str, params: dict | None = None) -> list[dict]:
+        headers = self._headers
+        key, cached = self._cache_lookup(url, params)
+        if cached is not None:
+            if self.cache.is_fresh(cached):
+                self.cache.record("hits")
+                return _cached_response(cached).json()
+            headers.update(cached.conditional_headers())
 
-        with httpx.Client() as client:
-            r = client.get(url, headers=headers, params=params)
-            r.raise_for_status()
-            return r.json()
+        for attempt in range(self.max_retries + 1):
+            try:
+                r = await self.client.get(url, headers=headers, params=params)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt, self.backoff))
+                continue
+            if self._should_retry(attempt, r):
+                await asyncio.sleep(_retry_delay(attempt, self.backoff, r))
+                continue
+            if r.status_code != 304:
+                r.raise_for_status()
+            return self._cache_store(key, cached, r).json()
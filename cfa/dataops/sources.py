@@ -0,0 +1,238 @@
+"""Extracts of the standard source types of a dataset's ``[source]`` table
+(Socrata datasets, plain HTTP CSV/JSON files and local files) into its
+extract stage. See ``DatasetEndpoint.run_extract``."""
+
+import glob
+import os
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+import httpx
+import polars as pl
+
+from .soda import DEFAULT_TIMEOUT, ExtractSummary, Query
+from .utils import get_timestamp
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+    from .catalog import BlobEndpoint, DatasetEndpoint
+
+SOURCE_TYPES = ["socrata", "http", "file"]
+
+# environment variable with the app token of Socrata requests
+SOCRATA_APP_TOKEN_ENV_VAR = "SOCRATA_APP_TOKEN"
+
+# file formats by file suffix
+_FORMATS = {
+    ".csv": "csv",
+    ".json": "json",
+    ".jsonl": "ndjson",
+    ".ndjson": "ndjson",
+    ".parquet": "parquet",
+    ".parq": "parquet",
+}
+
+
+def source_type(source: dict) -> str:
+    """The type of a ``[source]`` table: its ``type`` if given, else
+    'socrata' for ``/resource/{id}`` URLs (or a ``domain`` and ``id``), 'http'
+    for other URLs and 'file' for a ``path``.
+
+    Args:
+        source (dict): the source table
+
+    Raises:
+        ValueError: if the type is not one of ``SOURCE_TYPES`` or cannot be
+            told from the table
+
+    Returns:
+        str: the source type
+    """
+    kind = source.get("type")
+    if kind is None:
+        url = urlparse(source.get("url", ""))
+        if ("domain" in source and "id" in source) or (
+            url.scheme in ["http", "https"] and url.path.startswith("/resource/")
+        ):
+            kind = "socrata"
+        elif url.scheme in ["http", "https"]:
+            kind = "http"
+        elif "path" in source or url.scheme == "file":
+            kind = "file"
+        else:
+            raise ValueError(
+                "The [source] table needs a url, a path or a type to extract from."
+            )
+    if kind not in SOURCE_TYPES:
+        raise ValueError(
+            f"Source type {kind} not supported. Use one of {SOURCE_TYPES}."
+        )
+    return kind
+
+
+def socrata_query(source: dict, verbose: bool = True) -> Query:
+    """The ``soda.Query`` of a Socrata source: its ``domain`` and ``id`` or
+    ``url`` (https://{domain}/resource/{id}.csv), and optional ``select``,
+    ``where`` and ``limit``. The app token is read from
+    ``$SOCRATA_APP_TOKEN``.
+
+    Args:
+        source (dict): the source table
+        verbose (bool, optional): whether the query prints progress.
+            Defaults to True.
+
+    Returns:
+        Query: the query
+    """
+    if "domain" in source and "id" in source:
+        domain, dataset_id = source["domain"], source["id"]
+    else:
+        url = urlparse(source["url"])
+        domain = url.netloc
+        dataset_id = PurePosixPath(url.path).stem
+    return Query(
+        domain,
+        dataset_id,
+        select=source.get("select"),
+        where=source.get("where"),
+        limit=source.get("limit"),
+        app_token=os.environ.get(SOCRATA_APP_TOKEN_ENV_VAR),
+        verbose=verbose,
+    )
+
+
+def extract_source(
+    dataset: "DatasetEndpoint",
+    source: dict,
+    path_after_prefix: str = "data",
+    file_format: str = "parquet",
+    rows_per_file: int = 1_000_000,
+    verbose: bool = True,
+) -> ExtractSummary:
+    """Extract a source into a new version of the dataset's extract stage.
+
+    Args:
+        dataset (DatasetEndpoint): the dataset to extract
+        source (dict): its source table
+        path_after_prefix (str, optional): name of the part files after the
+            version. Defaults to "data".
+        file_format (str, optional): the format of the part files. Defaults
+            to "parquet".
+        rows_per_file (int, optional): maximum rows per part file. Defaults
+            to 1,000,000.
+        verbose (bool, optional): whether to print progress. Defaults to True.
+
+    Returns:
+        ExtractSummary: the version and files written
+    """
+    kind = source_type(source)
+    endpoint = dataset.extract
+    options = {
+        "path_after_prefix": path_after_prefix,
+        "file_format": file_format,
+        "rows_per_file": rows_per_file,
+    }
+    if kind == "socrata":
+        page_size = source.get("pagination", {}).get("limit", 50_000)
+        with socrata_query(source, verbose=verbose) as query:
+            if source.get("watermark") is not None:
+                return dataset.extract_incremental(
+                    query, page_size=page_size, **options
+                )
+            return query.to_endpoint(endpoint, page_size=page_size, **options)
+
+    start = time.perf_counter()
+    if kind == "http":
+        with tempfile.TemporaryDirectory() as directory:
+            path = _download(source["url"], directory)
+            frame = _scan(path, source.get("format"))
+            return _save(endpoint, frame, start, **options)
+    path = source.get("path") or urlparse(source["url"]).path
+    return _save(endpoint, _scan(path, source.get("format")), start, **options)
+
+
+def _download(url: str, directory: str) -> str:
+    """Stream a URL to a file in a directory, named as in the URL."""
+    path = os.path.join(directory, PurePosixPath(urlparse(url).path).name or "data")
+    with httpx.stream(
+        "GET", url, timeout=DEFAULT_TIMEOUT, follow_redirects=True
+    ) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_bytes():
+                f.write(chunk)
+    return path
+
+
+def _scan(path: str, file_format: str | None = None) -> pl.LazyFrame:
+    """A lazy frame of a CSV, JSON, NDJSON or parquet file (or glob), of the
+    given format or that of its suffix."""
+    if file_format is None:
+        file_format = _FORMATS.get(PurePosixPath(path).suffix.lower())
+    if not glob.glob(path):
+        raise FileNotFoundError(f"No files match {path}.")
+    if file_format == "csv":
+        return pl.scan_csv(path, infer_schema_length=None)
+    if file_format in ["ndjson", "jsonl"]:
+        return pl.scan_ndjson(path, infer_schema_length=None)
+    if file_format == "parquet":
+        return pl.scan_parquet(path)
+    if file_format == "json":
+        # a JSON array has to be read whole
+        return pl.concat(
+            [
+                pl.read_json(p, infer_schema_length=None)
+                for p in sorted(glob.glob(path))
+            ],
+            how="diagonal_relaxed",
+        ).lazy()
+    raise ValueError(
+        f"File format {file_format} of {path} not supported. Set the source "
+        "format to 'csv', 'json', 'ndjson' or 'parquet'."
+    )
+
+
+def _save(
+    endpoint: "BlobEndpoint",
+    frame: pl.LazyFrame,
+    start: float,
+    path_after_prefix: str,
+    file_format: str,
+    rows_per_file: int,
+) -> ExtractSummary:
+    """Stream a lazy frame into part files of a new version, counting rows."""
+    import pyarrow as pa
+
+    from .catalog import _stream_record_batches
+
+    schema, batches = _stream_record_batches(frame)
+    rows = 0
+
+    def counted() -> Iterator["pa.RecordBatch"]:
+        nonlocal rows
+        for batch in batches:
+            rows += batch.num_rows
+            yield batch
+
+    version = get_timestamp()
+    endpoint.save_dataframe(
+        pa.RecordBatchReader.from_batches(schema, counted()),
+        path_after_prefix=f"{version}/{path_after_prefix}",
+        file_format=file_format,
+        rows_per_file=rows_per_file,
+    )
+    return ExtractSummary(
+        version=version,
+        files=[
+            blob["name"].removeprefix(f"{endpoint.prefix}/")
+            for blob in endpoint._list_version_blobs(version)
+        ],
+        rows=rows,
+        seconds=time.perf_counter() - start,
+        stages=[],
+    )
@@ -1,16 +1,37 @@
 from collections.abc import Sequence
+from datetime import date
 from types import SimpleNamespace
 from typing import Any, Literal, overload
 
+import duckdb
 import pandas as pd
 import polars as pl
+import pyarrow as pa
 
+from .backends import Environment, StorageBackend
+from .soda import ExtractSummary, Query
 from .reporting.catalog import NotebookEndpoint
 
 def get_all_catalogs() -> list: ...
 
 class CatalogNamespace(SimpleNamespace):
-    pass
+    @overload
+    def version_report(
+        self,
+        prefix: str | None = None,
+        include_sizes: bool = True,
+        max_workers: int = 32,
+        output: Literal["pandas", "pd"] = "pandas",
+    ) -> pd.DataFrame: ...
+    @overload
+    def version_report(
+        self,
+        prefix: str | None = None,
+        include_sizes: bool = True,
+        max_workers: int = 32,
+        *,
+        output: Literal["polars", "pl"],
+    ) -> pl.DataFrame: ...
 
 class VersionMetadata:
     version: str | None
@@ -18,12 +39,49 @@ class VersionMetadata:
     version_spec: str | None
     selection: Literal["newest", "oldest"]
 
+class DownloadSummary:
+    version: str | None
+    files_transferred: int
+    files_skipped: int
+    bytes_transferred: int
+    bytes_skipped: int
+    @property
+    def written(self) -> bool: ...
+
+class SyncSummary:
+    versions: dict[str, list[str]]
+    files_transferred: int
+    files_skipped: int
+    files_deleted: int
+    bytes_transferred: int
+    bytes_skipped: int
+
 class DatasetEndpoint:
     config_path: str
     defaults: dict[str, Any]
     config: dict[str, Any]
     __ns_str__: str
     _ledger_location: dict[str, Any]
+    @property
+    def stages(self) -> list[str]: ...
+    def sync_to_local(
+        self,
+        local_path: str,
+        stages: Sequence[str] | None = None,
+        versions: str | None = None,
+        latest: int | None = None,
+        max_workers: int = 8,
+        prune: bool = False,
+    ) -> SyncSummary: ...
+    def run_extract(
+        self,
+        path_after_prefix: str = "data",
+        file_format: str = "parquet",
+        rows_per_file: int = 1_000_000,
+        verbose: bool = True,
+        **source,
+    ) -> ExtractSummary: ...
+    def extract_incremental(self, query: Query, **kwargs) -> ExtractSummary: ...
 
 class BlobEndpoint:
     account: str
@@ -32,6 +90,8 @@ class BlobEndpoint:
     ledger_location: dict[str, Any]
     is_ledger: bool
     __ns_str__: str
+    parquet_options: dict[str, Any]
+    backend: StorageBackend
     def write_blob(
         self,
         file_buffer: bytes | Sequence[bytes],
@@ -47,6 +107,12 @@ class BlobEndpoint:
     ) -> list[bytes]: ...
     def read_csv(self, suffix: str) -> pd.DataFrame: ...
     def get_versions(self) -> list: ...
+    def get_watermark(
+        self,
+        version_spec: str | None = None,
+        selection: Literal["newest", "oldest"] = "newest",
+    ) -> dict | None: ...
+    def save_watermark(self, version: str, watermark: dict) -> None: ...
     def get_file_ext(
         self,
         version_meta: VersionMetadata,
@@ -57,7 +123,9 @@ class BlobEndpoint:
         version_spec: str | None = None,
         force: bool = False,
         selection: Literal["newest", "oldest"] = "newest",
-    ) -> bool: ...
+        max_workers: int = 8,
+        return_summary: bool = False,
+    ) -> bool | DownloadSummary: ...
     @overload
     def get_dataframe(
         self,
@@ -90,10 +158,16 @@ class BlobEndpoint:
     def ledger_entry(self, action: str) -> None: ...
     def save_dataframe(
         self,
-        df: pd.DataFrame | pl.DataFrame,
+        df: pd.DataFrame
+        | pl.DataFrame
+        | pl.LazyFrame
+        | pa.RecordBatchReader
+        | duckdb.DuckDBPyRelation,
         path_after_prefix: str,
         file_format: str = "parquet",
         auto_version: bool = False,
+        parquet_options: dict[str, Any] | None = None,
+        rows_per_file: int = 1_000_000,
     ) -> None: ...
     def save_file_to_blob(
         self,
@@ -108,6 +182,32 @@ class BlobEndpoint:
         auto_version: bool = False,
     ) -> None: ...
 
+class LedgerEndpoint(BlobEndpoint):
+    @property
+    def compacted_prefix(self) -> str: ...
+    def compact(
+        self,
+        months: list[str] | None = None,
+        include_current_month: bool = False,
+    ) -> list[str]: ...
+    @overload
+    def query(
+        self,
+        since: str | date | None = None,
+        dataset: str | None = None,
+        user: str | None = None,
+        output: Literal["pandas", "pd"] = "pandas",
+    ) -> pd.DataFrame: ...
+    @overload
+    def query(
+        self,
+        since: str | date | None = None,
+        dataset: str | None = None,
+        user: str | None = None,
+        *,
+        output: Literal["polars", "pl"],
+    ) -> pl.DataFrame: ...
+
 def dict_to_sn(
     d: Any,
     defaults: dict[str, Any] | None = None,
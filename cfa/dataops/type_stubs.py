@@ -173,8 +173,10 @@ def _namespace_classes(
     ]
     if not path:
         attributes.append(_StubAttribute("__namespace_list__", "list[str]"))
+        if is_dataset_catalog:
+            attributes.append(_StubAttribute("__environment__", "Environment"))
     elif is_dataset_catalog and len(path) == 1:
-        attributes.append(_StubAttribute("_ledger_endpoint", "BlobEndpoint"))
+        attributes.append(_StubAttribute("_ledger_endpoint", "LedgerEndpoint"))
 
     classes.append(
         _StubClass(
@@ -1,16 +1,13 @@
 """Utility functions for data operations."""
 
 import getpass
-import glob
 import os
-from collections.abc import Callable
+import re
+from collections.abc import Callable, Iterable
 from datetime import datetime
 from itertools import islice
 from pathlib import Path
-from typing import Literal
-
-from packaging.specifiers import SpecifierSet
-from packaging.version import Version
+from typing import Literal, NamedTuple
 
 
 def remove_ws_and_nonalpha(s: str) -> str:
@@ -30,8 +27,107 @@ def remove_ws_and_nonalpha(s: str) -> str:
     return "".join(c for c in s if c.isalnum() or c == "_")
 
 
+class FileStat(NamedTuple):
+    """The size and modification time of a discovered file, e.g. for cache keys."""
+
+    size: int
+    mtime_ns: int
+
+
+def scan_files(base_dir: str, file_ext: str) -> dict[str, FileStat]:
+    """Find all files with an extension below a directory in a single walk.
+
+    Hidden files and directories (names starting with '.') are skipped, as
+    with a recursive glob.
+
+    Args:
+        base_dir (str): The base directory to start the search.
+        file_ext (str): The file extension to filter files (e.g., 'toml').
+
+    Returns:
+        dict[str, FileStat]: absolute file paths (sorted) mapped to their stat info
+    """
+    suffix = "." + file_ext.lstrip(".")
+    files = {}
+    stack = [os.path.abspath(base_dir)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        with it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.name.endswith(suffix) and entry.is_file():
+                    st = entry.stat()
+                    files[entry.path] = FileStat(st.st_size, st.st_mtime_ns)
+    return dict(sorted(files.items()))
+
+
+_TOML_TABLE_RE = re.compile(r"^\[\s*([A-Za-z0-9_\-]+)\s*\]\s*(?:#.*)?$")
+_TOML_NAME_RE = re.compile(r"""^name\s*=\s*(?:"([^"\\]*)"|'([^']*)')\s*(?:#.*)?$""")
+
+
+def read_toml_name(path: str, table: str = "properties") -> str:
+    """Read the ``name`` key of a table from a TOML file.
+
+    Only the lines up to the key are scanned, so large configs are not parsed
+    in full. Files the header scan cannot read with certainty (e.g., escaped
+    or multiline strings, dotted keys) are parsed in full instead.
+
+    Args:
+        path (str): The path to the TOML file.
+        table (str, optional): The table holding the name. Defaults to "properties".
+
+    Raises:
+        KeyError: if the table has no name
+
+    Returns:
+        str: the name
+    """
+    current = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if '"""' in line or "'''" in line:
+                break
+            if line.startswith("["):
+                match = _TOML_TABLE_RE.match(line)
+                current = match.group(1) if match else None
+                continue
+            if current == table and line.startswith("name"):
+                match = _TOML_NAME_RE.match(line)
+                if match is None:
+                    break
+                return match.group(1) if match.group(1) is not None else match.group(2)
+    import tomli
+
+    with open(path, "rb") as f:
+        return tomli.load(f)[table]["name"]
+
+
+def get_dataset_name(path: str) -> str:
+    """Get the namespace name of a dataset from its config's ``properties.name``.
+
+    Args:
+        path (str): The path to the dataset configuration file.
+
+    Returns:
+        str: The normalized dataset name.
+    """
+    return remove_ws_and_nonalpha(read_toml_name(path))
+
+
 def get_fs_ns_map(
-    base_dir: str, file_ext: str, endpoint_func: Callable[[str], str] | None = None
+    base_dir: str,
+    file_ext: str,
+    endpoint_func: Callable[[str], str] | None = None,
+    files: Iterable[str] | None = None,
 ) -> dict:
     """Get a nested dictionary representing the filesystem structure starting from base_dir.
 
@@ -41,25 +137,23 @@ def get_fs_ns_map(
         endpoint_func (Optional[callable]): A function that takes a file path and returns a string
             to be used as the key in the nested dictionary. If None, the filename without extension
             is used.
+        files (Iterable[str] | None, optional): Absolute paths of the files below
+            base_dir, e.g. from ``scan_files``. Defaults to None (scan base_dir).
 
     Returns:
         dict: A nested dictionary representing the filesystem structure.
     """
     base_dir = os.path.abspath(base_dir)
     file_ext = file_ext.lstrip(".")
-    fs_paths = glob.glob(os.path.join(base_dir, "**", f"*.{file_ext}"), recursive=True)
+    if files is None:
+        files = scan_files(base_dir, file_ext)
     fs_map = {}
-    for p_i in fs_paths:
-        if p_i.startswith(base_dir):
-            ns_list = [
-                remove_ws_and_nonalpha(i)
-                for i in p_i[len(base_dir) + 1 :].split(os.sep)
-            ]
+    for p_i in files:
+        if p_i.startswith(base_dir + os.sep):
+            ns_list = p_i[len(base_dir) + 1 :].split(os.sep)
             current = fs_map
             for part in ns_list[:-1]:
-                if part not in current:
-                    current[part] = {}
-                current = current[part]
+                current = current.setdefault(remove_ws_and_nonalpha(part), {})
             if endpoint_func is not None:
                 ep = endpoint_func(p_i)
                 if not isinstance(ep, str):
@@ -69,11 +163,54 @@ def get_fs_ns_map(
                 else:
                     current[ep] = p_i
             else:
-                current[ns_list[-1][: -(len(file_ext) + 1)]] = p_i
+                current[remove_ws_and_nonalpha(ns_list[-1])[: -(len(file_ext) + 1)]] = (
+                    p_i
+                )
 
     return fs_map
 
 
+def discover_datasets(base_dir: str) -> tuple[dict, dict[str, FileStat]]:
+    """Discover the dataset configs of a catalog's datasets directory.
+
+    Args:
+        base_dir (str): The datasets directory of a catalog.
+
+    Returns:
+        tuple[dict, dict[str, FileStat]]: the nested namespace map of dataset
+            names to config paths, and the stat info of every config file
+    """
+    files = scan_files(base_dir, "toml")
+    ns_map = get_fs_ns_map(
+        base_dir, "toml", endpoint_func=get_dataset_name, files=files
+    )
+    return ns_map, files
+
+
+CACHE_DIR_ENV_VAR = "DATAOPS_CACHE_DIR"
+
+
+def get_cache_dir(*parts: str) -> str:
+    """Get (and create) a directory under the cfa.dataops cache.
+
+    The cache is at ``$DATAOPS_CACHE_DIR`` if set, else ``cfa-dataops`` under
+    ``$XDG_CACHE_HOME`` (``~/.cache`` by default).
+
+    Args:
+        *parts (str): sub-directories of the cache
+
+    Returns:
+        str: the directory path
+    """
+    root = os.environ.get(CACHE_DIR_ENV_VAR) or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+        "cfa-dataops",
+    )
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
 def get_dataset_dot_path(endpoint_map: dict) -> list[str]:
     """Get the dataset config path from the dataset name
 
@@ -92,6 +229,33 @@ def get_dataset_dot_path(endpoint_map: dict) -> list[str]:
     return paths
 
 
+def resolve_dot_path(root: object, dot_path: str) -> object:
+    """Get a nested attribute by its dotted path, e.g. a catalog endpoint.
+
+    Args:
+        root (object): the object to start from (e.g., datacat)
+        dot_path (str): the dotted attribute path (e.g., 'catalog.dataset.load')
+
+    Raises:
+        AttributeError: if a part of the path is not an identifier or not found
+
+    Returns:
+        object: the attribute
+
+    Example:
+        >>> from types import SimpleNamespace
+        >>> ns = SimpleNamespace(a=SimpleNamespace(b=1))
+        >>> resolve_dot_path(ns, "a.b")
+        1
+    """
+    obj = root
+    for part in dot_path.split("."):
+        if not part.isidentifier():
+            raise AttributeError(f"Invalid namespace '{dot_path}'.")
+        obj = getattr(obj, part)
+    return obj
+
+
 def get_timestamp(make_standard: bool = False) -> str:
     """For getting standard datetime timestamp format
 
@@ -212,6 +376,35 @@ def construct_version_spec(version: str | None) -> str | None:
     return f"=={version}"
 
 
+def versions_matching(
+    version_spec: str | None,
+    available_versions: list[str],
+) -> list[str]:
+    """Select all version strings from a list that satisfy a specifier.
+
+    Args:
+        version_spec (str | None): Optional packaging-compatible version specifier such as
+            ``">=2025-01-01"``. If ``None``, all available versions are returned.
+        available_versions (list[str]): Version strings to evaluate.
+
+    Returns:
+        list[str]: the matching versions, oldest first
+    """
+    from packaging.specifiers import SpecifierSet
+    from packaging.version import Version
+
+    versions = sorted(
+        (Version(normalize(version)), version) for version in available_versions
+    )
+    version_spec = construct_version_spec(version_spec)
+    if version_spec is not None:
+        specset = SpecifierSet(normalize(version_spec))
+        versions = [
+            (parsed, original) for parsed, original in versions if parsed in specset
+        ]
+    return [original for _, original in versions]
+
+
 def version_matcher(
     version_spec: str | None,
     available_versions: list[str],
@@ -240,17 +433,7 @@ def version_matcher(
     if selection not in {"newest", "oldest"}:
         raise ValueError("selection must be 'newest' or 'oldest'")
 
-    versions = sorted(
-        (Version(normalize(version)), version) for version in available_versions
-    )
-    version_spec = construct_version_spec(version_spec)
-    if version_spec is not None:
-        specset = SpecifierSet(normalize(version_spec))
-        versions = [
-            (parsed, original) for parsed, original in versions if parsed in specset
-        ]
-
-    originals = [original for _, original in versions]
+    originals = versions_matching(version_spec, available_versions)
 
     if selection == "newest":
         return originals[-1] if originals else None
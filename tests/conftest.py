@@ -1,6 +1,7 @@
 import os
 import pickle
 import sys
+from importlib.util import find_spec
 from io import BytesIO
 from types import ModuleType, SimpleNamespace
 
@@ -71,21 +72,25 @@ def _install_test_stubs() -> None:
     _ensure_module("traitlets")
     _ensure_module("traitlets.config", Config=_ConfigStub)
     sys.modules["traitlets"].config = sys.modules["traitlets.config"]
-    _ensure_module(
-        "httpx",
-        Client=type(
-            "Client",
-            (),
-            {
-                "__enter__": lambda self: self,
-                "__exit__": lambda self, exc_type, exc, tb: False,
-                "get": lambda self, *args, **kwargs: SimpleNamespace(
-                    raise_for_status=lambda: None,
-                    json=lambda: [],
-                ),
-            },
-        ),
-    )
+    # only stand in for httpx where it is not installed
+    if find_spec("httpx") is None:
+        _ensure_module(
+            "httpx",
+            Timeout=lambda *args, **kwargs: None,
+            Limits=lambda *args, **kwargs: None,
+            Client=type(
+                "Client",
+                (),
+                {
+                    "__enter__": lambda self: self,
+                    "__exit__": lambda self, exc_type, exc, tb: False,
+                    "get": lambda self, *args, **kwargs: SimpleNamespace(
+                        raise_for_status=lambda: None,
+                        json=lambda: [],
+                    ),
+                },
+            ),
+        )
 
 
 def _install_parquet_fallbacks() -> None:
@@ -153,6 +158,21 @@ def data_dir(tmpdir_factory):
     return tmpdir_factory.mktemp("data")
 
 
+@fixture(autouse=True)
+def reset_backend_state(monkeypatch, tmp_path):
+    """Keep pooled credentials, clients, the memoized environment check and
+    cached results from leaking between tests."""
+    from cfa.dataops import backends
+    from cfa.dataops.config_validator import validation_cache
+
+    monkeypatch.setattr(backends, "_environment", backends.Environment())
+    monkeypatch.setenv("DATAOPS_CACHE_DIR", str(tmp_path / "dataops_cache"))
+    validation_cache.clear()
+    yield
+    backends.get_client_pool().clear()
+    validation_cache.clear()
+
+
 @fixture(scope="session")
 def mock_write_blob_stream():
     def mock_write_blob_stream(
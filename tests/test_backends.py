@@ -0,0 +1,403 @@
+"""Tests for the storage backends behind blob endpoints"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+
+import pandas as pd
+import polars as pl
+import pytest
+
+from cfa.dataops.backends import (
+    AccessError,
+    AzureBackend,
+    ClientPool,
+    Environment,
+    InMemoryBackend,
+    LocalBackend,
+    StorageBackend,
+    get_backend,
+    get_environment,
+    register_backend,
+    resolve_backend,
+)
+from cfa.dataops.catalog import dict_to_sn
+from cfa.dataops.ledger import flush_ledger
+
+ACC, CONT = "acc", "cont"
+
+
+@pytest.fixture(params=["local", "memory"])
+def backend(request, tmp_path):
+    if request.param == "local":
+        return LocalBackend(str(tmp_path))
+    return InMemoryBackend()
+
+
+class TestBackendOperations:
+    """Tests that the local and in-memory backends behave alike"""
+
+    def test_implements_protocol(self, backend):
+        assert isinstance(backend, StorageBackend)
+        assert isinstance(AzureBackend(), StorageBackend)
+
+    def test_put_get_and_ranges(self, backend):
+        backend.put(ACC, CONT, "x/file.txt", b"hello")
+        backend.put(ACC, CONT, "x/file.txt", b" world", append=True)
+
+        assert backend.get(ACC, CONT, "x/file.txt") == b"hello world"
+        assert backend.get(ACC, CONT, "x/file.txt", offset=6) == b"world"
+        assert backend.get(ACC, CONT, "x/file.txt", offset=1, length=4) == b"ello"
+        assert b"".join(backend.iter_chunks(ACC, CONT, "x/file.txt", offset=6)) == (
+            b"world"
+        )
+        with pytest.raises(FileExistsError):
+            backend.put(ACC, CONT, "x/file.txt", b"new", overwrite=False)
+
+    def test_streaming_put(self, backend):
+        backend.put(ACC, CONT, "x/chunks.bin", iter([b"ab", b"cd", b"ef"]))
+        assert backend.get(ACC, CONT, "x/chunks.bin") == b"abcdef"
+
+    def test_list_is_hierarchical(self, backend):
+        backend.put(ACC, CONT, "pre/v1/a.csv", b"a")
+        backend.put(ACC, CONT, "pre/v1/nested/b.csv", b"bb")
+        backend.put(ACC, CONT, "pre/v2/c.csv", b"c")
+
+        assert [b["name"] for b in backend.list(ACC, CONT, "pre/")] == [
+            "pre/v1/",
+            "pre/v2/",
+        ]
+        listing = backend.list(ACC, CONT, "pre/v1/")
+        assert [b["name"] for b in listing] == ["pre/v1/a.csv", "pre/v1/nested/"]
+        assert listing[0]["size"] == 1
+        assert listing[0]["etag"]
+        assert backend.list(ACC, CONT, "missing/") == []
+
+    def test_stat_and_delete(self, backend):
+        backend.put(ACC, CONT, "x/file.txt", b"abc")
+        etag = backend.stat(ACC, CONT, "x/file.txt")["etag"]
+        backend.put(ACC, CONT, "x/file.txt", b"abcd")
+
+        stat = backend.stat(ACC, CONT, "x/file.txt")
+        assert stat["size"] == 4
+        assert stat["etag"] != etag or isinstance(backend, LocalBackend)
+        backend.delete(ACC, CONT, "x/file.txt")
+        assert backend.stat(ACC, CONT, "x/file.txt") is None
+
+    def test_local_skips_partial_downloads(self, tmp_path):
+        backend = LocalBackend(str(tmp_path))
+        backend.put(ACC, CONT, "v1/a.csv", b"a")
+        (tmp_path / "v1" / "b.csv.part").write_bytes(b"partial")
+        (tmp_path / "v1" / ".hidden").write_bytes(b"")
+
+        assert [b["name"] for b in backend.list(ACC, CONT, "v1/")] == ["v1/a.csv"]
+
+    def test_memory_is_scoped_by_container(self):
+        backend = InMemoryBackend()
+        backend.put(ACC, "other", "x/file.txt", b"abc")
+        assert backend.list(ACC, CONT, "x/") == []
+
+
+@pytest.fixture
+def storage_sdk(mocker):
+    module = ModuleType("azure.storage.blob")
+    module.ContainerClient = mocker.MagicMock(
+        side_effect=lambda **kwargs: mocker.MagicMock(**kwargs)
+    )
+    mocker.patch.dict(sys.modules, {"azure.storage.blob": module})
+    return module
+
+
+class TestAzureBackend:
+    """Tests for AzureBackend operations on the pooled clients"""
+
+    def test_full_reads_and_writes(self, mocker):
+        read = mocker.patch("cfa.dataops.backends._read_blob", return_value=b"data")
+        write = mocker.patch("cfa.dataops.backends._write_blob")
+        backend = AzureBackend()
+
+        assert backend.get(ACC, CONT, "a/b.csv") == b"data"
+        backend.put(ACC, CONT, "a/b.csv", b"data", append=True)
+
+        read.assert_called_once_with(
+            blob_url="a/b.csv", account_name=ACC, container_name=CONT
+        )
+        assert write.call_args[1]["append_blob"] is True
+
+    def test_ranged_reads_use_blob_client(self, mocker):
+        client = mocker.patch("cfa.dataops.backends._blob_client")
+        client.return_value.download_blob.return_value.chunks.return_value = [b"rld"]
+
+        chunks = list(AzureBackend().iter_chunks(ACC, CONT, "a/b.csv", offset=8))
+
+        assert chunks == [b"rld"]
+        client.return_value.download_blob.assert_called_once_with(offset=8)
+
+    def test_calls_reuse_one_pooled_client(self, mocker, storage_sdk):
+        pool = ClientPool()
+        mocker.patch("cfa.dataops.backends._client_pool", pool)
+        backend = AzureBackend()
+
+        for _ in range(3):
+            backend.list(ACC, CONT, "a/")
+            backend.get(ACC, CONT, "a/b.csv")
+            list(backend.iter_chunks(ACC, CONT, "a/b.csv"))
+            backend.put(ACC, CONT, "a/b.csv", b"data")
+
+        storage_sdk.ContainerClient.assert_called_once()
+        client = pool.container_client(ACC, CONT)
+        client.walk_blobs.assert_called_with(name_starts_with="a/", delimiter="/")
+        assert client.download_blob.call_count == 6
+        client.upload_blob.assert_called_with("a/b.csv", b"data", overwrite=True)
+
+
+class TestClientPool:
+    """Tests for the process-wide credential and client pool"""
+
+    def test_credential_is_created_once_across_threads(self, mocker):
+        credential = mocker.patch("cfa.dataops.backends.ManagedIdentityCredential")
+        pool = ClientPool()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            credentials = list(executor.map(lambda _: pool.credential(), range(32)))
+
+        credential.assert_called_once_with()
+        assert all(c is credentials[0] for c in credentials)
+
+    def test_container_clients_are_keyed_by_account_and_container(self, storage_sdk):
+        pool = ClientPool()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            clients = list(
+                executor.map(
+                    lambda i: pool.container_client(ACC, f"cont{i % 2}"), range(32)
+                )
+            )
+
+        assert storage_sdk.ContainerClient.call_count == 2
+        assert {id(c) for c in clients} == {
+            id(pool.container_client(ACC, "cont0")),
+            id(pool.container_client(ACC, "cont1")),
+        }
+        assert pool.container_client("other", "cont0") is not clients[0]
+        pool.blob_client(ACC, "cont0", "a/b.csv")
+        pool.container_client(ACC, "cont0").get_blob_client.assert_called_with(
+            "a/b.csv"
+        )
+
+    def test_clear_drops_pooled_clients(self, storage_sdk):
+        pool = ClientPool()
+        client = pool.container_client(ACC, CONT)
+        credential = pool.credential()
+
+        pool.clear()
+
+        assert pool.container_client(ACC, CONT) is not client
+        assert pool.credential() is not credential
+
+    def test_backends_share_the_scan_credential(self, mocker):
+        provider = mocker.patch("cfa.dataops.backends.pl.CredentialProviderAzure")
+
+        first = AzureBackend().scan_options(ACC, CONT)
+        second = AzureBackend().scan_options("other", CONT)
+
+        provider.assert_called_once()
+        assert first["credential_provider"] is second["credential_provider"]
+        assert second["storage_options"] == {"account_name": "other"}
+
+
+class TestEnvironment:
+    """Tests for the memoized EXT environment check"""
+
+    def test_check_runs_once(self, mocker, dataset_ns_map, dataset_defaults):
+        check = mocker.patch("cfa.dataops.backends.check_ext_env", return_value=True)
+        mocker.patch("cfa.dataops.backends._walk_blobs", return_value=[])
+        cat = dict_to_sn(dataset_ns_map, dataset_defaults)
+
+        for stage in ["stage_01", "stage_02", "stage_03"]:
+            getattr(cat.tests.multistage.multistage_test, stage).get_versions()
+
+        check.assert_called_once_with()
+        assert get_environment().ext_access is True
+
+    def test_failed_check_is_retried(self, mocker):
+        check = mocker.patch(
+            "cfa.dataops.backends.check_ext_env", side_effect=[False, True]
+        )
+        clock = mocker.patch("cfa.dataops.backends.time.monotonic", return_value=0.0)
+        env = Environment(recheck_after=60.0)
+
+        assert not env
+        clock.return_value = 30.0
+        assert not env
+        clock.return_value = 90.0
+        assert env
+        clock.return_value = 1000.0
+        assert env
+        assert check.call_count == 2
+
+    def test_refresh(self, mocker):
+        check = mocker.patch(
+            "cfa.dataops.backends.check_ext_env", side_effect=[True, False]
+        )
+        env = Environment()
+
+        assert env.ext_access
+        assert env.refresh().ext_access is False
+        assert check.call_count == 2
+
+    def test_failure_is_explained(self, mocker, dataset_ns_map, dataset_defaults):
+        mocker.patch(
+            "cfa.dataops.backends.check_ext_env",
+            side_effect=KeyError("AZURE_CLIENT_ID"),
+        )
+        cat = dict_to_sn(dataset_ns_map, dataset_defaults)
+
+        with pytest.raises(AccessError, match="AZURE_CLIENT_ID") as e:
+            cat.tests.etl_test.load.get_versions()
+
+        assert isinstance(e.value, RuntimeError)
+        assert "refresh()" in str(e.value)
+        assert "KeyError" in repr(get_environment())
+
+    def test_exposed_on_datacat(self):
+        from cfa.dataops.catalog import datacat
+
+        assert isinstance(datacat.__environment__, Environment)
+
+
+class TestBackendSelection:
+    """Tests for selecting backends by specification"""
+
+    def test_get_backend_is_shared(self, tmp_path):
+        assert get_backend(f"local:{tmp_path}") is get_backend(f"local:{tmp_path}")
+        assert get_backend("memory:a") is not get_backend("memory:b")
+        assert isinstance(get_backend(), AzureBackend)
+
+    @pytest.mark.parametrize("spec", ["s3://bucket", "local", "local:"])
+    def test_invalid_specs(self, spec):
+        with pytest.raises(ValueError):
+            get_backend(spec)
+
+    def test_environment_overrides_catalog(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("DATAOPS_BACKEND", raising=False)
+        assert isinstance(resolve_backend("memory"), InMemoryBackend)
+        assert isinstance(resolve_backend(None), AzureBackend)
+
+        monkeypatch.setenv("DATAOPS_BACKEND", f"local:{tmp_path}")
+        backend = resolve_backend("memory")
+        assert isinstance(backend, LocalBackend)
+        assert backend.root == str(tmp_path)
+
+        instance = InMemoryBackend()
+        assert resolve_backend(instance) is instance
+
+    def test_register_backend(self):
+        calls = []
+
+        class Recording(InMemoryBackend):
+            def get(self, *args, **kwargs):
+                calls.append(args)
+                return super().get(*args, **kwargs)
+
+        register_backend("recording", lambda arg: Recording())
+        backend = get_backend("recording:x")
+        backend.put(ACC, CONT, "a", b"1")
+        backend.get(ACC, CONT, "a")
+
+        assert calls == [(ACC, CONT, "a")]
+
+
+@pytest.fixture
+def offline(mocker, monkeypatch, tmp_path):
+    """Point the catalog at a local directory and fail on any Azure access"""
+    monkeypatch.setenv("DATAOPS_BACKEND", f"local:{tmp_path}")
+    for name in [
+        "check_ext_env",
+        "_walk_blobs",
+        "_read_blob",
+        "_write_blob",
+        "_blob_client",
+    ]:
+        mocker.patch(
+            f"cfa.dataops.backends.{name}", side_effect=AssertionError("network")
+        )
+    return tmp_path
+
+
+class TestOfflineCatalog:
+    """Tests for serving a whole catalog from a local directory tree"""
+
+    @pytest.fixture
+    def dataset(self, offline, dataset_ns_map, dataset_defaults):
+        return dict_to_sn(dataset_ns_map, dataset_defaults).tests.etl_test
+
+    def test_write_then_read(self, offline, dataset):
+        """Test the save, version listing and read round trip on disk"""
+        df = pl.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+        dataset.load.save_dataframe(df, "data.parquet", auto_version=True)
+
+        versions = dataset.load.get_versions()
+
+        assert len(versions) == 1
+        assert (offline / dataset.load.prefix / versions[0] / "data.parquet").exists()
+        assert dataset.load.get_dataframe(output="pl").equals(df)
+        pd.testing.assert_frame_equal(
+            dataset.load.get_dataframe(output="pd"), df.to_pandas()
+        )
+        lazy = dataset.load.get_dataframe(output="lazy")
+        assert isinstance(lazy, pl.LazyFrame)
+        assert lazy.collect().equals(df)
+
+    def test_csv_and_versions(self, offline, dataset):
+        dataset.extract.write_blob(b"a,b\n1,2\n", "2025-01-01T00-00-00/raw.csv")
+        dataset.extract.write_blob(b"a,b\n3,4\n", "2025-01-02T00-00-00/raw.csv")
+
+        assert dataset.extract.get_versions() == [
+            "2025-01-02T00-00-00",
+            "2025-01-01T00-00-00",
+        ]
+        df = dataset.extract.get_dataframe(
+            output="pl", version_spec="2025-01-01T00-00-00"
+        )
+        assert df["a"].to_list() == [1]
+
+    def test_ledger_is_written_locally(self, offline, dataset, mocker):
+        mocker.patch("cfa.dataops.catalog.get_date", return_value="2025-01-01")
+        dataset.extract.write_blob(b"a\n1\n", "2025-01-01T00-00-00/raw.csv")
+
+        assert flush_ledger(timeout=5)
+        ledger_file = offline / "_access" / "test" / "ledger" / "2025-01-01.jsonl"
+        assert b"tests.etl_test.extract" in ledger_file.read_bytes()
+
+    def test_serves_a_sync_mirror(self, offline, dataset, tmp_path_factory):
+        """Test that a mirror written by sync_to_local is a valid local root"""
+        dataset.extract.write_blob(b"a,b\n1,2\n", "2025-01-01T00-00-00/raw.csv")
+        mirror = tmp_path_factory.mktemp("mirror")
+
+        dataset.sync_to_local(str(mirror), stages=["extract"])
+        dataset.extract.backend = LocalBackend(str(mirror))
+
+        assert dataset.extract.get_versions() == ["2025-01-01T00-00-00"]
+        assert dataset.extract.get_dataframe(output="pl")["b"].to_list() == [2]
+
+
+class TestCatalogBackendDefault:
+    """Tests for selecting a backend in the catalog defaults"""
+
+    def test_memory_catalog(self, monkeypatch, dataset_ns_map, dataset_defaults):
+        monkeypatch.delenv("DATAOPS_BACKEND", raising=False)
+        defaults = {
+            **dataset_defaults,
+            "storage": {**dataset_defaults["storage"], "backend": "memory:catalog"},
+        }
+        catalog = dict_to_sn(dataset_ns_map, defaults)
+        endpoint = catalog.tests.etl_test.load
+        df = pl.DataFrame({"a": [1, 2]})
+
+        endpoint.save_dataframe(df, "data.parquet", auto_version=True)
+
+        assert endpoint.backend is get_backend("memory:catalog")
+        assert catalog.tests._ledger_endpoint.backend is endpoint.backend
+        assert endpoint.get_dataframe(output="pl").equals(df)
+        assert endpoint.get_dataframe(output="lazy").collect().equals(df)
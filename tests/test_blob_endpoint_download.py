@@ -1,5 +1,6 @@
 """Tests for BlobEndpoint.download_version_to_local method"""
 
+import json
 import os
 import tempfile
 
@@ -12,7 +13,7 @@ from cfa.dataops.catalog import BlobEndpoint
 def blob_endpoint(mocker, mock_write_blob_stream):
     """Create a BlobEndpoint instance for testing"""
     mocker.patch(
-        "cfa.dataops.catalog.write_blob_stream",
+        "cfa.dataops.backends._write_blob",
         mock_write_blob_stream,
     )
     ledger_location = {
@@ -32,7 +33,7 @@ def blob_endpoint(mocker, mock_write_blob_stream):
 def test_get_version_blobs_ledger_returns_none_version(mocker, mock_write_blob_stream):
     """Ledger endpoints should not fail when no resolved version is set."""
     mocker.patch(
-        "cfa.dataops.catalog.write_blob_stream",
+        "cfa.dataops.backends._write_blob",
         mock_write_blob_stream,
     )
     ledger_endpoint = BlobEndpoint(
@@ -47,7 +48,7 @@ def test_get_version_blobs_ledger_returns_none_version(mocker, mock_write_blob_s
         ns="ledger_endpoint",
     )
     mocker.patch(
-        "cfa.dataops.catalog.walk_blobs_in_container",
+        "cfa.dataops.backends._walk_blobs",
         return_value=[
             {
                 "name": "_access/test/ledger/older.json",
@@ -81,7 +82,7 @@ class TestDownloadVersionToLocal:
             return test_content
 
         mocker.patch(
-            "cfa.dataops.catalog.read_blob_stream",
+            "cfa.dataops.backends._read_blob",
             side_effect=mock_read_blob_stream,
         )
 
@@ -129,7 +130,7 @@ class TestDownloadVersionToLocal:
                 return test_content_2
 
         mocker.patch(
-            "cfa.dataops.catalog.read_blob_stream",
+            "cfa.dataops.backends._read_blob",
             side_effect=mock_read_blob_stream,
         )
 
@@ -179,7 +180,7 @@ class TestDownloadVersionToLocal:
             return test_content
 
         mocker.patch(
-            "cfa.dataops.catalog.read_blob_stream",
+            "cfa.dataops.backends._read_blob",
             side_effect=mock_read_blob_stream,
         )
 
@@ -223,7 +224,7 @@ class TestDownloadVersionToLocal:
             return test_content
 
         mocker.patch(
-            "cfa.dataops.catalog.read_blob_stream",
+            "cfa.dataops.backends._read_blob",
             side_effect=mock_read_blob_stream,
         )
 
@@ -270,7 +271,7 @@ class TestDownloadVersionToLocal:
             return test_content
 
         mocker.patch(
-            "cfa.dataops.catalog.read_blob_stream",
+            "cfa.dataops.backends._read_blob",
             side_effect=mock_read_blob_stream,
         )
 
@@ -317,7 +318,7 @@ class TestDownloadVersionToLocal:
             return test_content
 
         mocker.patch(
-            "cfa.dataops.catalog.read_blob_stream",
+            "cfa.dataops.backends._read_blob",
             side_effect=mock_read_blob_stream,
         )
 
@@ -362,7 +363,7 @@ class TestDownloadVersionToLocal:
             return test_content
 
         mocker.patch(
-            "cfa.dataops.catalog.read_blob_stream",
+            "cfa.dataops.backends._read_blob",
             side_effect=mock_read_blob_stream,
         )
 
@@ -411,7 +412,7 @@ class TestDownloadVersionToLocal:
             return test_content
 
         mocker.patch(
-            "cfa.dataops.catalog.read_blob_stream",
+            "cfa.dataops.backends._read_blob",
             side_effect=mock_read_blob_stream,
         )
 
@@ -462,7 +463,7 @@ class TestDownloadVersionToLocal:
                 return test_content_2
 
         mocker.patch(
-            "cfa.dataops.catalog.read_blob_stream",
+            "cfa.dataops.backends._read_blob",
             side_effect=mock_read_blob_stream,
         )
 
@@ -509,3 +510,157 @@ class TestDownloadVersionToLocal:
             assert os.path.exists(file2)
             with open(file2, "rb") as f:
                 assert f.read() == test_content_2
+
+
+class MockDownloader:
+    """Stands in for a streaming blob downloader"""
+
+    def __init__(self, content: bytes, chunk_size: int = 4):
+        self.content = content
+        self.chunk_size = chunk_size
+
+    def chunks(self):
+        for i in range(0, len(self.content), self.chunk_size):
+            yield self.content[i : i + self.chunk_size]
+
+
+VERSION = "2025-01-01T12-00-00"
+
+
+def _blob(name: str, size: int | None = None, etag: str | None = None) -> dict:
+    blob = {"name": f"test/prefix/{VERSION}/{name}", "creation_time": "2025-01-01"}
+    if size is not None:
+        blob["size"] = size
+    if etag is not None:
+        blob["etag"] = etag
+    return blob
+
+
+class TestDownloadSkipParallelResume:
+    """Tests for skip-before-fetch, parallel and resumable downloads"""
+
+    def test_existing_files_are_not_fetched(self, mocker, blob_endpoint, tmp_path):
+        """Test that no blob is read when local files already match"""
+        read = mocker.patch("cfa.dataops.backends._read_blob")
+        mocker.patch.object(
+            blob_endpoint,
+            "_get_version_blobs",
+            return_value=([_blob("a.csv", size=5)], VERSION),
+        )
+        (tmp_path / VERSION).mkdir()
+        (tmp_path / VERSION / "a.csv").write_bytes(b"12345")
+
+        summary = blob_endpoint.download_version_to_local(
+            local_path=str(tmp_path), return_summary=True
+        )
+
+        read.assert_not_called()
+        assert summary.written is False
+        assert summary.files_skipped == 1
+        assert summary.bytes_skipped == 5
+
+    def test_size_mismatch_is_redownloaded(self, mocker, blob_endpoint, tmp_path):
+        """Test that a local file with a different size is replaced"""
+        mocker.patch("cfa.dataops.backends._read_blob", return_value=b"new data")
+        mocker.patch.object(
+            blob_endpoint,
+            "_get_version_blobs",
+            return_value=([_blob("a.csv", size=8)], VERSION),
+        )
+        (tmp_path / VERSION).mkdir()
+        (tmp_path / VERSION / "a.csv").write_bytes(b"old")
+
+        assert blob_endpoint.download_version_to_local(local_path=str(tmp_path))
+        assert (tmp_path / VERSION / "a.csv").read_bytes() == b"new data"
+
+    def test_parallel_streamed_download(self, mocker, blob_endpoint, tmp_path):
+        """Test that many blobs are streamed concurrently without leftovers"""
+        contents = {f"f{i}.bin": bytes([i]) * (i + 10) for i in range(20)}
+        mocker.patch(
+            "cfa.dataops.backends._read_blob",
+            side_effect=lambda blob_url, **kw: MockDownloader(
+                contents[blob_url.rsplit("/", 1)[-1]]
+            ),
+        )
+        mocker.patch.object(
+            blob_endpoint,
+            "_get_version_blobs",
+            return_value=(
+                [_blob(name, size=len(c)) for name, c in contents.items()],
+                VERSION,
+            ),
+        )
+
+        summary = blob_endpoint.download_version_to_local(
+            local_path=str(tmp_path), max_workers=4, return_summary=True
+        )
+
+        assert summary.files_transferred == 20
+        assert summary.bytes_transferred == sum(len(c) for c in contents.values())
+        for name, content in contents.items():
+            assert (tmp_path / VERSION / name).read_bytes() == content
+        assert sorted(p.name for p in (tmp_path / VERSION).iterdir()) == sorted(
+            contents
+        )
+
+    def test_resume_from_part_file(self, mocker, blob_endpoint, tmp_path):
+        """Test that an interrupted download continues from its .part file"""
+        read = mocker.patch("cfa.dataops.backends._read_blob")
+        client = mocker.patch("cfa.dataops.backends._blob_client")
+        client.return_value.download_blob.return_value = MockDownloader(b"world")
+        mocker.patch.object(
+            blob_endpoint,
+            "_get_version_blobs",
+            return_value=([_blob("a.txt", size=10, etag='"0x1"')], VERSION),
+        )
+        local_file = tmp_path / VERSION / "a.txt"
+        local_file.parent.mkdir()
+        (tmp_path / VERSION / "a.txt.part").write_bytes(b"hello")
+        (tmp_path / VERSION / "a.txt.part.json").write_text(
+            json.dumps({"etag": '"0x1"', "size": 10})
+        )
+
+        summary = blob_endpoint.download_version_to_local(
+            local_path=str(tmp_path), return_summary=True
+        )
+
+        read.assert_not_called()
+        client.return_value.download_blob.assert_called_once_with(offset=5)
+        assert local_file.read_bytes() == b"helloworld"
+        assert summary.bytes_transferred == 5
+        assert [p.name for p in local_file.parent.iterdir()] == ["a.txt"]
+
+    def test_changed_blob_restarts_part_file(self, mocker, blob_endpoint, tmp_path):
+        """Test that a .part file of a different blob version is discarded"""
+        mocker.patch("cfa.dataops.backends._read_blob", return_value=b"helloworld")
+        client = mocker.patch("cfa.dataops.backends._blob_client")
+        mocker.patch.object(
+            blob_endpoint,
+            "_get_version_blobs",
+            return_value=([_blob("a.txt", size=10, etag='"0x2"')], VERSION),
+        )
+        (tmp_path / VERSION).mkdir()
+        (tmp_path / VERSION / "a.txt.part").write_bytes(b"stale")
+        (tmp_path / VERSION / "a.txt.part.json").write_text(
+            json.dumps({"etag": '"0x1"', "size": 10})
+        )
+
+        blob_endpoint.download_version_to_local(local_path=str(tmp_path))
+
+        client.assert_not_called()
+        assert (tmp_path / VERSION / "a.txt").read_bytes() == b"helloworld"
+
+    def test_truncated_download_is_not_renamed(self, mocker, blob_endpoint, tmp_path):
+        """Test that a short read leaves no final file behind"""
+        mocker.patch("cfa.dataops.backends._read_blob", return_value=b"hel")
+        mocker.patch.object(
+            blob_endpoint,
+            "_get_version_blobs",
+            return_value=([_blob("a.txt", size=10, etag='"0x1"')], VERSION),
+        )
+
+        with pytest.raises(OSError, match="Incomplete download"):
+            blob_endpoint.download_version_to_local(local_path=str(tmp_path))
+
+        assert not (tmp_path / VERSION / "a.txt").exists()
+        assert (tmp_path / VERSION / "a.txt.part").exists()
@@ -8,14 +8,14 @@ import pandas as pd
 import polars as pl
 import pytest
 
-from cfa.dataops.catalog import BlobEndpoint, dict_to_sn
+from cfa.dataops.catalog import BlobEndpoint, _stream_record_batches, dict_to_sn
 
 
 @pytest.fixture
 def blob_endpoint(mocker, mock_write_blob_stream):
     """Create a BlobEndpoint instance for testing"""
     mocker.patch(
-        "cfa.dataops.catalog.write_blob_stream",
+        "cfa.dataops.backends._write_blob",
         mock_write_blob_stream,
     )
     ledger_location = {
@@ -434,6 +434,220 @@ class TestSaveDirToBlob:
                 assert isinstance(call[1]["file_buffer"], bytes)
 
 
+def _parquet_metadata(pq_bytes: bytes):
+    import pyarrow.parquet as pq
+
+    return pq.ParquetFile(BytesIO(pq_bytes)).metadata
+
+
+class TestParquetOptions:
+    """Tests for configurable parquet encoding"""
+
+    def test_default_compression_is_snappy(
+        self, mocker, blob_endpoint, sample_pandas_df
+    ):
+        """Test that endpoints without parquet options keep snappy compression"""
+        mock_write = mocker.patch.object(blob_endpoint, "write_blob")
+
+        blob_endpoint.save_dataframe(df=sample_pandas_df, path_after_prefix="data/out")
+
+        meta = _parquet_metadata(mock_write.call_args[1]["file_buffer"])
+        assert meta.row_group(0).column(0).compression == "SNAPPY"
+
+    @pytest.mark.parametrize("lib", ["pandas", "polars"])
+    def test_call_options_override_endpoint(
+        self, mocker, blob_endpoint, sample_pandas_df, sample_polars_df, lib
+    ):
+        """Test that parquet_options passed to save_dataframe are applied"""
+        mock_write = mocker.patch.object(blob_endpoint, "write_blob")
+        df = sample_pandas_df if lib == "pandas" else sample_polars_df
+
+        blob_endpoint.save_dataframe(
+            df=df,
+            path_after_prefix="data/out",
+            parquet_options={
+                "compression": "zstd",
+                "compression_level": 5,
+                "row_group_size": 2,
+                "use_dictionary": False,
+            },
+        )
+
+        meta = _parquet_metadata(mock_write.call_args[1]["file_buffer"])
+        assert meta.num_row_groups == 3
+        assert meta.row_group(0).column(0).compression == "ZSTD"
+        assert blob_endpoint.parquet_options["compression"] == "snappy"
+
+    def test_stage_options_override_catalog_defaults(
+        self, mocker, mock_write_blob_stream, dataset_defaults, tmp_path
+    ):
+        """Test that stage parquet tables take precedence over catalog defaults"""
+        config_path = tmp_path / "pq_test.toml"
+        config_path.write_text(
+            """
+[properties]
+name = "pq_test"
+type = "etl"
+
+[extract]
+account = "account_test"
+container = "container_test"
+prefix = "raw/pq_test"
+
+[load]
+account = "account_test"
+container = "container_test"
+prefix = "transformed/pq_test"
+parquet = {compression = "gzip"}
+"""
+        )
+        defaults = {
+            **dataset_defaults,
+            "parquet": {"compression": "zstd", "write_page_index": True},
+        }
+        datacat = dict_to_sn({"space": {"pq_test": str(config_path)}}, defaults)
+
+        assert datacat.space.pq_test.extract.parquet_options["compression"] == "zstd"
+        assert datacat.space.pq_test.load.parquet_options["compression"] == "gzip"
+        assert datacat.space.pq_test.load.parquet_options["write_page_index"] is True
+
+    def test_invalid_stage_options_raise(self, dataset_defaults, tmp_path):
+        """Test that unknown codecs in a stage table fail config validation"""
+        config_path = tmp_path / "bad_pq.toml"
+        config_path.write_text(
+            """
+[properties]
+name = "bad_pq"
+type = "etl"
+
+[load]
+account = "account_test"
+container = "container_test"
+prefix = "transformed/bad_pq"
+parquet = {compression = "middle-out"}
+"""
+        )
+        with pytest.raises(ValueError, match="Invalid dataset"):
+            dict_to_sn({"space": {"bad_pq": str(config_path)}}, dataset_defaults)
+
+    def test_invalid_call_options_raise(self, blob_endpoint, sample_pandas_df):
+        """Test that invalid parquet_options raise a ValueError"""
+        with pytest.raises(ValueError, match="Invalid parquet options"):
+            blob_endpoint.save_dataframe(
+                df=sample_pandas_df,
+                path_after_prefix="data/out",
+                parquet_options={"row_group_size": 0},
+            )
+
+
+class TestSaveStreamingSources:
+    """Tests for streaming LazyFrame, RecordBatchReader and DuckDB writes"""
+
+    @pytest.fixture
+    def captured(self, mocker, blob_endpoint):
+        written = {}
+
+        def fake_write_blob(file_buffer, path_after_prefix, auto_version=False):
+            assert auto_version is False
+            written[path_after_prefix] = file_buffer
+
+        mocker.patch.object(blob_endpoint, "write_blob", side_effect=fake_write_blob)
+        return written
+
+    def test_lazyframe_is_split_into_parts(self, blob_endpoint, captured):
+        """Test that a LazyFrame is written as bounded part files"""
+        lf = pl.LazyFrame({"a": list(range(25)), "b": [str(i) for i in range(25)]})
+
+        blob_endpoint.save_dataframe(
+            lf, path_after_prefix="v1/data.parquet", rows_per_file=10
+        )
+
+        assert list(captured) == [
+            "v1/data_00000.parquet",
+            "v1/data_00001.parquet",
+            "v1/data_00002.parquet",
+        ]
+        parts = [pl.read_parquet(BytesIO(b)) for b in captured.values()]
+        assert [p.height for p in parts] == [10, 10, 5]
+        assert pl.concat(parts).equals(lf.collect())
+
+    def test_lazyframe_without_collect_batches(self, monkeypatch, mocker):
+        """Test that older polars collect a LazyFrame one slice at a time"""
+        monkeypatch.delattr(pl.LazyFrame, "collect_batches")
+        lf = pl.LazyFrame({"a": list(range(25))})
+        expected = lf.collect()
+        collect = mocker.spy(pl.LazyFrame, "collect")
+
+        schema, batches = _stream_record_batches(lf, batch_size=10)
+        batches = list(batches)
+
+        assert schema.names == ["a"]
+        assert [b.num_rows for b in batches] == [10, 10, 5]
+        assert pl.from_arrow(batches).equals(expected)
+        # the schema, three slices and the empty slice ending the stream
+        assert collect.call_count == 5
+        assert all(call.args[0] is not lf for call in collect.call_args_list)
+
+    def test_record_batch_reader_csv(self, blob_endpoint, captured):
+        """Test that a RecordBatchReader can be streamed to CSV parts"""
+        pa = pytest.importorskip("pyarrow")
+        table = pa.table({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+        reader = pa.RecordBatchReader.from_batches(table.schema, table.to_batches(1))
+
+        blob_endpoint.save_dataframe(
+            reader, path_after_prefix="v1/data", file_format="csv", rows_per_file=2
+        )
+
+        assert list(captured) == ["v1/data_00000.csv", "v1/data_00001.csv"]
+        df = pl.concat([pl.read_csv(BytesIO(b)) for b in captured.values()])
+        assert df["a"].to_list() == [1, 2, 3]
+
+    def test_duckdb_relation_jsonl(self, blob_endpoint, captured):
+        """Test that a DuckDB relation can be streamed to JSONL"""
+        duckdb = pytest.importorskip("duckdb")
+        rel = duckdb.sql("select range as a from range(5)")
+
+        blob_endpoint.save_dataframe(
+            rel, path_after_prefix="v1/data.json", file_format="json"
+        )
+
+        assert list(captured) == ["v1/data_00000.jsonl"]
+        assert pl.read_ndjson(BytesIO(captured["v1/data_00000.jsonl"])).height == 5
+
+    def test_auto_version_shared_by_parts(self, mocker, blob_endpoint, captured):
+        """Test that all parts of a stream land in the same version"""
+        mocker.patch(
+            "cfa.dataops.catalog.get_timestamp",
+            side_effect=["2025-01-01T00-00-00", "2025-01-01T00-00-01"],
+        )
+        lf = pl.LazyFrame({"a": list(range(4))})
+
+        blob_endpoint.save_dataframe(
+            lf, path_after_prefix="data", auto_version=True, rows_per_file=2
+        )
+
+        assert list(captured) == [
+            "2025-01-01T00-00-00/data_00000.parquet",
+            "2025-01-01T00-00-00/data_00001.parquet",
+        ]
+
+    def test_empty_source_writes_schema_only_part(self, blob_endpoint, captured):
+        """Test that an empty stream writes one empty part with the schema"""
+        lf = pl.LazyFrame({"a": [1, 2]}).filter(pl.col("a") > 5)
+
+        blob_endpoint.save_dataframe(lf, path_after_prefix="v1/data")
+
+        assert list(captured) == ["v1/data_00000.parquet"]
+        df = pl.read_parquet(BytesIO(captured["v1/data_00000.parquet"]))
+        assert df.height == 0
+        assert df.columns == ["a"]
+
+    def test_unsupported_type_raises(self, blob_endpoint):
+        """Test that unsupported inputs raise a TypeError"""
+        with pytest.raises(TypeError, match="Unsupported dataframe type"):
+            blob_endpoint.save_dataframe([{"a": 1}], path_after_prefix="v1/data")
+
+
 class TestSaveMethodsIntegration:
     """Integration tests using the full catalog structure"""
 
@@ -444,7 +658,7 @@ class TestSaveMethodsIntegration:
         datacat = dict_to_sn(dataset_ns_map, dataset_defaults)
 
         mocker.patch(
-            "cfa.dataops.catalog.write_blob_stream",
+            "cfa.dataops.backends._write_blob",
             mock_write_blob_stream,
         )
 
@@ -465,7 +679,7 @@ class TestSaveMethodsIntegration:
         datacat = dict_to_sn(dataset_ns_map, dataset_defaults)
 
         mocker.patch(
-            "cfa.dataops.catalog.write_blob_stream",
+            "cfa.dataops.backends._write_blob",
             mock_write_blob_stream,
         )
 
@@ -9,6 +9,7 @@ from cfa.dataops.command import (
     _get_stages_list,
     _get_versions_list,
 )
+from cfa.dataops.index import DatasetIndexEntry
 
 
 @pytest.fixture
@@ -52,14 +53,28 @@ def mock_datacat(mocker):
         ],
     )
 
-    mocker.patch("cfa.dataops.command.datacat", catalog)
+    mocker.patch("cfa.dataops.command._datacat", return_value=catalog)
     return catalog
 
 
+@pytest.fixture
+def mock_index(mocker, mock_datacat):
+    """Create a mock dataset index matching the mock datacat"""
+    index = {
+        "test.dataset1": DatasetIndexEntry(
+            "test.dataset1", "dataset1.toml", ("extract", "load", "stage_01")
+        ),
+        "test.dataset2": DatasetIndexEntry("test.dataset2", "dataset2.toml", ()),
+        "prod.dataset1": DatasetIndexEntry("prod.dataset1", "dataset1.toml", ()),
+    }
+    mocker.patch("cfa.dataops.command._dataset_index", return_value=index)
+    return index
+
+
 class TestGetDatasetNamespaces:
     """Tests for _get_dataset_namespaces helper function"""
 
-    def test_get_dataset_namespaces(self, mock_datacat):
+    def test_get_dataset_namespaces(self, mock_index):
         """Test getting dataset namespaces"""
         result = _get_dataset_namespaces()
 
@@ -72,7 +87,7 @@ class TestGetDatasetNamespaces:
 class TestGetStagesList:
     """Tests for _get_stages_list helper function"""
 
-    def test_get_stages_list_valid_dataset(self, mock_datacat, capsys):
+    def test_get_stages_list_valid_dataset(self, mock_index, capsys):
         """Test getting stages for a valid dataset"""
         result = _get_stages_list("test.dataset1")
 
@@ -85,7 +100,7 @@ class TestGetStagesList:
         # Verify stages are sorted
         assert result == sorted(result)
 
-    def test_get_stages_list_invalid_dataset(self, mock_datacat, capsys):
+    def test_get_stages_list_invalid_dataset(self, mock_index, capsys):
         """Test getting stages for invalid dataset prints error"""
         result = _get_stages_list("nonexistent.dataset")
 
@@ -96,19 +111,14 @@ class TestGetStagesList:
         assert "Error" in captured.out
         assert "Dataset namespace 'nonexistent.dataset' not found" in captured.out
 
-    def test_get_stages_list_filters_correct_prefixes(self, mock_datacat):
+    def test_get_stages_list_filters_correct_prefixes(self, mock_index):
         """Test that only stages with correct prefixes are returned"""
-        # Add a mock dataset with various keys
-        mock_dataset = MagicMock()
-        mock_dataset.__dict__ = {
-            "extract": MagicMock(),
-            "load": MagicMock(),
-            "stage_01": MagicMock(),
-            "stage_02": MagicMock(),
-            "config": {},  # Should be filtered
-            "metadata": {},  # Should be filtered
-        }
-        mock_datacat.test.dataset2 = mock_dataset
+        # Add a dataset with various keys
+        mock_index["test.dataset2"] = DatasetIndexEntry(
+            "test.dataset2",
+            "dataset2.toml",
+            ("extract", "load", "stage_01", "stage_02", "config", "metadata"),
+        )
 
         result = _get_stages_list("test.dataset2")
 
@@ -123,7 +133,7 @@ class TestGetStagesList:
 class TestGetVersionsList:
     """Tests for _get_versions_list helper function"""
 
-    def test_get_versions_list_valid_stage(self, mock_datacat, capsys):
+    def test_get_versions_list_valid_stage(self, mock_index, capsys):
         """Test getting versions for a valid stage"""
         result = _get_versions_list("test.dataset1", "load")
 
@@ -131,7 +141,7 @@ class TestGetVersionsList:
         assert "2025-01-02T12-00-00" in result
         assert "2025-01-01T12-00-00" in result
 
-    def test_get_versions_list_invalid_stage(self, mock_datacat, capsys):
+    def test_get_versions_list_invalid_stage(self, mock_index, capsys):
         """Test getting versions for invalid stage prints error"""
         result = _get_versions_list("test.dataset1", "nonexistent_stage")
 
@@ -146,18 +156,14 @@ class TestGetVersionsList:
 class TestHelperFunctionsIntegration:
     """Integration tests for command helper functions"""
 
-    def test_stages_sorted_alphabetically(self, mock_datacat):
+    def test_stages_sorted_alphabetically(self, mock_index):
         """Test that stages are returned in sorted order"""
         # Create a dataset with unsorted stages
-        mock_dataset = MagicMock()
-        mock_dataset.__dict__ = {
-            "stage_03": MagicMock(),
-            "load": MagicMock(),
-            "stage_01": MagicMock(),
-            "extract": MagicMock(),
-            "stage_02": MagicMock(),
-        }
-        mock_datacat.test.dataset2 = mock_dataset
+        mock_index["test.dataset2"] = DatasetIndexEntry(
+            "test.dataset2",
+            "dataset2.toml",
+            ("stage_03", "load", "stage_01", "extract", "stage_02"),
+        )
 
         result = _get_stages_list("test.dataset2")
 
@@ -169,3 +175,97 @@ class TestHelperFunctionsIntegration:
             "stage_03",
         ]
         assert result == expected_order
+
+
+class TestResolve:
+    """Tests for resolving endpoints by dotted namespace"""
+
+    def test_resolves_without_eval(self, mock_index):
+        from cfa.dataops.command import _resolve
+
+        assert _resolve("test.dataset1.load").get_versions()[0] == (
+            "2025-01-02T12-00-00"
+        )
+        with pytest.raises(AttributeError, match="Invalid namespace"):
+            _resolve("test.dataset1.load.get_versions()")
+
+    def test_versions_from_daemon(self, mock_index, mock_datacat):
+        from cfa.dataops.command import _get_versions_list
+
+        daemon = MagicMock()
+        daemon.versions.return_value = ["2025-03-01T00-00-00"]
+
+        result = _get_versions_list("test.dataset1", "load", daemon=daemon)
+
+        assert result == ["2025-03-01T00-00-00"]
+        daemon.versions.assert_called_once_with("test.dataset1", "load")
+        mock_datacat.test.dataset1.load.get_versions.assert_not_called()
+
+    def test_falls_back_when_the_daemon_fails(self, mock_index, mock_datacat):
+        from cfa.dataops.command import _get_versions_list
+        from cfa.dataops.daemon import DaemonUnavailable
+
+        daemon = MagicMock()
+        daemon.versions.side_effect = DaemonUnavailable("Lost the dataops daemon")
+
+        result = _get_versions_list("test.dataset1", "load", daemon=daemon)
+
+        assert result[0] == "2025-01-02T12-00-00"
+        daemon.close.assert_called_once()
+
+
+class TestVersionReportCommand:
+    """Tests for dataops_versions --all"""
+
+    def test_writes_parquet(self, mock_datacat, mocker, tmp_path):
+        import polars as pl
+
+        from cfa.dataops.command import get_dataset_versions
+
+        report = pl.DataFrame({"dataset": ["test.dataset1"], "stage": ["load"]})
+        mock_datacat.version_report = MagicMock(return_value=report)
+        output = tmp_path / "versions.parquet"
+        mocker.patch(
+            "sys.argv",
+            [
+                "dataops_versions",
+                "--all",
+                "-p",
+                "test",
+                "-f",
+                "parquet",
+                "-o",
+                str(output),
+            ],
+        )
+
+        get_dataset_versions()
+
+        mock_datacat.version_report.assert_called_once_with(
+            prefix="test", max_workers=32, output="polars"
+        )
+        assert pl.read_parquet(output).equals(report)
+
+    def test_json_to_stdout(self, mock_datacat, mocker, capsys):
+        import polars as pl
+
+        from cfa.dataops.command import get_dataset_versions
+
+        mock_datacat.version_report = MagicMock(
+            return_value=pl.DataFrame({"dataset": ["test.dataset1"], "versions": [2]})
+        )
+        mocker.patch("sys.argv", ["dataops_versions", "--all"])
+
+        get_dataset_versions()
+
+        assert capsys.readouterr().out.strip() == (
+            '[{"dataset":"test.dataset1","versions":2}]'
+        )
+
+    def test_parquet_requires_output(self, mock_datacat, mocker):
+        from cfa.dataops.command import get_dataset_versions
+
+        mocker.patch("sys.argv", ["dataops_versions", "--all", "-f", "parquet"])
+
+        with pytest.raises(SystemExit):
+            get_dataset_versions()
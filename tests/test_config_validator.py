@@ -1,8 +1,20 @@
+import copy
+import os
+import tempfile
 import unittest
+from unittest import mock
 
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
-from cfa.dataops.config_validator import ConfigValidator
+from cfa.dataops.config_validator import (
+    CatalogValidationError,
+    ConfigValidator,
+    DatasetConfigValidation,
+    PropertiesValidation,
+    _validator_version,
+    validate_catalog,
+    validation_cache,
+)
 
 
 class TestConfigValidator(unittest.TestCase):
@@ -71,3 +83,95 @@ class TestConfigValidator(unittest.TestCase):
 
         validated = ConfigValidator(**config)
         self.assertIsInstance(validated, ConfigValidator)
+
+    def test_source_fields_are_open_ended(self):
+        """Test that source types and formats not read by run_extract still
+        validate."""
+        config = self.good_config.copy()
+        config["source"] = {"url": "https://data.xlsx", "type": "api", "format": "xlsx"}
+
+        validated = ConfigValidator(**config)
+        self.assertEqual(validated.source.type, "api")
+        self.assertEqual(validated.source.format, "xlsx")
+
+
+class TestValidateCatalog(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        env = mock.patch.dict(os.environ, {"DATAOPS_CACHE_DIR": self.cache_dir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+        self.addCleanup(validation_cache.clear)
+        validation_cache.clear()
+        # reuse the valid configuration of TestConfigValidator
+        TestConfigValidator.setUp(self)
+
+    def test_collects_all_errors(self):
+        """Test that every error of every config is reported."""
+        bad_a = copy.deepcopy(self.good_config)
+        bad_a["stage_00"] = {"account": "test_account"}
+        bad_a["properties"]["type"] = "unknown"
+        bad_b = copy.deepcopy(self.good_config)
+        del bad_b["load"]["prefix"]
+
+        with self.assertRaises(CatalogValidationError) as ctx:
+            validate_catalog(
+                {"a.toml": bad_a, "b.toml": bad_b, "ok.toml": self.good_config}
+            )
+
+        errors = ctx.exception.errors
+        self.assertEqual(set(errors), {"a.toml", "b.toml"})
+        self.assertIn(("stage_00", "prefix"), [e["loc"] for e in errors["a.toml"]])
+        self.assertIn(("properties", "type"), [e["loc"] for e in errors["a.toml"]])
+        self.assertEqual([e["loc"] for e in errors["b.toml"]], [("load", "prefix")])
+        self.assertIsInstance(ctx.exception, ValueError)
+        self.assertIn("Invalid dataset b.toml", str(ctx.exception))
+
+    def test_valid_configs_are_cached(self):
+        """Test that unchanged valid configs are not validated again."""
+        validate_catalog({"a.toml": self.good_config})
+        validation_cache.clear()  # reload from disk, as a new process would
+
+        with mock.patch("cfa.dataops.config_validator._catalog_adapter") as adapter:
+            validate_catalog({"a.toml": self.good_config})
+            adapter.validate_python.assert_not_called()
+
+            changed = copy.deepcopy(self.good_config)
+            changed["load"]["prefix"] = "changed"
+            validate_catalog({"a.toml": changed})
+            adapter.validate_python.assert_called_once()
+
+    def test_schema_changes_invalidate_the_cache(self):
+        """Test that configs cached as valid are validated again under a
+        changed schema."""
+
+        class StricterProperties(PropertiesValidation):
+            owner: str
+
+        class StricterConfig(DatasetConfigValidation):
+            properties: StricterProperties
+
+        validate_catalog({"a.toml": self.good_config})
+        validation_cache.clear()  # reload from disk, as a new process would
+        adapter = TypeAdapter(dict[str, StricterConfig])
+        version = _validator_version(adapter)
+        self.assertNotEqual(version, _validator_version())
+
+        with (
+            mock.patch("cfa.dataops.config_validator._catalog_adapter", adapter),
+            mock.patch("cfa.dataops.config_validator._VALIDATOR_VERSION", version),
+        ):
+            with self.assertRaises(CatalogValidationError) as ctx:
+                validate_catalog({"a.toml": self.good_config})
+        self.assertIn(
+            ("properties", "owner"), [e["loc"] for e in ctx.exception.errors["a.toml"]]
+        )
+
+    def test_invalid_configs_are_not_cached(self):
+        """Test that an invalid config fails every time."""
+        bad = copy.deepcopy(self.good_config)
+        bad["extract"] = {"account": "test_account"}
+        for _ in range(2):
+            with self.assertRaises(CatalogValidationError):
+                validate_catalog({"a.toml": bad})
@@ -0,0 +1,219 @@
+"""Tests for the dataops daemon and its client"""
+
+import os
+import shutil
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from cfa.dataops.catalog import DownloadSummary
+from cfa.dataops.daemon import (
+    DaemonClient,
+    DaemonError,
+    DaemonUnavailable,
+    DataopsDaemon,
+    connect_daemon,
+)
+
+
+@pytest.fixture
+def socket_path():
+    # Unix socket paths are limited to ~100 characters, too short for tmp_path
+    directory = tempfile.mkdtemp(prefix="dod")
+    yield os.path.join(directory, "daemon.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def catalog():
+    load = MagicMock()
+    load.get_versions.return_value = ["2025-01-02", "2025-01-01"]
+    load.download_version_to_local.return_value = DownloadSummary(
+        version="2025-01-02",
+        files_transferred=2,
+        files_skipped=0,
+        bytes_transferred=10,
+        bytes_skipped=0,
+    )
+    dataset = SimpleNamespace(
+        stages=["extract", "load"], load=load, extract=MagicMock()
+    )
+    return SimpleNamespace(
+        team=SimpleNamespace(dataset=dataset),
+        __namespace_list__=["team.dataset"],
+        __environment__=MagicMock(),
+    )
+
+
+@pytest.fixture
+def daemon(socket_path, catalog):
+    daemon = DataopsDaemon(socket_path, catalog=catalog)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(200):
+        if os.path.exists(socket_path):
+            break
+        threading.Event().wait(0.01)
+    yield daemon
+    daemon.stop()
+    thread.join(5)
+
+
+@pytest.fixture
+def client(daemon):
+    with DaemonClient(daemon.socket_path, timeout=5) as client:
+        yield client
+
+
+class TestDaemon:
+    """Tests for requests served by the daemon"""
+
+    def test_catalog_requests(self, client):
+        assert client.ping()["pid"] == os.getpid()
+        assert client.datasets() == ["team.dataset"]
+        assert client.stages("team.dataset") == ["extract", "load"]
+
+    def test_versions_are_cached(self, client, catalog):
+        load = catalog.team.dataset.load
+
+        assert client.versions("team.dataset", "load") == ["2025-01-02", "2025-01-01"]
+        client.versions("team.dataset", "load")
+        assert load.get_versions.call_count == 1
+
+        client.versions("team.dataset", "load", refresh=True)
+        assert load.get_versions.call_count == 2
+
+        assert client.refresh() == {"cleared_versions": 1}
+        catalog.__environment__.refresh.assert_called_once()
+        client.versions("team.dataset", "load")
+        assert load.get_versions.call_count == 3
+
+    def test_versions_ttl(self, client, daemon, catalog):
+        daemon.versions_ttl = 0
+        client.versions("team.dataset", "load")
+        client.versions("team.dataset", "load")
+        assert catalog.team.dataset.load.get_versions.call_count == 2
+
+    def test_download(self, client, catalog):
+        summary = client.download(
+            "team.dataset", "load", "/tmp/out", version_spec="2025-01-02"
+        )
+
+        assert summary["files_transferred"] == 2
+        catalog.team.dataset.load.download_version_to_local.assert_called_once_with(
+            "/tmp/out",
+            version_spec="2025-01-02",
+            force=False,
+            selection="newest",
+            max_workers=8,
+            return_summary=True,
+        )
+
+    def test_errors_are_raised_in_the_client(self, client):
+        with pytest.raises(DaemonError, match="Invalid namespace") as e:
+            client.versions("team.dataset", "load.get_versions()")
+        assert e.value.error_type == "AttributeError"
+
+        with pytest.raises(DaemonError, match="Unknown daemon method"):
+            client.call("eval", source="1")
+
+        # the connection is still usable after an error
+        assert client.datasets() == ["team.dataset"]
+
+    def test_only_one_daemon_per_socket(self, daemon):
+        with pytest.raises(RuntimeError, match="already running"):
+            DataopsDaemon(daemon.socket_path, catalog=daemon.catalog).serve_forever()
+
+    def test_shutdown(self, client, daemon):
+        assert client.shutdown() is True
+        for _ in range(200):
+            if not os.path.exists(daemon.socket_path):
+                break
+            threading.Event().wait(0.01)
+        assert not os.path.exists(daemon.socket_path)
+
+
+class TestCatalogReload:
+    """Tests for re-importing the catalog when its config files change"""
+
+    def test_reloads_when_config_files_change(self, mocker, socket_path):
+        stats = {"/catalog/datasets/a.toml": (10, 1)}
+        mocker.patch(
+            "cfa.dataops.daemon._catalog_file_stats", side_effect=lambda: dict(stats)
+        )
+        catalogs = [
+            SimpleNamespace(__namespace_list__=["team.a"]),
+            SimpleNamespace(__namespace_list__=["team.a", "team.b"]),
+        ]
+        load = mocker.patch("cfa.dataops.daemon._load_catalog", side_effect=catalogs)
+        daemon = DataopsDaemon(socket_path, reload_interval=0)
+
+        assert daemon.handle("datasets", {}) == ["team.a"]
+        assert daemon.handle("datasets", {}) == ["team.a"]
+        stats["/catalog/datasets/b.toml"] = (12, 2)
+        assert daemon.handle("datasets", {}) == ["team.a", "team.b"]
+
+        assert load.call_args_list == [
+            mocker.call(reload=False),
+            mocker.call(reload=True),
+        ]
+        assert daemon.handle("ping", {})["reloads"] == 1
+
+    def test_checks_are_throttled(self, mocker, socket_path):
+        file_stats = mocker.patch(
+            "cfa.dataops.daemon._catalog_file_stats", return_value={}
+        )
+        mocker.patch("cfa.dataops.daemon._load_catalog", return_value=MagicMock())
+        daemon = DataopsDaemon(socket_path, reload_interval=60)
+
+        for _ in range(3):
+            daemon.catalog
+
+        assert file_stats.call_count == 1
+
+    def test_passed_in_catalog_is_not_reloaded(self, mocker, socket_path, catalog):
+        file_stats = mocker.patch("cfa.dataops.daemon._catalog_file_stats")
+
+        assert DataopsDaemon(socket_path, catalog=catalog).catalog is catalog
+        file_stats.assert_not_called()
+
+
+class TestConnectDaemon:
+    """Tests for finding a running daemon"""
+
+    def test_connects_to_a_running_daemon(self, daemon):
+        client = connect_daemon(daemon.socket_path)
+        assert client is not None
+        assert client.datasets() == ["team.dataset"]
+        client.close()
+
+    def test_no_daemon(self, socket_path):
+        assert connect_daemon(socket_path) is None
+        with pytest.raises(DaemonUnavailable):
+            DaemonClient(socket_path).ping()
+
+    def test_stale_socket(self, socket_path, catalog):
+        open(socket_path, "w").close()
+        assert connect_daemon(socket_path) is None
+
+        daemon = DataopsDaemon(socket_path, catalog=catalog)
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        try:
+            for _ in range(200):
+                client = connect_daemon(socket_path)
+                if client is not None:
+                    break
+                threading.Event().wait(0.01)
+            assert client.datasets() == ["team.dataset"]
+            client.close()
+        finally:
+            daemon.stop()
+            thread.join(5)
+
+    def test_disabled_by_environment(self, daemon, monkeypatch):
+        monkeypatch.setenv("DATAOPS_NO_DAEMON", "1")
+        assert connect_daemon(daemon.socket_path) is None
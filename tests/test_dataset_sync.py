@@ -0,0 +1,166 @@
+"""Tests for DatasetEndpoint.sync_to_local incremental mirroring"""
+
+import json
+
+import pytest
+
+from cfa.dataops.catalog import dict_to_sn
+
+BRONZE = "prefix_test/bronze/test_dataset"
+SILVER = "prefix_test/silver/test_dataset"
+
+
+@pytest.fixture
+def blob_store(mocker):
+    """An in-memory container of versioned blobs with etags"""
+    store = {
+        f"{BRONZE}/2025-01-01T00-00-00/data.csv": (b"a,b\n1,2\n", '"0x1"'),
+        f"{BRONZE}/2025-01-02T00-00-00/data.csv": (b"a,b\n1,2\n3,4\n", '"0x2"'),
+        f"{BRONZE}/2025-01-02T00-00-00/extra.csv": (b"c\n5\n", '"0x3"'),
+        f"{SILVER}/2025-01-02T00-00-00/data.parquet": (b"PAR1", '"0x4"'),
+        f"{SILVER}/2025-01-02T00-00-00/meta/schema.json": (b"{}", '"0x7"'),
+    }
+    reads = []
+
+    def walk(name_starts_with, account_name, container_name):
+        # hierarchical listing: blobs and virtual directories one level down
+        children = {}
+        for name in store:
+            if name.startswith(name_starts_with):
+                head, sep, _ = name.removeprefix(name_starts_with).partition("/")
+                child = name_starts_with + head + sep
+                children[child] = {"name": child}
+                if not sep:
+                    children[child].update(
+                        creation_time="2025-01-01",
+                        size=len(store[name][0]),
+                        etag=store[name][1],
+                    )
+        return [children[k] for k in sorted(children)]
+
+    def read(blob_url, account_name, container_name):
+        reads.append(blob_url)
+        return store[blob_url][0]
+
+    mocker.patch("cfa.dataops.backends._walk_blobs", side_effect=walk)
+    mocker.patch("cfa.dataops.backends._read_blob", side_effect=read)
+    mocker.patch("cfa.dataops.ledger.LedgerWriter.submit")
+    return store, reads
+
+
+@pytest.fixture
+def dataset(dataset_ns_map, dataset_defaults):
+    return dict_to_sn(dataset_ns_map, dataset_defaults).tests.multistage.multistage_test
+
+
+class TestSyncToLocal:
+    """Tests for mirroring stages and versions to a local directory"""
+
+    def test_initial_sync_mirrors_layout(self, dataset, blob_store, tmp_path):
+        """Test that all versions of all stages are mirrored with a manifest"""
+        summary = dataset.sync_to_local(str(tmp_path))
+
+        assert summary.versions == {
+            "stage_01": ["2025-01-01T00-00-00", "2025-01-02T00-00-00"],
+            "stage_02": ["2025-01-02T00-00-00"],
+            "stage_03": [],
+        }
+        assert summary.files_transferred == 5
+        assert (
+            tmp_path / SILVER / "2025-01-02T00-00-00" / "meta" / "schema.json"
+        ).exists()
+        assert (
+            tmp_path / BRONZE / "2025-01-02T00-00-00" / "data.csv"
+        ).read_bytes() == b"a,b\n1,2\n3,4\n"
+        manifest = json.loads((tmp_path / ".dataops_manifest.json").read_text())
+        assert manifest["blobs"][f"{SILVER}/2025-01-02T00-00-00/data.parquet"] == {
+            "account": "account_test",
+            "container": "container_test",
+            "fingerprint": '"0x4"',
+            "size": 4,
+        }
+
+    def test_resync_transfers_only_changes(self, dataset, blob_store, tmp_path):
+        """Test that a second sync only fetches new or changed blobs"""
+        store, reads = blob_store
+        dataset.sync_to_local(str(tmp_path))
+        reads.clear()
+        changed = f"{BRONZE}/2025-01-02T00-00-00/extra.csv"
+        added = f"{SILVER}/2025-01-03T00-00-00/data.parquet"
+        store[changed] = (b"c\n6\n7\n", '"0x5"')
+        store[added] = (b"PAR2", '"0x6"')
+
+        summary = dataset.sync_to_local(str(tmp_path))
+
+        assert sorted(reads) == sorted([changed, added])
+        assert summary.files_transferred == 2
+        assert summary.files_skipped == 4
+        assert (tmp_path / changed).read_bytes() == b"c\n6\n7\n"
+
+    def test_locally_removed_file_is_restored(self, dataset, blob_store, tmp_path):
+        _, reads = blob_store
+        dataset.sync_to_local(str(tmp_path))
+        reads.clear()
+        (tmp_path / BRONZE / "2025-01-01T00-00-00" / "data.csv").unlink()
+
+        dataset.sync_to_local(str(tmp_path))
+
+        assert reads == [f"{BRONZE}/2025-01-01T00-00-00/data.csv"]
+
+    def test_stage_version_and_latest_selection(self, dataset, blob_store, tmp_path):
+        summary = dataset.sync_to_local(
+            str(tmp_path), stages=["stage_01"], versions=">=2025-01-01", latest=1
+        )
+
+        assert summary.versions == {"stage_01": ["2025-01-02T00-00-00"]}
+        assert not (tmp_path / BRONZE / "2025-01-01T00-00-00").exists()
+        assert not (tmp_path / SILVER).exists()
+
+    def test_latest_beyond_available_versions(self, dataset, blob_store, tmp_path):
+        """Test that asking for more versions than exist mirrors all of them"""
+        summary = dataset.sync_to_local(str(tmp_path), stages=["stage_01"], latest=3)
+
+        assert summary.versions == {
+            "stage_01": ["2025-01-01T00-00-00", "2025-01-02T00-00-00"]
+        }
+
+    def test_prune_removes_deselected_versions(self, dataset, blob_store, tmp_path):
+        """Test that pruning deletes mirrored files outside the selection"""
+        dataset.sync_to_local(str(tmp_path), stages=["stage_01"])
+
+        summary = dataset.sync_to_local(
+            str(tmp_path), stages=["stage_01"], latest=1, prune=True
+        )
+
+        assert summary.files_deleted == 1
+        assert not (tmp_path / BRONZE / "2025-01-01T00-00-00").exists()
+        manifest = json.loads((tmp_path / ".dataops_manifest.json").read_text())
+        assert sorted(manifest["blobs"]) == [
+            f"{BRONZE}/2025-01-02T00-00-00/data.csv",
+            f"{BRONZE}/2025-01-02T00-00-00/extra.csv",
+        ]
+
+    def test_failed_transfer_keeps_successes(
+        self, mocker, dataset, blob_store, tmp_path
+    ):
+        """Test that successful transfers are recorded when another fails"""
+        store, _ = blob_store
+        bad = f"{BRONZE}/2025-01-02T00-00-00/extra.csv"
+
+        def read(blob_url, account_name, container_name):
+            if blob_url == bad:
+                raise ConnectionError("reset")
+            return store[blob_url][0]
+
+        mocker.patch("cfa.dataops.backends._read_blob", side_effect=read)
+
+        with pytest.raises(RuntimeError, match="1 blobs failed to sync"):
+            dataset.sync_to_local(str(tmp_path), stages=["stage_01"])
+
+        manifest = json.loads((tmp_path / ".dataops_manifest.json").read_text())
+        assert bad not in manifest["blobs"]
+        assert len(manifest["blobs"]) == 2
+
+    def test_unknown_stage_raises(self, dataset, blob_store, tmp_path):
+        with pytest.raises(ValueError, match="Unknown stages"):
+            dataset.sync_to_local(str(tmp_path), stages=["load"])
@@ -12,7 +12,7 @@ class MockBlob:
     def __init__(self, data: bytes):
         self.data = data
 
-    def content_as_bytes(self):
+    def readall(self):
         return self.data
 
 
@@ -49,7 +49,7 @@ def test_datasets_catalog(
     assert datacat.tests.experiment_test.load.account == "account_test"
 
     mocker.patch(
-        "cfa.dataops.catalog.write_blob_stream",
+        "cfa.dataops.backends._write_blob",
         mock_write_blob_stream,
     )
 
@@ -80,7 +80,7 @@ def test_datasets_catalog(
     ]
 
     mocker.patch(
-        "cfa.dataops.catalog.read_blob_stream",
+        "cfa.dataops.backends._read_blob",
         mock_read_blob_stream,
     )
     mocker.patch.object(
@@ -107,7 +107,7 @@ def test_datasets_catalog_get_dataframe_parquet(
     datacat.__setattr__("__namespace_list__", dataset_namespaces)
 
     mocker.patch(
-        "cfa.dataops.catalog.write_blob_stream",
+        "cfa.dataops.backends._write_blob",
         mock_write_blob_stream,
     )
     mocker.patch.object(
@@ -131,7 +131,7 @@ def test_datasets_catalog_get_dataframe_parquet(
         return MockBlob(data)
 
     mocker.patch(
-        "cfa.dataops.catalog.read_blob_stream",
+        "cfa.dataops.backends._read_blob",
         mock_read_blob_stream_parquet_df,
     )
     mocker.patch.object(
@@ -162,7 +162,7 @@ def test_datasets_catalog_resolve_version(
     datacat.__setattr__("__namespace_list__", dataset_namespaces)
 
     mocker.patch(
-        "cfa.dataops.catalog.write_blob_stream",
+        "cfa.dataops.backends._write_blob",
         mock_write_blob_stream,
     )
     mocker.patch.object(
@@ -206,7 +206,7 @@ def test_datasets_catalog_resolve_version_no_match(
     datacat.__setattr__("__namespace_list__", dataset_namespaces)
 
     mocker.patch(
-        "cfa.dataops.catalog.write_blob_stream",
+        "cfa.dataops.backends._write_blob",
         mock_write_blob_stream,
     )
     mocker.patch.object(
@@ -234,7 +234,7 @@ def test_datasets_catalog_get_dataframe_json(
     datacat.__setattr__("__namespace_list__", dataset_namespaces)
 
     mocker.patch(
-        "cfa.dataops.catalog.write_blob_stream",
+        "cfa.dataops.backends._write_blob",
         mock_write_blob_stream,
     )
     mocker.patch.object(
@@ -258,7 +258,7 @@ def test_datasets_catalog_get_dataframe_json(
         return MockBlob(data)
 
     mocker.patch(
-        "cfa.dataops.catalog.read_blob_stream",
+        "cfa.dataops.backends._read_blob",
         mock_read_blob_stream_json_df,
     )
     mocker.patch.object(
@@ -291,7 +291,7 @@ def test_datasets_catalog_get_dataframe_pl_lazy(
     datacat.__setattr__("__namespace_list__", dataset_namespaces)
 
     mocker.patch(
-        "cfa.dataops.catalog.write_blob_stream",
+        "cfa.dataops.backends._write_blob",
         mock_write_blob_stream,
     )
     mocker.patch.object(
@@ -319,7 +319,9 @@ def test_datasets_catalog_get_dataframe_pl_lazy(
     )
 
     # Avoid real auth wiring during test
-    mocker.patch("cfa.dataops.catalog.ManagedIdentityCredential", return_value=object())
+    mocker.patch(
+        "cfa.dataops.backends.ManagedIdentityCredential", return_value=object()
+    )
     mocker.patch(
         "cfa.dataops.catalog.pl.CredentialProviderAzure",
         side_effect=lambda credential: object(),
@@ -342,6 +344,11 @@ def test_datasets_catalog_get_dataframe_pl_lazy(
     assert isinstance(out_pl_lazy, pl.LazyFrame)
     assert isinstance(out_lazy, pl.LazyFrame)
     assert len(scan_calls) == 2
+    # both scans share the pooled credential provider
+    assert (
+        scan_calls[0][1]["credential_provider"]
+        is scan_calls[1][1]["credential_provider"]
+    )
     assert (
         scan_calls[0][0]
         == "az://container_test/prefix_test/transformed/test_dataset/2025-06-03T17-56-50/*.parquet"
@@ -0,0 +1,160 @@
+"""Tests for the on-disk HTTP response cache of soda queries"""
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from cfa.dataops.http_cache import HTTPCache
+from cfa.dataops.soda import AsyncQuery, Query
+
+
+def _etag_transport(data: dict, requests: list):
+    """A mock Socrata endpoint answering conditional requests with 304
+    while ``data["rows"]`` keeps its ``data["etag"]``"""
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == data["etag"]:
+            return httpx.Response(304, headers={"ETag": data["etag"]})
+        return httpx.Response(
+            200,
+            json=data["rows"],
+            headers={
+                "ETag": data["etag"],
+                "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+            },
+        )
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def data():
+    return {"rows": [{"i": 0}, {"i": 1}], "etag": '"v1"'}
+
+
+def _query(data, requests, cache, cls=Query):
+    client_cls = httpx.AsyncClient if cls is AsyncQuery else httpx.Client
+    client = client_cls(transport=_etag_transport(data, requests))
+    return cls("d", "x", verbose=False, client=client, cache=cache)
+
+
+class TestQueryCache:
+    """Tests for Query requests through an HTTPCache"""
+
+    def test_fresh_responses_are_served_without_requests(self, data):
+        requests = []
+        cache = HTTPCache()
+
+        first = _query(data, requests, cache).get_all()
+        second = _query(data, requests, cache).get_all()
+
+        assert first == second == data["rows"]
+        assert len(requests) == 1
+        assert (cache.hits, cache.revalidations, cache.misses) == (1, 0, 1)
+        assert cache.directory == os.path.join(os.environ["DATAOPS_CACHE_DIR"], "http")
+
+    def test_stale_responses_are_revalidated(self, data):
+        requests = []
+        cache = HTTPCache(ttl=0)
+        query = _query(data, requests, cache)
+
+        query.get_all()
+        assert query.get_all() == data["rows"]
+
+        assert requests[1].headers["If-None-Match"] == '"v1"'
+        assert (
+            requests[1].headers["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+        )
+        assert cache.revalidations == 1
+
+        data.update(rows=[{"i": 2}], etag='"v2"')
+        assert query.get_all() == [{"i": 2}]
+        assert cache.misses == 2
+
+    def test_params_are_part_of_the_key(self, data):
+        requests = []
+        cache = HTTPCache()
+
+        _query(data, requests, cache).get_all()
+        query = _query(data, requests, cache)
+        query.where = "i > 0"
+        query.get_all()
+
+        assert len(requests) == 2
+
+    def test_cache_true_uses_the_defaults(self, data):
+        query = _query(data, [], True)
+
+        assert isinstance(query.cache, HTTPCache)
+        assert query.cache.ttl == 3600
+
+    def test_async_query(self, data):
+        requests = []
+        cache = HTTPCache()
+
+        async def get_twice():
+            query = _query(data, requests, cache, cls=AsyncQuery)
+            return [await query.get_all(), await query.get_all()]
+
+        assert asyncio.run(get_twice()) == [data["rows"], data["rows"]]
+        assert len(requests) == 1
+
+
+class TestHTTPCache:
+    """Tests for storing and evicting responses"""
+
+    def test_least_recently_used_are_evicted(self, tmp_path):
+        cache = HTTPCache(str(tmp_path), max_bytes=35)
+        for i, key in enumerate(["a", "b", "c"]):
+            cache.put(key, f"https://x/{key}", b"x" * 10, {})
+            os.utime(tmp_path / f"{key}.body", (i, i))
+        cache.get("a")
+
+        cache.put("d", "https://x/d", b"x" * 10, {})
+
+        assert cache.get("b") is None
+        assert all(cache.get(key) is not None for key in ["a", "c", "d"])
+        assert cache.size() == 30
+
+    def test_directory_is_scanned_only_past_the_bound(self, tmp_path, mocker):
+        cache = HTTPCache(str(tmp_path), max_bytes=35)
+        entries = mocker.spy(cache, "_entries")
+        evict = mocker.spy(cache, "evict")
+
+        for key in ["a", "b", "c"]:
+            cache.put(key, f"https://x/{key}", b"x" * 10, {})
+        cache.put("a", "https://x/a", b"x" * 10, {})
+
+        assert entries.call_count == 1
+        evict.assert_not_called()
+
+        cache.put("d", "https://x/d", b"x" * 10, {})
+
+        evict.assert_called_once()
+        assert cache.size() == 30
+
+    def test_no_store_responses_are_not_stored(self, tmp_path):
+        cache = HTTPCache(str(tmp_path))
+
+        cache.put("a", "https://x/a", b"{}", {"cache-control": "no-store"})
+
+        assert cache.get("a") is None
+
+    def test_truncated_entries_are_ignored(self, tmp_path):
+        cache = HTTPCache(str(tmp_path))
+        cache.put("a", "https://x/a", b"[1, 2]", {"etag": '"v1"'})
+        (tmp_path / "a.body").write_bytes(b"[1")
+
+        assert cache.get("a") is None
+
+    def test_clear(self, tmp_path):
+        cache = HTTPCache(str(tmp_path))
+        cache.put("a", "https://x/a", b"[]", {})
+
+        cache.clear()
+
+        assert cache.size() == 0
+        assert list(tmp_path.iterdir()) == []
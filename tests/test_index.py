@@ -0,0 +1,106 @@
+"""Tests for the lightweight dataset index used by the CLI"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from cfa.dataops import index
+from cfa.dataops.index import DatasetIndexEntry, load_dataset_index
+
+_here = os.path.abspath(os.path.dirname(__file__))
+_repo_files = os.path.join(
+    _here, "..", "cfa", "dataops", "create_catalog", "repo_files"
+)
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    """An installed catalog 'idxcat' with two datasets."""
+    pkg = tmp_path / "idx_catalogs" / "idxcat"
+    (pkg / "datasets" / "team").mkdir(parents=True)
+    (pkg / "__init__.py").write_text('_catalog_ns = "idxcat"\n')
+    shutil.copy(os.path.join(_repo_files, "datasets", "__init__.py"), pkg / "datasets")
+    (pkg / "datasets" / "etl.toml").write_text(
+        '[properties]\nname = "etl"\ntype = "etl"\n\n'
+        '[extract]\nprefix = "e"\n\n[load]\nprefix = "l"\n'
+    )
+    (pkg / "datasets" / "team" / "multi.toml").write_text(
+        '[properties]\nname = "multi"\ntype = "multistage"\n\n'
+        '[stage_01]\nprefix = "s1"\n\n[stage_02]\nprefix = "s2"\n'
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(
+        index,
+        "get_all_catalogs",
+        lambda: [("idx_catalogs", "idxcat", str(tmp_path / "idx_catalogs"))],
+    )
+    yield pkg
+    _forget_catalog()
+
+
+def _forget_catalog():
+    """Drop the imported catalog, as a new CLI process would not have it."""
+    for name in [m for m in sys.modules if m.startswith("idx_catalogs")]:
+        del sys.modules[name]
+
+
+class TestLoadDatasetIndex:
+    """Tests for building and caching the dataset index"""
+
+    def test_namespaces_and_stages(self, catalog):
+        result = load_dataset_index()
+
+        assert result == {
+            "idxcat.etl": DatasetIndexEntry(
+                "idxcat.etl",
+                str(catalog / "datasets" / "etl.toml"),
+                ("extract", "load"),
+            ),
+            "idxcat.team.multi": DatasetIndexEntry(
+                "idxcat.team.multi",
+                str(catalog / "datasets" / "team" / "multi.toml"),
+                ("stage_01", "stage_02"),
+            ),
+        }
+
+    def test_stages_are_cached_by_file_stat(self, catalog, mocker):
+        load_dataset_index()
+        read = mocker.patch.object(
+            index, "read_config_stages", wraps=index.read_config_stages
+        )
+
+        load_dataset_index()
+        read.assert_not_called()
+
+        config = catalog / "datasets" / "etl.toml"
+        config.write_text(config.read_text() + '\n[stage_99]\nprefix = "x"\n')
+        os.utime(config, ns=(0, os.stat(config).st_mtime_ns + 1_000_000))
+        _forget_catalog()
+        result = load_dataset_index()
+
+        read.assert_called_once_with(str(config))
+        assert result["idxcat.etl"].stages == ("extract", "load", "stage_99")
+
+
+def test_cli_import_skips_the_catalog(tmp_path):
+    """The CLI module imports without the catalog or dataframe libraries."""
+    code = (
+        "import sys, cfa.dataops.command; "
+        "print(sorted(m for m in ['cfa.dataops.catalog', 'pandas', 'polars', "
+        "'pydantic'] if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={
+            **os.environ,
+            "PYTHONPATH": os.path.join(_here, ".."),
+            "DATAOPS_CACHE_DIR": str(tmp_path),
+        },
+    )
+    assert result.stdout.strip() == "[]"
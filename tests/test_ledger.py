@@ -0,0 +1,354 @@
+"""Tests for the access ledger writer, compaction and queries"""
+
+import json
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+
+import polars as pl
+import pytest
+
+from cfa.dataops.backends import get_backend
+from cfa.dataops.catalog import BlobEndpoint, LedgerEndpoint, dict_to_sn
+from cfa.dataops.ledger import LedgerWriter, get_ledger_writer
+
+LOCATION = {"account": "acc", "container": "cont", "path": "_access/ledger/day.jsonl"}
+
+
+@pytest.fixture
+def captured_writes(mocker):
+    """Capture append-blob writes made by ledger writers"""
+    writes = []
+
+    def fake_write_blob_stream(data, blob_url, account_name, container_name, **kw):
+        writes.append(
+            {
+                "lines": data.decode("utf-8").splitlines(),
+                "blob_url": blob_url,
+                "account": account_name,
+                "container": container_name,
+                **kw,
+            }
+        )
+
+    mocker.patch("cfa.dataops.backends._write_blob", side_effect=fake_write_blob_stream)
+    return writes
+
+
+class TestLedgerWriter:
+    """Tests for LedgerWriter batching and backpressure"""
+
+    def test_batches_by_count(self, captured_writes):
+        """Test that a full batch is written as one append"""
+        writer = LedgerWriter(batch_size=3, flush_interval=60)
+        for i in range(3):
+            assert writer.submit(LOCATION, {"i": i})
+        deadline = time.monotonic() + 5
+        while not captured_writes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+
+        assert len(captured_writes) == 1
+        assert [json.loads(line)["i"] for line in captured_writes[0]["lines"]] == [
+            0,
+            1,
+            2,
+        ]
+        assert captured_writes[0]["append_blob"] is True
+        assert captured_writes[0]["overwrite"] is False
+
+    def test_flushes_by_interval(self, captured_writes):
+        """Test that a partial batch is written after the flush interval"""
+        writer = LedgerWriter(batch_size=100, flush_interval=0.05)
+        writer.submit(LOCATION, {"i": 0})
+        deadline = time.monotonic() + 5
+        while not captured_writes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+
+        assert len(captured_writes) == 1
+
+    def test_flush_groups_by_ledger_file(self, captured_writes):
+        """Test that explicit flushes write one append per ledger file"""
+        writer = LedgerWriter(batch_size=100, flush_interval=60)
+        other = {**LOCATION, "path": "_access/ledger/other.jsonl"}
+        writer.submit(LOCATION, {"i": 0})
+        writer.submit(other, {"i": 1})
+        writer.submit(LOCATION, {"i": 2})
+
+        assert writer.flush(timeout=5)
+        writer.close()
+
+        by_path = {w["blob_url"]: len(w["lines"]) for w in captured_writes}
+        assert by_path == {
+            "_access/ledger/day.jsonl": 2,
+            "_access/ledger/other.jsonl": 1,
+        }
+
+    def test_drops_when_queue_full(self, mocker):
+        """Test that entries are dropped rather than blocking when full"""
+        release = threading.Event()
+        mocker.patch(
+            "cfa.dataops.backends._write_blob",
+            side_effect=lambda *a, **k: release.wait(5),
+        )
+        writer = LedgerWriter(batch_size=1, flush_interval=60, max_queue=1)
+        results = [writer.submit(LOCATION, {"i": i}) for i in range(5)]
+        release.set()
+        writer.close()
+
+        assert not all(results)
+        assert writer.dropped == results.count(False)
+
+    def test_write_errors_do_not_raise(self, mocker):
+        """Test that storage errors are logged and do not kill the writer"""
+        mocker.patch(
+            "cfa.dataops.backends._write_blob",
+            side_effect=RuntimeError("storage down"),
+        )
+        writer = LedgerWriter(batch_size=1, flush_interval=60)
+        writer.submit(LOCATION, {"i": 0})
+
+        assert writer.flush(timeout=5)
+        assert writer.submit(LOCATION, {"i": 1})
+        writer.close()
+
+    def test_closed_writer_rejects_entries(self, captured_writes):
+        writer = LedgerWriter()
+        writer.close()
+
+        assert writer.submit(LOCATION, {"i": 0}) is False
+
+    def test_invalid_settings_raise(self):
+        with pytest.raises(ValueError, match="on_full"):
+            LedgerWriter(on_full="wait")
+        with pytest.raises(ValueError, match="positive"):
+            LedgerWriter(batch_size=0)
+
+    def test_get_ledger_writer_is_shared(self):
+        assert get_ledger_writer(batch_size=7) is get_ledger_writer(batch_size=7)
+        assert get_ledger_writer(batch_size=7) is not get_ledger_writer(batch_size=8)
+
+
+class TestBlobEndpointLedgerEntry:
+    """Tests for BlobEndpoint.ledger_entry queuing"""
+
+    def _endpoint(self, **ledger_settings):
+        return BlobEndpoint(
+            account="account_test",
+            container="container_test",
+            prefix="test/prefix",
+            ledger_location={
+                "account": "ledger_account",
+                "container": "ledger_container",
+                "prefix": "_access/test/ledger/",
+                **ledger_settings,
+            },
+            ns="test.endpoint",
+        )
+
+    def test_ledger_entry_is_queued(self, mocker):
+        """Test that ledger entries are submitted to the shared writer"""
+        submit = mocker.patch("cfa.dataops.ledger.LedgerWriter.submit")
+        mocker.patch("cfa.dataops.catalog.get_date", return_value="2025-01-01")
+
+        self._endpoint(batch_size=5).ledger_entry(action="read")
+
+        location = submit.call_args[1]["location"]
+        entry = submit.call_args[1]["entry"]
+        assert location == {
+            "account": "ledger_account",
+            "container": "ledger_container",
+            "path": "_access/test/ledger/2025-01-01.jsonl",
+            "backend": get_backend("azure"),
+        }
+        assert entry["dataset"] == "test.endpoint"
+        assert entry["action"] == "read"
+
+    def test_ledger_disabled(self, mocker):
+        """Test that enabled = false in [access_ledger] turns recording off"""
+        submit = mocker.patch("cfa.dataops.ledger.LedgerWriter.submit")
+
+        self._endpoint(enabled=False).ledger_entry(action="read")
+
+        submit.assert_not_called()
+
+    def test_write_blob_records_write(self, mocker):
+        """Test that write_blob records a write without a synchronous append"""
+        mocker.patch("cfa.dataops.backends._write_blob")
+        submit = mocker.patch("cfa.dataops.ledger.LedgerWriter.submit")
+
+        self._endpoint().write_blob(b"data", "v1/file.csv")
+
+        assert submit.call_args[1]["entry"]["action"] == "write"
+
+
+def _jsonl(*entries) -> bytes:
+    return "".join(json.dumps(e) + "\n" for e in entries).encode("utf-8")
+
+
+def _entry(timestamp, dataset, username="alice", action="read"):
+    return {
+        "timestamp": timestamp,
+        "username": username,
+        "dataset": dataset,
+        "action": action,
+    }
+
+
+@pytest.fixture
+def ledger_store(mocker):
+    """An in-memory blob container backing LedgerEndpoint"""
+    store = {
+        "_access/cat/ledger/2025-01-15.jsonl": _jsonl(
+            _entry("2025-01-15T10:00:00", "cat_a.team.ds1"),
+            _entry("2025-01-15T11:00:00", "cat_b.ds2", username="bob"),
+        ),
+        "_access/cat/ledger/2025-02-01.jsonl": _jsonl(
+            _entry("2025-02-01T09:00:00", "cat_a.team.ds1", action="write"),
+        ),
+        "_access/cat/ledger/2025-03-02.jsonl": _jsonl(
+            _entry("2025-03-02T08:00:00", "cat_a.team.ds3"),
+        ),
+    }
+    reads = []
+
+    def walk(name_starts_with, account_name, container_name):
+        return [{"name": k} for k in sorted(store) if k.startswith(name_starts_with)]
+
+    def read(blob_url, account_name, container_name):
+        reads.append(blob_url)
+        return store[blob_url]
+
+    def write(data, blob_url, account_name, container_name, **kwargs):
+        store[blob_url] = data
+
+    mocker.patch("cfa.dataops.backends._walk_blobs", side_effect=walk)
+    mocker.patch("cfa.dataops.backends._read_blob", side_effect=read)
+    mocker.patch("cfa.dataops.backends._write_blob", side_effect=write)
+    mocker.patch("cfa.dataops.catalog.get_date", return_value="2025-03-05")
+    return store, reads
+
+
+class TestLedgerEndpoint:
+    """Tests for ledger compaction and partition-pruned queries"""
+
+    @pytest.fixture
+    def ledger(self):
+        return LedgerEndpoint(
+            account="acc", container="cont", prefix="_access/cat/ledger/"
+        )
+
+    def test_compact_partitions_by_month_and_catalog(self, ledger, ledger_store):
+        """Test that complete months are compacted per catalog"""
+        store, _ = ledger_store
+
+        written = ledger.compact()
+
+        assert written == [
+            "_access/cat/ledger_compacted/month=2025-01/catalog=cat_a/ledger.parquet",
+            "_access/cat/ledger_compacted/month=2025-01/catalog=cat_b/ledger.parquet",
+            "_access/cat/ledger_compacted/month=2025-02/catalog=cat_a/ledger.parquet",
+        ]
+        part = pl.read_parquet(BytesIO(store[written[0]]))
+        assert part["dataset"].to_list() == ["cat_a.team.ds1"]
+
+    def test_compact_current_month_and_selected_months(self, ledger, ledger_store):
+        written = ledger.compact(months=["2025-03"], include_current_month=True)
+
+        assert written == [
+            "_access/cat/ledger_compacted/month=2025-03/catalog=cat_a/ledger.parquet"
+        ]
+
+    def test_query_matches_uncompacted(self, ledger, ledger_store):
+        """Test that queries see the same entries before and after compaction"""
+        before = ledger.query(output="pl")
+        ledger.compact()
+        after = ledger.query(output="pl")
+
+        assert before.height == 4
+        assert before.equals(after.select(before.columns))
+
+    def test_days_after_a_mid_month_compaction_are_read(self, ledger, ledger_store):
+        """Test that daily files written after the current month was compacted,
+        and today's file still being appended to, are read raw"""
+        store, _ = ledger_store
+        store["_access/cat/ledger/2025-03-05.jsonl"] = _jsonl(
+            _entry("2025-03-05T08:00:00", "cat_a.ds4"),
+        )
+
+        ledger.compact(include_current_month=True)
+        store["_access/cat/ledger/2025-03-05.jsonl"] += _jsonl(
+            _entry("2025-03-05T09:00:00", "cat_a.ds5"),
+        )
+        store["_access/cat/ledger/2025-03-06.jsonl"] = _jsonl(
+            _entry("2025-03-06T08:00:00", "cat_a.ds6"),
+        )
+        df = ledger.query(since="2025-03-01", output="pl")
+
+        assert "_access/cat/ledger_compacted/month=2025-03/_through=2025-03-02" in store
+        assert df["dataset"].to_list() == [
+            "cat_a.team.ds3",
+            "cat_a.ds4",
+            "cat_a.ds5",
+            "cat_a.ds6",
+        ]
+
+    def test_query_reads_only_relevant_partitions(self, ledger, ledger_store):
+        """Test that since and dataset prune months and catalogs"""
+        ledger.compact()
+        _, reads = ledger_store
+        reads.clear()
+
+        df = ledger.query(since="2025-02-01", dataset="cat_a", output="pl")
+
+        assert df["timestamp"].to_list() == [
+            "2025-02-01T09:00:00",
+            "2025-03-02T08:00:00",
+        ]
+        assert reads == [
+            "_access/cat/ledger_compacted/month=2025-02/catalog=cat_a/ledger.parquet",
+            "_access/cat/ledger/2025-03-02.jsonl",
+        ]
+
+    def test_query_filters(self, ledger, ledger_store):
+        df = ledger.query(user="bob")
+        assert list(df["dataset"]) == ["cat_b.ds2"]
+
+        df = ledger.query(dataset="cat_a.team.ds1", output="pl")
+        assert df.height == 2
+
+        df = ledger.query(since=datetime(2025, 1, 15, 10, 30), output="pl")
+        assert df.height == 3
+
+    def test_hierarchical_listing(self, mocker, ledger, ledger_store):
+        """Test that compacted partitions are found when the listing only
+        returns one directory level at a time"""
+        store, _ = ledger_store
+        ledger.compact()
+
+        def walk(name_starts_with, account_name, container_name):
+            children = set()
+            for name in store:
+                if name.startswith(name_starts_with):
+                    rest = name.removeprefix(name_starts_with)
+                    head, sep, _ = rest.partition("/")
+                    children.add(name_starts_with + head + sep)
+            return [{"name": n} for n in sorted(children)]
+
+        mocker.patch("cfa.dataops.backends._walk_blobs", side_effect=walk)
+
+        partitions, through = ledger._compacted_partitions()
+        assert sorted(partitions) == ["2025-01", "2025-02"]
+        assert through == {"2025-01": "2025-01-15", "2025-02": "2025-02-01"}
+
+    def test_dict_to_sn_uses_ledger_endpoint(self, simple_dataset_ns_map):
+        defaults = {
+            "storage": {"account": "account", "container": "container"},
+            "access_ledger": {"path": "some/path/"},
+        }
+        result = dict_to_sn(simple_dataset_ns_map, defaults)
+
+        assert isinstance(result.space._ledger_endpoint, LedgerEndpoint)
+        assert result.space._ledger_endpoint.is_ledger
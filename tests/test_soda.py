@@ -1,4 +1,15 @@
-from cfa.dataops.soda import Query
+import asyncio
+import json
+import re
+import threading
+import time
+
+import httpx
+import polars as pl
+import pytest
+
+from cfa.dataops.catalog import BlobEndpoint, DatasetEndpoint
+from cfa.dataops.soda import AsyncQuery, Query, _JSONArrayParser, _read_csv_stream
 
 
 def test_build_url():
@@ -24,3 +35,795 @@ def test_build_payload_select_list():
     expected_payload = {"$select": "field1,field2", "$offset": 0}
 
     assert Query._build_payload(select=select) == expected_payload
+
+
+def _socrata_transport(n_rows: int, requests: list):
+    """A mock Socrata endpoint serving rows {"i": 0..n_rows-1}"""
+
+    def handler(request):
+        requests.append(request)
+        params = request.url.params
+        if params.get("$select") == "count(:id)":
+            return httpx.Response(200, json=[{"count_id": str(n_rows)}])
+        offset = int(params["$offset"])
+        limit = int(params.get("$limit", n_rows))
+        rows = [{"i": i} for i in range(offset, min(offset + limit, n_rows))]
+        return httpx.Response(200, json=rows)
+
+    return httpx.MockTransport(handler)
+
+
+def test_shared_client_is_used_for_all_requests():
+    requests = []
+    client = httpx.Client(transport=_socrata_transport(25, requests))
+    query = Query(
+        "data.cdc.gov", "abc123", app_token="token", verbose=False, client=client
+    )
+
+    with query:
+        pages = list(query.get_pages(page_size=10))
+
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert len(requests) == 4
+    assert all(r.headers["X-App-Token"] == "token" for r in requests)
+    # a client passed in is left open for its owner
+    assert not client.is_closed
+    client.close()
+
+
+def test_owned_client_is_reused_and_closed():
+    query = Query("data.cdc.gov", "abc123", timeout=5.0, max_connections=4, http2=False)
+
+    client = query.client
+    assert query.client is client
+    assert client.timeout == httpx.Timeout(5.0)
+
+    query.close()
+    assert client.is_closed
+    assert query.client is not client
+    query.close()
+
+
+class _SlowFirstPages:
+    """A mock Socrata endpoint where earlier pages take longer, recording the
+    peak number of concurrent page requests"""
+
+    def __init__(self, n_rows: int):
+        self.n_rows = n_rows
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def respond(self, request) -> tuple[httpx.Response, float]:
+        params = request.url.params
+        if params.get("$select") == "count(:id)":
+            return httpx.Response(200, json=[{"count_id": str(self.n_rows)}]), 0.0
+        offset = int(params["$offset"])
+        limit = int(params["$limit"])
+        rows = [{"i": i} for i in range(offset, min(offset + limit, self.n_rows))]
+        return httpx.Response(200, json=rows), 0.05 * (1 - offset / self.n_rows)
+
+    def handler(self, request):
+        response, delay = self.respond(request)
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(delay)
+        with self.lock:
+            self.active -= 1
+        return response
+
+    async def async_handler(self, request):
+        response, delay = self.respond(request)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(delay)
+        self.active -= 1
+        return response
+
+
+def test_get_pages_concurrent_in_order():
+    server = _SlowFirstPages(95)
+    client = httpx.Client(transport=httpx.MockTransport(server.handler))
+    query = Query("data.cdc.gov", "abc123", verbose=False, client=client)
+
+    pages = list(query.get_pages_concurrent(page_size=10, max_in_flight=4))
+
+    assert [row["i"] for page in pages for row in page] == list(range(95))
+    assert server.peak == 4
+
+
+def test_async_get_pages_concurrent_in_order():
+    server = _SlowFirstPages(95)
+
+    async def fetch():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(server.async_handler))
+        async with AsyncQuery(
+            "data.cdc.gov", "abc123", verbose=False, client=client
+        ) as query:
+            pages = [p async for p in query.get_pages_concurrent(10, max_in_flight=4)]
+        await client.aclose()
+        return pages
+
+    pages = asyncio.run(fetch())
+
+    assert [row["i"] for page in pages for row in page] == list(range(95))
+    assert server.peak == 4
+
+
+def _flaky_transport(failures: list[httpx.Response], requests: list):
+    def handler(request):
+        requests.append(request)
+        if failures:
+            return failures.pop(0)
+        return httpx.Response(200, json=[{"count_id": "3"}])
+
+    return httpx.MockTransport(handler)
+
+
+def test_rate_limited_and_server_errors_are_retried(mocker):
+    sleep = mocker.patch("cfa.dataops.soda.time.sleep")
+    requests = []
+    failures = [
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(503),
+    ]
+    client = httpx.Client(transport=_flaky_transport(failures, requests))
+
+    assert Query("d", "x", verbose=False, client=client).n_rows == 3
+    assert len(requests) == 3
+    assert sleep.call_args_list[0] == mocker.call(2.0)
+    assert 0.25 <= sleep.call_args_list[1].args[0] <= 1.0
+
+
+def test_retries_are_bounded(mocker):
+    mocker.patch("cfa.dataops.soda.time.sleep")
+    requests = []
+    failures = [httpx.Response(500) for _ in range(5)]
+    client = httpx.Client(transport=_flaky_transport(failures, requests))
+    query = Query("d", "x", verbose=False, client=client, max_retries=2)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        query.n_rows
+    assert len(requests) == 3
+
+
+def test_async_retries(mocker):
+    sleep = mocker.patch("cfa.dataops.soda.asyncio.sleep")
+    requests = []
+    failures = [httpx.Response(429, headers={"Retry-After": "1"})]
+
+    async def count():
+        client = httpx.AsyncClient(transport=_flaky_transport(failures, requests))
+        async with client:
+            return await AsyncQuery("d", "x", verbose=False, client=client).get_n_rows()
+
+    assert asyncio.run(count()) == 3
+    assert len(requests) == 2
+    sleep.assert_awaited_once_with(1.0)
+
+
+def test_pages_respect_limit():
+    requests = []
+    client = httpx.Client(transport=_socrata_transport(100, requests))
+    query = Query("d", "x", limit=25, verbose=False, client=client)
+
+    assert [len(p) for p in query.get_pages(page_size=10)] == [10, 10, 5]
+
+
+def _keyset_transport(n_rows: int, requests: list):
+    """A mock Socrata endpoint that serves `:id > 'x'` pages ordered by :id"""
+    rows = [
+        {":id": f"row-{i:04d}", "i": str(i), "even": i % 2 == 0} for i in range(n_rows)
+    ]
+
+    def handler(request):
+        requests.append(request)
+        params = request.url.params
+        assert params["$order"] == ":id"
+        assert ":id" in params["$select"].split(",")
+        where = params.get("$where", "")
+        after = re.search(r":id > '([^']*)'", where)
+        selected = [
+            dict(r)
+            for r in rows
+            if (after is None or r[":id"] > after.group(1))
+            and ("even" not in where.split("AND")[0] or r["even"])
+        ]
+        offset = int(params["$offset"])
+        return httpx.Response(
+            200, json=selected[offset : offset + int(params["$limit"])]
+        )
+
+    return httpx.MockTransport(handler)
+
+
+class TestKeysetPages:
+    """Tests for Query.get_pages_keyset"""
+
+    def test_pages_without_count_query(self):
+        requests = []
+        client = httpx.Client(transport=_keyset_transport(25, requests))
+        query = Query("d", "x", verbose=False, client=client)
+
+        pages = list(query.get_pages_keyset(page_size=10))
+
+        assert [len(p) for p in pages] == [10, 10, 5]
+        assert [row["i"] for page in pages for row in page] == [
+            str(i) for i in range(25)
+        ]
+        assert all(":id" not in row for page in pages for row in page)
+        assert len(requests) == 3
+        assert requests[1].url.params["$where"] == ":id > 'row-0009'"
+        assert requests[2].url.params["$offset"] == "0"
+
+    def test_where_limit_offset_and_selected_id(self):
+        requests = []
+        client = httpx.Client(transport=_keyset_transport(40, requests))
+        query = Query(
+            "d",
+            "x",
+            select=["i", ":id"],
+            where="even",
+            limit=7,
+            offset=2,
+            verbose=False,
+            client=client,
+        )
+
+        pages = list(query.get_pages_keyset(page_size=5))
+
+        assert [[row["i"] for row in p] for p in pages] == [
+            ["4", "6", "8", "10", "12"],
+            ["14", "16"],
+        ]
+        assert pages[0][0][":id"] == "row-0004"
+        assert requests[0].url.params["$offset"] == "2"
+        assert requests[1].url.params["$where"] == "(even) AND :id > 'row-0012'"
+        assert requests[1].url.params["$limit"] == "2"
+
+    def test_exact_multiple_of_page_size(self):
+        requests = []
+        client = httpx.Client(transport=_keyset_transport(20, requests))
+        query = Query("d", "x", verbose=False, client=client)
+
+        assert [len(p) for p in query.get_pages_keyset(page_size=10)] == [10, 10]
+        assert len(requests) == 3
+
+    def test_async_keyset_pages(self):
+        requests = []
+
+        async def fetch():
+            client = httpx.AsyncClient(transport=_keyset_transport(25, requests))
+            async with client:
+                query = AsyncQuery("d", "x", verbose=False, client=client)
+                return [p async for p in query.get_pages_keyset(page_size=10)]
+
+        pages = asyncio.run(fetch())
+        assert [len(p) for p in pages] == [10, 10, 5]
+
+
+def _csv_transport(n_rows: int, requests: list):
+    """A mock Socrata endpoint with column metadata and keyset CSV pages"""
+    columns = [
+        {"fieldName": "state", "dataTypeName": "text"},
+        {"fieldName": "cases", "dataTypeName": "number"},
+        {"fieldName": "reported", "dataTypeName": "checkbox"},
+        {"fieldName": "week_end", "dataTypeName": "floating_timestamp"},
+    ]
+
+    def row(i):
+        cases = "" if i % 5 == 0 else str(i * 10)
+        return f'"row-{i:04d}","S""{i}",{cases},{str(i % 2 == 0).lower()},2025-01-{i % 28 + 1:02d}T00:00:00.000'
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/api/views/x.json":
+            return httpx.Response(200, json={"columns": columns})
+        assert request.url.path == "/resource/x.csv"
+        params = request.url.params
+        after = re.search(r":id > '([^']*)'", params.get("$where", ""))
+        start = int(after.group(1).removeprefix("row-")) + 1 if after else 0
+        end = min(start + int(params["$limit"]), n_rows)
+        lines = ['":id","state","cases","reported","week_end"']
+        lines += [row(i) for i in range(start, end)]
+        return httpx.Response(200, content="\n".join(lines).encode() + b"\n")
+
+    return httpx.MockTransport(handler)
+
+
+class TestColumnar:
+    """Tests for Query.to_arrow, to_polars and to_pandas"""
+
+    def test_to_arrow_types_from_metadata(self):
+        import pyarrow as pa
+
+        requests = []
+        client = httpx.Client(transport=_csv_transport(25, requests))
+        query = Query("d", "x", verbose=False, client=client)
+
+        table = query.to_arrow(page_size=10)
+
+        assert table.schema == pa.schema(
+            [
+                ("state", pa.string()),
+                ("cases", pa.float64()),
+                ("reported", pa.bool_()),
+                ("week_end", pa.timestamp("ms")),
+            ]
+        )
+        assert table.num_rows == 25
+        assert table["state"][3].as_py() == 'S"3'
+        assert table["cases"].null_count == 5
+        assert table["cases"][1].as_py() == 10.0
+        assert len(requests) == 4  # metadata and three pages
+
+    def test_dtype_overrides(self):
+        import pyarrow as pa
+
+        client = httpx.Client(transport=_csv_transport(3, []))
+        query = Query("d", "x", verbose=False, client=client)
+
+        table = query.to_arrow(dtypes={"cases": "int64", "week_end": pa.date32()})
+
+        assert table.schema.field("cases").type == pa.int64()
+        assert table.schema.field("week_end").type == pa.date32()
+
+    def test_empty_result_keeps_columns(self):
+        client = httpx.Client(transport=_csv_transport(0, []))
+        query = Query("d", "x", verbose=False, client=client)
+
+        df = query.to_polars()
+
+        assert df.shape == (0, 4)
+        assert df.schema["cases"] == pl.Float64
+
+    def test_to_pandas(self):
+        client = httpx.Client(transport=_csv_transport(12, []))
+        query = Query("d", "x", verbose=False, client=client)
+
+        df = query.to_pandas(page_size=5)
+
+        assert len(df) == 12
+        assert str(df["week_end"].dtype) == "datetime64[ms]"
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestStreamingParse:
+    """Tests for parsing response bodies as they stream in"""
+
+    rows = [
+        {"i": 12345, "name": "Ünïcode ✓", "nested": {"a": [1, 2.5e3]}},
+        {"i": -7, "name": 'with "quotes", [brackets] and ]', "ok": True},
+        {"i": 0, "name": None},
+    ]
+
+    @pytest.mark.parametrize("size", [1, 2, 7, 1 << 16])
+    def test_json_array_in_chunks(self, size):
+        body = json.dumps(self.rows, ensure_ascii=False, indent=1).encode()
+        parser = _JSONArrayParser()
+
+        rows = []
+        for chunk in _chunks(body, size):
+            rows.extend(parser.feed(chunk))
+        rows.extend(parser.close())
+
+        assert rows == self.rows
+
+    def test_rows_are_emitted_as_they_complete(self):
+        parser = _JSONArrayParser()
+
+        assert parser.feed(b'[{"i": 1}, {"i"') == [{"i": 1}]
+        assert parser.feed(b": 2}, 3") == [{"i": 2}]
+        assert parser.feed(b"4]") == [34]
+        assert parser.close() == []
+
+    @pytest.mark.parametrize("body", [b'[{"i": 1}, {"i"', b'{"i": 1}', b"[1 2]"])
+    def test_malformed_json(self, body):
+        parser = _JSONArrayParser()
+
+        with pytest.raises(ValueError):
+            parser.feed(body)
+            parser.close()
+
+    def test_csv_in_chunks(self):
+        import pyarrow as pa
+
+        body = b'"a","b"\n1,"two\nlines"\n,"x"\n'
+
+        table = _read_csv_stream(iter(_chunks(body, 3)), {"a": pa.int64()})
+
+        assert table.to_pydict() == {"a": [1, None], "b": ["two\nlines", "x"]}
+
+    def test_pages_are_streamed(self):
+        body = json.dumps(self.rows).encode()
+
+        def handler(request):
+            if request.url.params.get("$select") == "count(:id)":
+                return httpx.Response(200, json=[{"count_id": "3"}])
+            return httpx.Response(200, content=iter(_chunks(body, 5)))
+
+        async def async_handler(request):
+            async def chunks():
+                for chunk in _chunks(body, 5):
+                    yield chunk
+
+            return httpx.Response(200, content=chunks())
+
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        query = Query("d", "x", verbose=False, client=client)
+
+        assert list(query.get_pages(page_size=3)) == [self.rows]
+
+        async def get_all():
+            async_client = httpx.AsyncClient(
+                transport=httpx.MockTransport(async_handler)
+            )
+            async with async_client:
+                query = AsyncQuery("d", "x", verbose=False, client=async_client)
+                return await query.get_all()
+
+        assert asyncio.run(get_all()) == self.rows
+
+    def test_page_failing_midway_is_requested_again(self, mocker):
+        mocker.patch("cfa.dataops.soda.time.sleep")
+        requests = []
+        body = json.dumps(self.rows).encode()
+
+        def broken():
+            yield body[:20]
+            raise httpx.ReadError("connection reset")
+
+        def handler(request):
+            requests.append(request)
+            content = broken() if len(requests) == 1 else iter(_chunks(body, 5))
+            return httpx.Response(200, content=content)
+
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+
+        assert Query("d", "x", verbose=False, client=client).get_all() == self.rows
+        assert len(requests) == 2
+
+
+class TestToEndpoint:
+    """Tests for streaming a query into a blob endpoint"""
+
+    @pytest.fixture
+    def endpoint(self, tmp_path, mocker):
+        mocker.patch("cfa.dataops.ledger.LedgerWriter.submit")
+        return BlobEndpoint(
+            account="account_test",
+            container="container_test",
+            prefix="test/prefix",
+            ledger_location={
+                "account": "account_test",
+                "container": "container_test",
+                "prefix": "_access/test/ledger/",
+            },
+            ns="test.endpoint",
+            backend=f"local:{tmp_path}",
+        )
+
+    def test_parts_under_one_version(self, endpoint, tmp_path, mocker):
+        mocker.patch(
+            "cfa.dataops.utils.get_timestamp", return_value="2025-01-01T00-00-00"
+        )
+        client = httpx.Client(transport=_csv_transport(25, []))
+        query = Query("d", "x", verbose=False, client=client)
+
+        summary = query.to_endpoint(endpoint, page_size=4, rows_per_file=10)
+
+        assert summary.version == "2025-01-01T00-00-00"
+        assert summary.files == [
+            "2025-01-01T00-00-00/data_00000.parquet",
+            "2025-01-01T00-00-00/data_00001.parquet",
+            "2025-01-01T00-00-00/data_00002.parquet",
+        ]
+        assert summary.rows == 25
+        assert [s.stage for s in summary.stages] == ["download", "encode", "upload"]
+        assert all(s.rows == 25 for s in summary.stages)
+        parts = [pl.read_parquet(tmp_path / "test/prefix" / f) for f in summary.files]
+        assert [p.height for p in parts] == [10, 10, 5]
+        assert pl.concat(parts).equals(
+            Query("d", "x", verbose=False, client=client).to_polars()
+        )
+        assert endpoint.get_versions() == ["2025-01-01T00-00-00"]
+
+    def test_csv_without_version(self, endpoint):
+        client = httpx.Client(transport=_csv_transport(3, []))
+        query = Query("d", "x", verbose=False, client=client)
+
+        summary = query.to_endpoint(
+            endpoint, "v1/cases.csv", file_format="csv", auto_version=False
+        )
+
+        assert summary.version is None
+        assert summary.files == ["v1/cases_00000.csv"]
+
+    def test_empty_query_writes_schema_only_part(self, endpoint, tmp_path):
+        client = httpx.Client(transport=_csv_transport(0, []))
+        query = Query("d", "x", verbose=False, client=client)
+
+        summary = query.to_endpoint(endpoint, auto_version=False)
+
+        assert summary.files == ["data_00000.parquet"]
+        df = pl.read_parquet(tmp_path / "test/prefix/data_00000.parquet")
+        assert df.shape == (0, 4)
+
+    def test_download_errors_stop_the_pipeline(self, endpoint, mocker):
+        client = httpx.Client(transport=_csv_transport(25, []))
+        query = Query("d", "x", verbose=False, client=client, max_retries=0)
+        pages = query._iter_arrow_pages(page_size=4)
+
+        def failing_pages(**kwargs):
+            yield next(pages)
+            raise httpx.ConnectError("lost")
+
+        mocker.patch.object(query, "_iter_arrow_pages", side_effect=failing_pages)
+        write = mocker.spy(endpoint, "write_blob")
+
+        with pytest.raises(httpx.ConnectError, match="lost"):
+            query.to_endpoint(endpoint, rows_per_file=10)
+        write.assert_not_called()
+
+    def test_failed_upload_removes_written_parts(self, endpoint, tmp_path, mocker):
+        client = httpx.Client(transport=_csv_transport(25, []))
+        query = Query("d", "x", verbose=False, client=client)
+        write_blob = endpoint.write_blob
+
+        def failing_write(data, path_after_prefix):
+            if path_after_prefix.endswith("_00001.parquet"):
+                raise OSError("upload failed")
+            write_blob(data, path_after_prefix=path_after_prefix)
+
+        write = mocker.patch.object(endpoint, "write_blob", side_effect=failing_write)
+
+        with pytest.raises(OSError, match="upload failed"):
+            query.to_endpoint(endpoint, page_size=4, rows_per_file=10)
+        assert write.call_count == 2
+        assert list((tmp_path / "test/prefix").rglob("*.parquet")) == []
+
+
+def _updates_transport(rows: dict, requests: list):
+    """A mock Socrata endpoint of rows {id: (state, cases, updated_at)} that
+    filters on ``:updated_at > '...'``"""
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/api/views/x.json":
+            columns = [
+                {"fieldName": "state", "dataTypeName": "text"},
+                {"fieldName": "cases", "dataTypeName": "number"},
+            ]
+            return httpx.Response(200, json={"columns": columns})
+        params = request.url.params
+        assert ":updated_at" in params["$select"]
+        where = params.get("$where", "")
+        after = re.search(r":id > '([^']*)'", where)
+        since = re.search(r":updated_at > '([^']*)'", where)
+        selected = [
+            (i, *row)
+            for i, row in sorted(rows.items())
+            if (after is None or i > after.group(1))
+            and (since is None or row[2] > since.group(1))
+        ][: int(params["$limit"])]
+        lines = ['":id","state","cases",":updated_at"']
+        lines += [
+            f"{i},{state},{cases},{updated}" for i, state, cases, updated in selected
+        ]
+        return httpx.Response(200, content="\n".join(lines).encode() + b"\n")
+
+    return httpx.MockTransport(handler)
+
+
+class TestIncrementalExtract:
+    """Tests for watermark-based incremental extracts"""
+
+    @pytest.fixture
+    def endpoint(self, tmp_path, mocker):
+        mocker.patch("cfa.dataops.ledger.LedgerWriter.submit")
+        mocker.patch(
+            "cfa.dataops.utils.get_timestamp",
+            side_effect=[f"2025-01-0{i}T00-00-00" for i in range(1, 10)],
+        )
+        return BlobEndpoint(
+            account="account_test",
+            container="container_test",
+            prefix="test/prefix",
+            ledger_location={"account": "a", "container": "c", "prefix": "l/"},
+            ns="test.endpoint",
+            backend=f"local:{tmp_path}",
+        )
+
+    @pytest.fixture
+    def rows(self):
+        return {
+            "row-1": ("AK", 1, "2025-01-01T00:00:00.000"),
+            "row-2": ("AL", 2, "2025-01-01T00:00:00.000"),
+        }
+
+    def test_delta_versions(self, endpoint, rows):
+        requests = []
+        client = httpx.Client(transport=_updates_transport(rows, requests))
+        query = Query("d", "x", verbose=False, client=client)
+
+        first = query.extract_incremental(endpoint, ":updated_at")
+        rows["row-2"] = ("AL", 5, "2025-01-08T00:00:00.000")
+        rows["row-3"] = ("AR", 3, "2025-01-08T00:00:00.000")
+        requests.clear()
+        second = query.extract_incremental(endpoint, ":updated_at")
+        third = query.extract_incremental(endpoint, ":updated_at")
+
+        assert (first.rows, second.rows, third.rows) == (2, 2, 0)
+        assert (
+            ":updated_at > '2025-01-01T00:00:00.000'"
+            in (requests[1].url.params["$where"])
+        )
+        assert endpoint.get_watermark("==2025-01-02T00-00-00") == {
+            "column": ":updated_at",
+            "watermark": "2025-01-08T00:00:00.000",
+            "since": "2025-01-01T00:00:00.000",
+            "mode": "delta",
+            "rows": 2,
+            "version": "2025-01-02T00-00-00",
+        }
+        assert endpoint.get_watermark()["watermark"] == "2025-01-08T00:00:00.000"
+        assert endpoint.get_watermark("==2025-01-01T00-00-00")["mode"] == "full"
+
+        delta = endpoint.get_dataframe("pl", version_spec="==2025-01-02T00-00-00")
+        assert delta["state"].to_list() == ["AL", "AR"]
+        assert delta["cases"].to_list() == [5.0, 3.0]
+
+    def test_delta_without_new_rows_writes_nothing(self, endpoint, rows):
+        client = httpx.Client(transport=_updates_transport(rows, []))
+        query = Query("d", "x", verbose=False, client=client)
+        first = query.extract_incremental(endpoint, ":updated_at")
+
+        summary = query.extract_incremental(endpoint, ":updated_at")
+
+        assert summary.version is None
+        assert (summary.files, summary.rows) == ([], 0)
+        assert summary.watermark == "2025-01-01T00:00:00.000"
+        assert endpoint.get_versions() == [first.version]
+        assert endpoint.get_watermark()["version"] == first.version
+
+    def test_merged_full_versions(self, endpoint, rows):
+        client = httpx.Client(transport=_updates_transport(rows, []))
+        query = Query("d", "x", verbose=False, client=client, select=":id,*")
+
+        query.extract_incremental(endpoint, ":updated_at", mode="full", key=":id")
+        rows["row-2"] = ("AL", 5, "2025-01-08T00:00:00.000")
+        rows["row-3"] = ("AR", 3, "2025-01-08T00:00:00.000")
+        summary = query.extract_incremental(
+            endpoint, ":updated_at", mode="full", key=":id"
+        )
+
+        assert summary.rows == 2
+        assert summary.files == ["2025-01-02T00-00-00/data_00000.parquet"]
+        full = endpoint.get_dataframe("pl").sort(":id")
+        assert full.select(":id", "cases").rows() == [
+            ("row-1", 1.0),
+            ("row-2", 5.0),
+            ("row-3", 3.0),
+        ]
+        assert endpoint.get_watermark()["mode"] == "full"
+
+    def test_full_version_needs_a_full_base(self, endpoint, rows):
+        client = httpx.Client(transport=_updates_transport(rows, []))
+        query = Query("d", "x", verbose=False, client=client)
+        query.extract_incremental(endpoint, ":updated_at")
+        rows["row-3"] = ("AR", 3, "2025-01-08T00:00:00.000")
+        query.extract_incremental(endpoint, ":updated_at")
+
+        with pytest.raises(ValueError, match="is a delta extract"):
+            query.extract_incremental(endpoint, ":updated_at", mode="full")
+
+    def test_watermark_from_source_config(self, tmp_path, mocker, rows):
+        mocker.patch("cfa.dataops.ledger.LedgerWriter.submit")
+        config = tmp_path / "dataset.toml"
+        config.write_text(
+            '[properties]\nname = "cases"\ntype = "etl"\n\n'
+            '[source]\nwatermark = ":updated_at"\nincremental = "delta"\n\n'
+            '[extract]\naccount = "a"\ncontainer = "c"\nprefix = "raw/cases"\n'
+        )
+        dataset = DatasetEndpoint(
+            str(config),
+            {
+                "storage": {
+                    "account": "a",
+                    "container": "c",
+                    "backend": f"local:{tmp_path / 'blobs'}",
+                },
+                "access_ledger": {"path": "_access/"},
+            },
+            "tests.cases",
+        )
+        client = httpx.Client(transport=_updates_transport(rows, []))
+
+        summary = dataset.extract_incremental(
+            Query("d", "x", verbose=False, client=client)
+        )
+
+        assert summary.rows == 2
+        assert dataset.extract.get_watermark()["column"] == ":updated_at"
+
+
+def _failing_after(transport: httpx.MockTransport, n_requests: int):
+    """Wrap a mock transport to fail with a 500 after ``n_requests``"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) > n_requests:
+            return httpx.Response(500)
+        return transport.handle_request(request)
+
+    return httpx.MockTransport(handler)
+
+
+class TestCheckpoints:
+    """Tests for resuming downloads from a checkpoint directory"""
+
+    def test_get_pages_resumes_from_the_first_missing_page(self, tmp_path):
+        requests = []
+        failing = _failing_after(_socrata_transport(25, requests), 3)
+        query = Query("d", "x", verbose=False, max_retries=0)
+        query._client = httpx.Client(transport=failing)
+
+        pages = []
+        with pytest.raises(httpx.HTTPStatusError):
+            for page in query.get_pages(page_size=10, checkpoint_dir=str(tmp_path)):
+                pages.append(page)
+        assert len(pages) == 2  # the count and two pages were served
+
+        requests.clear()
+        query._client = httpx.Client(transport=_socrata_transport(25, requests))
+        resumed = list(query.get_pages(page_size=10, checkpoint_dir=str(tmp_path)))
+
+        assert resumed[:2] == pages
+        assert [row["i"] for row in resumed[2]] == list(range(20, 25))
+        assert [r.url.params["$offset"] for r in requests] == ["20"]
+
+    def test_to_arrow_resumes_after_the_last_saved_id(self, tmp_path):
+        expected = Query(
+            "d",
+            "x",
+            verbose=False,
+            client=httpx.Client(transport=_csv_transport(25, [])),
+        ).to_arrow(page_size=10)
+        query = Query("d", "x", verbose=False, max_retries=0)
+        query._client = httpx.Client(
+            transport=_failing_after(_csv_transport(25, []), 2)
+        )
+        with pytest.raises(httpx.HTTPStatusError):
+            query.to_arrow(page_size=10, checkpoint_dir=str(tmp_path))
+
+        requests = []
+        query._client = httpx.Client(transport=_csv_transport(25, requests))
+        table = query.to_arrow(page_size=10, checkpoint_dir=str(tmp_path))
+
+        assert table.equals(expected)
+        pages = [r for r in requests if r.url.path == "/resource/x.csv"]
+        assert ":id > 'row-0009'" in pages[0].url.params["$where"]
+        assert len(pages) == 2
+
+        requests.clear()
+        assert query.to_arrow(page_size=10, checkpoint_dir=str(tmp_path)).equals(
+            expected
+        )
+        assert requests == []
+
+    def test_checkpoint_of_another_query(self, tmp_path):
+        client = httpx.Client(transport=_socrata_transport(5, []))
+        list(
+            Query("d", "x", verbose=False, client=client).get_pages(
+                checkpoint_dir=str(tmp_path)
+            )
+        )
+        query = Query("d", "x", verbose=False, client=client, where="i > 2")
+
+        with pytest.raises(ValueError, match="another query"):
+            list(query.get_pages(checkpoint_dir=str(tmp_path)))
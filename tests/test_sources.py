@@ -0,0 +1,170 @@
+"""Tests for config-driven extracts of a dataset's [source] table"""
+
+import httpx
+import polars as pl
+import pytest
+
+from cfa.dataops.catalog import DatasetEndpoint
+from cfa.dataops.soda import ExtractSummary, Query
+from cfa.dataops.sources import socrata_query, source_type
+
+from .test_soda import _csv_transport
+
+
+@pytest.fixture
+def make_dataset(tmp_path, mocker):
+    """Build a dataset from a [source] table, stored in a local directory"""
+    mocker.patch("cfa.dataops.ledger.LedgerWriter.submit")
+
+    def make(source: str, extract: bool = True) -> DatasetEndpoint:
+        config = tmp_path / "dataset.toml"
+        config.write_text(
+            '[properties]\nname = "cases"\ntype = "etl"\n\n'
+            + (f"[source]\n{source}\n\n" if source else "")
+            + ('[extract]\nprefix = "raw/cases"\n\n' if extract else "")
+            + '[load]\nprefix = "load/cases"\n'
+        )
+        return DatasetEndpoint(
+            str(config),
+            {
+                "storage": {
+                    "account": "a",
+                    "container": "c",
+                    "backend": f"local:{tmp_path / 'blobs'}",
+                },
+                "access_ledger": {"path": "_access/"},
+            },
+            "tests.cases",
+        )
+
+    return make
+
+
+class TestSourceType:
+    """Tests for telling the type of a source"""
+
+    @pytest.mark.parametrize(
+        "source, expected",
+        [
+            ({"url": "https://data.cdc.gov/resource/abcd-1234.csv"}, "socrata"),
+            ({"domain": "data.cdc.gov", "id": "abcd-1234"}, "socrata"),
+            ({"url": "https://example.com/files/cases.csv"}, "http"),
+            ({"path": "data/*.parquet"}, "file"),
+            ({"url": "https://example.com/x.csv", "type": "file"}, "file"),
+        ],
+    )
+    def test_source_types(self, source, expected):
+        assert source_type(source) == expected
+
+    def test_unknown_sources(self):
+        with pytest.raises(ValueError, match="needs a url"):
+            source_type({"uid": "x"})
+        with pytest.raises(ValueError, match="not supported"):
+            source_type({"url": "https://x/y", "type": "ftp"})
+
+    def test_socrata_query(self, monkeypatch):
+        monkeypatch.setenv("SOCRATA_APP_TOKEN", "token")
+        query = socrata_query(
+            {"url": "https://data.cdc.gov/resource/abcd-1234.csv", "where": "x > 1"}
+        )
+
+        assert (query.domain, query.id, query.where) == (
+            "data.cdc.gov",
+            "abcd-1234",
+            "x > 1",
+        )
+        assert query.app_token == "token"
+
+
+class TestExtract:
+    """Tests for DatasetEndpoint.run_extract"""
+
+    def test_socrata_source(self, make_dataset, mocker):
+        requests = []
+        client = httpx.Client(transport=_csv_transport(25, requests))
+        mocker.patch.object(Query, "client", property(lambda self: client))
+        dataset = make_dataset(
+            'url = "https://data.cdc.gov/resource/x.csv"\npagination = {limit = 10}'
+        )
+
+        summary = dataset.run_extract(rows_per_file=20, verbose=False)
+
+        assert summary.rows == 25
+        assert [f.split("/")[1] for f in summary.files] == [
+            "data_00000.parquet",
+            "data_00001.parquet",
+        ]
+        pages = [r for r in requests if r.url.path == "/resource/x.csv"]
+        assert [r.url.params["$limit"] for r in pages] == ["10", "10", "10"]
+        df = dataset.extract.get_dataframe("pl")
+        assert df.schema["cases"] == pl.Float64
+        assert df.height == 25
+
+    def test_incremental_socrata_source(self, make_dataset, mocker):
+        summary = ExtractSummary("v1", [], 0, 0.0, [])
+        run = mocker.patch(
+            "cfa.dataops.catalog.DatasetEndpoint.extract_incremental",
+            return_value=summary,
+        )
+        dataset = make_dataset(
+            'url = "https://data.cdc.gov/resource/x.csv"\nwatermark = ":updated_at"'
+        )
+
+        assert dataset.run_extract(verbose=False) is summary
+        query = run.call_args.args[0]
+        assert (query.domain, query.id) == ("data.cdc.gov", "x")
+
+    def test_http_csv_source(self, make_dataset, mocker):
+        def handler(request):
+            assert request.url.path == "/files/cases.csv"
+            return httpx.Response(200, content=b"state,cases\nAK,1\nAL,2\n")
+
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        mocker.patch(
+            "httpx.stream",
+            side_effect=lambda method, url, **kwargs: client.stream(method, url),
+        )
+        dataset = make_dataset('url = "https://example.com/files/cases.csv"')
+
+        summary = dataset.run_extract(file_format="csv")
+
+        assert summary.rows == 2
+        assert summary.files == [f"{summary.version}/data_00000.csv"]
+        df = dataset.extract.get_dataframe("pl")
+        assert df.to_dicts() == [
+            {"state": "AK", "cases": 1},
+            {"state": "AL", "cases": 2},
+        ]
+
+    def test_local_files(self, make_dataset, tmp_path):
+        (tmp_path / "in").mkdir()
+        pl.DataFrame({"a": [1, 2]}).write_ndjson(tmp_path / "in" / "one.jsonl")
+        pl.DataFrame({"a": [3]}).write_ndjson(tmp_path / "in" / "two.jsonl")
+        dataset = make_dataset(f'path = "{tmp_path}/in/*.jsonl"')
+
+        summary = dataset.run_extract(path_after_prefix="cases", rows_per_file=2)
+
+        assert summary.rows == 3
+        assert [f.split("/")[1] for f in summary.files] == [
+            "cases_00000.parquet",
+            "cases_00001.parquet",
+        ]
+        assert sorted(dataset.extract.get_dataframe("pl")["a"]) == [1, 2, 3]
+
+    def test_json_array_file_and_overrides(self, make_dataset, tmp_path):
+        (tmp_path / "cases.txt").write_text('[{"a": 1}, {"a": 2}]')
+        dataset = make_dataset('path = "missing.csv"')
+
+        summary = dataset.run_extract(path=str(tmp_path / "cases.txt"), format="json")
+
+        assert summary.rows == 2
+
+    def test_missing_files(self, make_dataset):
+        with pytest.raises(FileNotFoundError, match="No files match"):
+            make_dataset('path = "missing/*.csv"').run_extract()
+
+    def test_needs_an_extract_stage_and_a_source(self, make_dataset):
+        with pytest.raises(ValueError, match="no extract stage"):
+            make_dataset('path = "x.csv"', extract=False).run_extract()
+        with pytest.raises(ValueError, match=r"no \[source\] table"):
+            make_dataset("").run_extract()
@@ -0,0 +1,120 @@
+"""Tests for utils dataset and file discovery"""
+
+import glob
+import os
+
+import pytest
+import tomli
+
+from cfa.dataops.utils import (
+    FileStat,
+    discover_datasets,
+    get_fs_ns_map,
+    read_toml_name,
+    scan_files,
+)
+
+_here = os.path.abspath(os.path.dirname(__file__))
+_config_dirs = [
+    os.path.join(_here, "test_datasets"),
+    os.path.join(
+        _here, "..", "cfa", "dataops", "create_catalog", "repo_files", "datasets"
+    ),
+]
+
+
+@pytest.fixture
+def catalog_dir(tmp_path):
+    (tmp_path / "team a" / "sub").mkdir(parents=True)
+    (tmp_path / ".hidden").mkdir()
+    (tmp_path / "top.toml").write_text('[properties]\nname = "Top Data"\n')
+    (tmp_path / "team a" / "one.toml").write_text(
+        "# comment\n[properties]\n# name = 'not this'\nname = 'one'  # trailing\n"
+    )
+    (tmp_path / "team a" / "sub" / "two.toml").write_text(
+        '[source]\nname = "not this"\n\n[properties]\nname = "two"\n'
+    )
+    (tmp_path / "team a" / "notes.txt").write_text("not a config")
+    (tmp_path / ".hidden" / "skip.toml").write_text('[properties]\nname = "x"\n')
+    return tmp_path
+
+
+class TestScanFiles:
+    """Tests for the single-pass file scan"""
+
+    def test_finds_nested_files_with_stats(self, catalog_dir):
+        files = scan_files(str(catalog_dir), ".toml")
+
+        expected = sorted(
+            glob.glob(os.path.join(catalog_dir, "**", "*.toml"), recursive=True)
+        )
+        assert list(files) == expected
+        for path, file_stat in files.items():
+            st = os.stat(path)
+            assert file_stat == FileStat(st.st_size, st.st_mtime_ns)
+
+    def test_missing_directory(self, tmp_path):
+        assert scan_files(str(tmp_path / "missing"), "toml") == {}
+
+
+class TestReadTomlName:
+    """Tests for the minimal TOML header parse"""
+
+    @pytest.mark.parametrize(
+        "path",
+        [p for d in _config_dirs for p in sorted(glob.glob(os.path.join(d, "*.toml")))],
+    )
+    def test_matches_full_parse(self, path):
+        with open(path, "rb") as f:
+            expected = tomli.load(f)["properties"]["name"]
+        assert read_toml_name(path) == expected
+
+    def test_stops_after_the_name(self, tmp_path):
+        path = tmp_path / "big.toml"
+        path.write_text('[properties]\nname = "fast"\n\n[broken\n')
+        assert read_toml_name(str(path)) == "fast"
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            '[properties]\nname = "esc\\u0061ped"\n',
+            'properties.name = "escaped"\n',
+            '[properties]\ndescription = """\n[not a table]\n"""\nname = "escaped"\n',
+        ],
+    )
+    def test_falls_back_to_full_parse(self, tmp_path, content):
+        path = tmp_path / "config.toml"
+        path.write_text(content)
+        assert read_toml_name(str(path)) == "escaped"
+
+    def test_missing_name(self, tmp_path):
+        path = tmp_path / "config.toml"
+        path.write_text("[properties]\nautomate = false\n")
+        with pytest.raises(KeyError):
+            read_toml_name(str(path))
+
+
+class TestDiscoverDatasets:
+    """Tests for catalog dataset discovery"""
+
+    def test_namespace_map_and_stats(self, catalog_dir):
+        ns_map, stats = discover_datasets(str(catalog_dir))
+
+        assert ns_map == {
+            "top_data": str(catalog_dir / "top.toml"),
+            "team_a": {
+                "one": str(catalog_dir / "team a" / "one.toml"),
+                "sub": {"two": str(catalog_dir / "team a" / "sub" / "two.toml")},
+            },
+        }
+        assert set(stats) == {
+            str(catalog_dir / "top.toml"),
+            str(catalog_dir / "team a" / "one.toml"),
+            str(catalog_dir / "team a" / "sub" / "two.toml"),
+        }
+
+    def test_fs_ns_map_uses_file_names(self, catalog_dir):
+        ns_map = get_fs_ns_map(str(catalog_dir), "txt")
+        assert ns_map == {
+            "team_a": {"notes": str(catalog_dir / "team a" / "notes.txt")}
+        }
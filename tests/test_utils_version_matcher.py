@@ -2,7 +2,11 @@
 
 import pytest
 
-from cfa.dataops.utils import construct_version_spec, version_matcher
+from cfa.dataops.utils import (
+    construct_version_spec,
+    version_matcher,
+    versions_matching,
+)
 
 
 class TestConstructVersionSpec:
@@ -169,3 +173,29 @@ class TestVersionMatcher:
             version_matcher(spec, available_versions, selection="oldest")
             == expected_oldest
         )
+
+
+class TestVersionsMatching:
+    """Tests for versions_matching, selecting every matching version."""
+
+    available_versions = [
+        "2025-12-16T00-00-00",
+        "2025-12-14T00-00-00",
+        "2025-12-15T00-00-00",
+    ]
+
+    def test_all_versions_oldest_first(self):
+        assert versions_matching(None, self.available_versions) == [
+            "2025-12-14T00-00-00",
+            "2025-12-15T00-00-00",
+            "2025-12-16T00-00-00",
+        ]
+
+    def test_range_specifier(self):
+        assert versions_matching(">=2025-12-15", self.available_versions) == [
+            "2025-12-15T00-00-00",
+            "2025-12-16T00-00-00",
+        ]
+
+    def test_no_match(self):
+        assert versions_matching(">2026-01-01", self.available_versions) == []
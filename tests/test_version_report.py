@@ -0,0 +1,144 @@
+"""Tests for the catalog-wide version report"""
+
+import os
+
+import pandas as pd
+import polars as pl
+import pytest
+
+from cfa.dataops.catalog import dict_to_sn
+
+BRONZE = "prefix_test/bronze/test_dataset"
+SILVER = "prefix_test/silver/test_dataset"
+RAW = "prefix_test/raw/test_dataset"
+
+
+@pytest.fixture
+def catalog(monkeypatch, tmp_path, dataset_ns_map, dataset_defaults, mocker):
+    """A catalog served from a local directory of versioned blobs"""
+    monkeypatch.setenv("DATAOPS_BACKEND", f"local:{tmp_path}")
+    mocker.patch("cfa.dataops.ledger.LedgerWriter.submit")
+    files = {
+        f"{BRONZE}/2025-01-01T00-00-00/data.csv": b"a,b\n1,2\n",
+        f"{BRONZE}/2025-01-02T00-00-00/data.csv": b"a,b\n1,2\n3,4\n",
+        f"{BRONZE}/2025-01-02T00-00-00/meta/schema.json": b"{}",
+        f"{SILVER}/2025-01-03T00-00-00/data.parquet": b"PAR1",
+        f"{RAW}/2025-02-01T00-00-00/data.csv": b"x\n",
+    }
+    for name, data in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    os.utime(tmp_path / f"{BRONZE}/2025-01-02T00-00-00/data.csv", (0, 1_700_000_000))
+    os.utime(tmp_path / f"{BRONZE}/2025-01-01T00-00-00/data.csv", (0, 1_600_000_000))
+    os.utime(
+        tmp_path / f"{BRONZE}/2025-01-02T00-00-00/meta/schema.json", (0, 1_500_000_000)
+    )
+    return dict_to_sn(dataset_ns_map, dataset_defaults)
+
+
+class TestVersionReport:
+    """Tests for CatalogNamespace.version_report"""
+
+    def test_report_of_a_namespace(self, catalog):
+        report = catalog.version_report(prefix="tests.multistage", output="polars")
+
+        assert report.columns == [
+            "dataset",
+            "stage",
+            "versions",
+            "newest_version",
+            "oldest_version",
+            "total_bytes",
+            "last_modified",
+            "error",
+        ]
+        assert report.drop("last_modified").to_dicts() == [
+            {
+                "dataset": "tests.multistage.multistage_test",
+                "stage": "stage_01",
+                "versions": 2,
+                "newest_version": "2025-01-02T00-00-00",
+                "oldest_version": "2025-01-01T00-00-00",
+                "total_bytes": 22,
+                "error": None,
+            },
+            {
+                "dataset": "tests.multistage.multistage_test",
+                "stage": "stage_02",
+                "versions": 1,
+                "newest_version": "2025-01-03T00-00-00",
+                "oldest_version": "2025-01-03T00-00-00",
+                "total_bytes": 4,
+                "error": None,
+            },
+            {
+                "dataset": "tests.multistage.multistage_test",
+                "stage": "stage_03",
+                "versions": 0,
+                "newest_version": None,
+                "oldest_version": None,
+                "total_bytes": 0,
+                "error": None,
+            },
+        ]
+        assert report["last_modified"][0].timestamp() == 1_700_000_000
+        assert report["last_modified"][2] is None
+
+    def test_whole_catalog_as_pandas(self, catalog):
+        report = catalog.version_report()
+
+        assert isinstance(report, pd.DataFrame)
+        assert set(report["dataset"]) == {
+            "tests.multistage.multistage_test",
+            "tests.etl_test",
+            "tests.experiment_test",
+            "tests.reference_test",
+        }
+        raw = report[
+            (report["dataset"] == "tests.etl_test") & (report["stage"] == "extract")
+        ]
+        assert raw["newest_version"].tolist() == ["2025-02-01T00-00-00"]
+
+    def test_versions_are_ordered_as_versions(self, catalog, tmp_path):
+        """Test that newest and oldest follow version order, not string order"""
+        for version in ["1.9.0", "1.10.0", "1.2.0"]:
+            path = tmp_path / RAW / version / "data.csv"
+            path.parent.mkdir(parents=True)
+            path.write_bytes(b"x\n")
+        for path in (tmp_path / RAW).glob("2025-*"):
+            (path / "data.csv").unlink()
+            path.rmdir()
+
+        report = catalog.version_report(prefix="tests.etl_test", output="pl")
+        extract = report.filter(pl.col("stage") == "extract")
+
+        assert extract["newest_version"].to_list() == ["1.10.0"]
+        assert extract["oldest_version"].to_list() == ["1.2.0"]
+
+    def test_without_sizes(self, catalog):
+        report = catalog.tests.multistage.version_report(
+            include_sizes=False, output="pl"
+        )
+
+        assert report["versions"].to_list() == [2, 1, 0]
+        assert report["total_bytes"].null_count() == 3
+        assert report["last_modified"].null_count() == 3
+
+    def test_listing_errors_are_reported(self, catalog, mocker):
+        stage = catalog.tests.multistage.multistage_test.stage_02
+        mocker.patch.object(stage, "_list_blobs", side_effect=OSError("denied"))
+
+        report = catalog.version_report(prefix="tests.multistage", output="pl")
+
+        assert report.filter(pl.col("stage") == "stage_02").row(0, named=True) == {
+            "dataset": "tests.multistage.multistage_test",
+            "stage": "stage_02",
+            "versions": None,
+            "newest_version": None,
+            "oldest_version": None,
+            "total_bytes": None,
+            "last_modified": None,
+            "error": "denied",
+        }
+        assert report["error"].null_count() == 2